@@ -0,0 +1,83 @@
+"""
+Per-call overhead of building the prompt | model chains.
+
+Invokes the name query chain with a fake model (no network) in three ways:
+
+- registry: the chain comes from the chain registry, built once;
+- compose: the prompt is piped into the cached model on every call, as the nodes used to;
+- client: a new chat model client is also constructed on every call (placeholder key,
+  nothing is sent), which is what losing client reuse costs on top of composing.
+
+Usage:
+    python -m benchmarks.chain_overhead --calls 2000
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from src.language_models.chains import ChainRegistry
+from src.language_models.fakes import fake_name_query_llm
+from src.language_models.prompts import name_query_prompt
+
+
+CHAIN_INPUT = {'text': "خرج سليم من البيت في الصباح الباكر ومشى نحو السوق القديم."}
+
+
+def time_calls(call: Callable[[], object], calls: int, repeat: int) -> float:
+    """Return the median time of one call in microseconds, over `repeat` batches of `calls` calls."""
+    batches = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            call()
+        batches.append((time.perf_counter() - started) / calls)
+    return statistics.median(batches) * 1e6
+
+
+def measure(calls: int, repeat: int) -> Dict[str, float]:
+    """Measure the per-call time of every mode."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    fake_llm = fake_name_query_llm()
+    registry = ChainRegistry({'name_query': lambda: name_query_prompt | fake_llm})
+
+    def registry_call():
+        return registry.get('name_query').invoke(CHAIN_INPUT)
+
+    def compose_call():
+        return (name_query_prompt | fake_llm).invoke(CHAIN_INPUT)
+
+    def client_call():
+        ChatGoogleGenerativeAI(model='gemini-2.5-flash', temperature=0.0)
+        return (name_query_prompt | fake_llm).invoke(CHAIN_INPUT)
+
+    return {
+        'registry': time_calls(registry_call, calls, repeat),
+        'compose': time_calls(compose_call, calls, repeat),
+        'client': time_calls(client_call, max(1, calls // 10), repeat),
+    }
+
+
+def print_report(report: Dict[str, float]):
+    """Print the per-call times and the overhead of each mode over the registry."""
+    for mode, microseconds in report.items():
+        overhead = microseconds - report['registry']
+        print(f"{mode:>9}: {microseconds:>9.1f} µs/call  (+{overhead:.1f} µs over registry)")
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure the per-call overhead of building chains.")
+    parser.add_argument('--calls', type=int, default=2000, help="Calls per batch")
+    parser.add_argument('--repeat', type=int, default=5, help="Batches per mode; the median is reported")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-placeholder')
+    print_report(measure(args.calls, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
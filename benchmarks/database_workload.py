@@ -0,0 +1,292 @@
+"""
+Workload benchmark of CharacterDatabase, replaying the access pattern of the analysis graph.
+
+Every writer plays one book chunk by chunk, like profile_retriever_creator and
+profile_refresher do: a few names are drawn per chunk (a Zipf distribution over a pool of
+names, so main characters come back in most chunks and minor ones rarely), every name is
+looked up with find_characters_by_name, inserted when no stored character has exactly that
+name, the characters of the chunk are added to the co-occurrence graph (stored in the same
+file), and every character of the chunk gets its profile updated with a new event and,
+sometimes, a new relationship, so the profiles grow as the book goes on. As in the graph, the
+co-occurrences are written when cooccurrence_config is enabled and the new entries are
+recorded in the history table when profile_compaction_config is; --[no-]cooccurrence and
+--[no-]history override them.
+
+Several writers share the database file, each playing its own book (seeded differently),
+to measure lock contention; failed operations (e.g. "database is locked") are counted.
+
+Reported: operations per second, the latency percentiles of every operation, the number of
+characters and the size of the database file.
+
+Usage:
+    python -m benchmarks.database_workload --chunks 1000 --names 5000
+    python -m benchmarks.database_workload --writers 4 --preload 10000 --no-history
+    python -m benchmarks.database_workload --save benchmarks/baselines/database_workload.json
+    python -m benchmarks.database_workload --compare benchmarks/baselines/database_workload.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic_corpus import SyntheticBookGenerator
+from src.configs import cooccurrence_config, profile_compaction_config
+from src.databases.cooccurrence import CooccurrenceGraph
+from src.databases.database import CharacterDatabase
+
+
+OPERATIONS = ['lookup', 'insert', 'cooccurrence', 'history', 'update']
+PERCENTILES = [50, 95, 99]
+
+
+def make_names(count: int, seed: int = 0) -> List[str]:
+    """Return distinct character names of one or two Arabic-like words."""
+    generator = SyntheticBookGenerator(seed, vocabulary_size=max(100, count))
+    rng = random.Random(seed)
+    names = dict.fromkeys(generator.vocabulary)
+    while len(names) < count:
+        names[" ".join(rng.sample(generator.vocabulary, 2))] = None
+    return list(names)[:count]
+
+
+def empty_profile(name: str) -> Dict[str, Any]:
+    """Return the profile inserted for a new character, as in profile_retriever_creator."""
+    return {'name': name, 'hint': '', 'age': '', 'role': '', 'physical_characteristics': [], 'personality': '',
+            'events': [], 'relationships': [], 'aliases': []}
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(rank / 100 * len(values) + 0.5)) - 1))]
+
+
+class Writer:
+    """
+    Plays the database operations of one book.
+    """
+
+    def __init__(self, database: CharacterDatabase, names: List[str], seed: int, chunks: int,
+                 names_per_chunk: int, zipf: float, history: bool, cooccurrence: bool):
+        self.database = database
+        self.cooccurrences = CooccurrenceGraph(database.db_path) if cooccurrence else None
+        self.book_id = f"book-{seed}"
+        self.names = names
+        self.chunks = chunks
+        self.names_per_chunk = names_per_chunk
+        self.history = history
+        self._random = random.Random(seed)
+        self._generator = SyntheticBookGenerator(seed, vocabulary_size=500)
+        self._weights = [1 / (rank + 1) ** zipf for rank in range(len(names))]
+        # The pool is shuffled per book, so concurrent books have different main characters
+        self._random.shuffle(self.names)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors = 0
+
+    def _timed(self, operation: str, function, *args):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        except sqlite3.OperationalError:
+            self.errors += 1
+            return None
+        finally:
+            self.latencies[operation].append(time.perf_counter() - started)
+
+    def play_chunk(self, chunk_index: int):
+        """Run the lookups, inserts, co-occurrences and updates of one chunk."""
+        rng = self._random
+        chunk_names = set(rng.choices(self.names, weights=self._weights, k=rng.randint(1, self.names_per_chunk)))
+
+        profiles = {}
+        for name in chunk_names:
+            rows = self._timed('lookup', self.database.find_characters_by_name, name) or []
+            match = next((row for row in rows if row['name'] == name), None)
+            if match:
+                profiles[match['id']] = match['profile']
+            else:
+                profile = empty_profile(name)
+                character_id = self._timed('insert', self.database.insert_character, name, profile)
+                if character_id:
+                    profiles[character_id] = profile
+
+        if self.cooccurrences is not None:
+            self._timed('cooccurrence', self.cooccurrences.add_chunk, self.book_id, chunk_index, list(profiles))
+
+        others = list(profiles)
+        for character_id, profile in profiles.items():
+            new_entries = {'events': [self._generator.paragraph()[:300]]}
+            if len(others) > 1 and rng.random() < 0.3:
+                new_entries['relationships'] = [f"{rng.choice(others)}: {self._generator.paragraph()[:80]}"]
+            for field, entries in new_entries.items():
+                profile[field] = profile.get(field, []) + entries
+
+            if self.history:
+                self._timed('history', self.database.record_history, character_id, new_entries)
+            self._timed('update', self.database.update_character, character_id, profile)
+
+    def run(self):
+        for chunk_index in range(self.chunks):
+            self.play_chunk(chunk_index)
+
+
+def preload(database: CharacterDatabase, count: int, seed: int):
+    """Insert characters from another pool of names, so the lookups scan a populated database."""
+    with sqlite3.connect(database.db_path) as conn:
+        conn.executemany("INSERT INTO characters (id, name, profile_json) VALUES (?, ?, ?)", [
+            (f"preloaded-{index}", name, json.dumps(empty_profile(name), ensure_ascii=False))
+            for index, name in enumerate(make_names(count, seed + 1))
+        ])
+        conn.commit()
+
+
+def file_size(db_path: str) -> int:
+    """Return the size in bytes of the database and of its journal files."""
+    return sum(os.path.getsize(path) for path in (db_path, f"{db_path}-wal", f"{db_path}-journal") if os.path.exists(path))
+
+
+def measure(chunks: int, names: int, writers: int = 1, names_per_chunk: int = 5, zipf: float = 1.1,
+            preload_count: int = 0, history: Optional[bool] = None, seed: int = 0,
+            db_path: Optional[str] = None, cooccurrence: Optional[bool] = None) -> Dict[str, object]:
+    """
+    Run the workload on a new database and return the report.
+
+    history and cooccurrence default to the configuration of the graph.
+    """
+    history = profile_compaction_config['enabled'] if history is None else history
+    cooccurrence = cooccurrence_config['enabled'] if cooccurrence is None else cooccurrence
+    with tempfile.TemporaryDirectory() as directory:
+        database = CharacterDatabase(db_path or str(Path(directory) / 'characters.sqlite'))
+        database.clear_database()
+        if preload_count:
+            preload(database, preload_count, seed)
+
+        pool = make_names(names, seed)
+        players = [Writer(database, list(pool), seed + index, chunks, names_per_chunk, zipf, history, cooccurrence)
+                   for index in range(writers)]
+        threads = [threading.Thread(target=player.run) for player in players]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+
+        latencies = defaultdict(list)
+        for player in players:
+            for operation, values in player.latencies.items():
+                latencies[operation].extend(values)
+        total = sum(len(values) for values in latencies.values())
+
+        operations = {}
+        for operation in OPERATIONS:
+            values = sorted(latencies.get(operation, []))
+            if values:
+                operations[operation] = {
+                    'count': len(values),
+                    **{f'p{rank}_ms': round(1000 * percentile(values, rank), 3) for rank in PERCENTILES},
+                    'max_ms': round(1000 * values[-1], 3),
+                }
+
+        return {
+            'chunks': chunks,
+            'names': names,
+            'writers': writers,
+            'preload': preload_count,
+            'history': history,
+            'cooccurrence': cooccurrence,
+            'seed': seed,
+            'python': sys.version.split()[0],
+            'seconds': round(seconds, 3),
+            'ops_per_s': round(total / seconds, 1) if seconds else None,
+            'errors': sum(player.errors for player in players),
+            'characters': database.get_character_count(),
+            'file_bytes': file_size(database.db_path),
+            'operations': operations,
+        }
+
+
+def print_report(report: Dict[str, object], baseline: Optional[Dict[str, object]] = None):
+    """Print the measurements, optionally next to a baseline."""
+    print(f"{report['writers']} writer(s) x {report['chunks']} chunks, {report['names']} names, "
+          f"{report['preload']} preloaded, history {'on' if report['history'] else 'off'}, "
+          f"co-occurrences {'on' if report['cooccurrence'] else 'off'}")
+    line = f"{report['ops_per_s']} ops/s over {report['seconds']} s, {report['errors']} errors"
+    if baseline and baseline['ops_per_s'] and report['ops_per_s']:
+        line += f" (baseline {baseline['ops_per_s']} ops/s, {report['ops_per_s'] / baseline['ops_per_s']:.2f}x)"
+    print(line)
+    print(f"{report['characters']} characters, {report['file_bytes'] / 1e6:.2f} MB on disk"
+          + (f" (baseline {baseline['file_bytes'] / 1e6:.2f} MB)" if baseline else ""))
+
+    print(f"{'operation':<12} {'count':>7} | {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+          + (" | baseline p95" if baseline else ""))
+    for operation, stats in report['operations'].items():
+        line = (f"{operation:<12} {stats['count']:>7} | {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} "
+                f"{stats['p99_ms']:>8.3f} {stats['max_ms']:>8.3f}")
+        previous = baseline['operations'].get(operation) if baseline else None
+        if previous:
+            line += f" | {previous['p95_ms']:>13.3f}"
+        print(line)
+
+
+def find_regressions(report: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[str]:
+    """Return what got worse than the baseline by more than tolerance: throughput and p95 latencies."""
+    regressions = []
+    if baseline['ops_per_s'] and report['ops_per_s'] < baseline['ops_per_s'] * (1 - tolerance):
+        regressions.append('ops/s')
+    for operation, stats in report['operations'].items():
+        previous = baseline['operations'].get(operation)
+        if previous and stats['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{operation} p95")
+    return regressions
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Replay the analysis workload against CharacterDatabase.")
+    parser.add_argument('--chunks', type=int, default=1000, help="Chunks played by every writer")
+    parser.add_argument('--names', type=int, default=5000, help="Size of the pool of character names")
+    parser.add_argument('--writers', type=int, default=1, help="Concurrent writers, one book each")
+    parser.add_argument('--names-per-chunk', type=int, default=5, help="Maximum names drawn per chunk")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Skew of the name distribution")
+    parser.add_argument('--preload', type=int, default=2000, help="Characters inserted before the run")
+    parser.add_argument('--history', action=argparse.BooleanOptionalAction,
+                        help="Record the new entries in the history table; defaults to profile_compaction_config")
+    parser.add_argument('--cooccurrence', action=argparse.BooleanOptionalAction,
+                        help="Add every chunk to the co-occurrence graph; defaults to cooccurrence_config")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db-path', help="Run on this file instead of a temporary one (it is cleared first)")
+    parser.add_argument('--save', help="Write the measurements to this JSON file")
+    parser.add_argument('--compare', help="Compare against measurements saved with --save")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Change against the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    report = measure(args.chunks, args.names, args.writers, args.names_per_chunk, args.zipf, args.preload,
+                     args.history, args.seed, args.db_path, args.cooccurrence)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, indent=2))
+
+    if baseline:
+        regressions = find_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions (more than {args.tolerance:.0%} worse): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Startup-time benchmark based on `python -X importtime`.
+
+Imports a module in a fresh interpreter several times and reports the median cumulative
+import time of the module, the heaviest top-level imports and which of the known heavy
+dependencies were loaded at all.
+
+Usage:
+    python -m benchmarks.import_time --module src.main --repeat 5
+    python -m benchmarks.import_time --save benchmarks/baselines/import_time.json
+    python -m benchmarks.import_time --compare benchmarks/baselines/import_time.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+
+HEAVY_MODULES = [
+    'pandas', 'IPython', 'matplotlib', 'langdetect', 'langid',
+    'langchain_text_splitters', 'langchain_google_genai', 'langgraph',
+]
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure_once(module: str) -> Dict[str, int]:
+    """Import a module in a fresh interpreter and return the cumulative time (µs) of every import."""
+    env = dict(os.environ)
+    # Older revisions build the LLM clients at import time and need a key to be importable
+    env.setdefault('GOOGLE_API_KEY', 'benchmark-placeholder')
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, cwd=Path(__file__).parent.parent,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def measure(module: str, repeat: int) -> Dict[str, object]:
+    """Run measure_once repeatedly and summarize the results."""
+    runs = [measure_once(module) for _ in range(repeat)]
+
+    total_ms = statistics.median(run[module] for run in runs) / 1000
+    loaded_heavy = [name for name in HEAVY_MODULES if name in runs[0]]
+    top_level = sorted(
+        ((name, time) for name, time in runs[0].items() if '.' not in name and name != module),
+        key=lambda item: item[1], reverse=True,
+    )[:10]
+
+    return {
+        'module': module,
+        'repeat': repeat,
+        'median_ms': round(total_ms, 1),
+        'heavy_modules_loaded': loaded_heavy,
+        'top_level_imports_ms': {name: round(time / 1000, 1) for name, time in top_level},
+    }
+
+
+def print_report(report: Dict[str, object], baseline: Dict[str, object] = None):
+    """Print a measurement, optionally next to a baseline."""
+    print(f"Import of {report['module']}: median {report['median_ms']} ms over {report['repeat']} runs")
+    if baseline:
+        speedup = baseline['median_ms'] / report['median_ms'] if report['median_ms'] else float('inf')
+        print(f"Baseline: {baseline['median_ms']} ms ({speedup:.1f}x)")
+        print(f"Heavy modules loaded before: {', '.join(baseline['heavy_modules_loaded']) or '-'}")
+    print(f"Heavy modules loaded: {', '.join(report['heavy_modules_loaded']) or '-'}")
+    print("Heaviest top-level imports:")
+    for name, time in report['top_level_imports_ms'].items():
+        print(f"  {time:>8.1f} ms  {name}")
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure the import time of a module with -X importtime.")
+    parser.add_argument('--module', default='src.main')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help="Write the measurement to this JSON file")
+    parser.add_argument('--compare', help="Compare against a measurement saved with --save")
+    args = parser.parse_args(argv)
+
+    report = measure(args.module, args.repeat)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
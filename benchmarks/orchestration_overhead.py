@@ -0,0 +1,110 @@
+"""
+Orchestration overhead of the analysis graphs against the number of chunks.
+
+Runs the flat graph (every chunk loops back through chunk_updater) and the chunked graph
+(one chunk_loop node invoking the per-chunk subgraph) over synthetic books of increasing
+length. The chat models are replaced by instant fakes, so the measured time is the cost of
+the graph machinery and the database, not of the LLM calls.
+
+Reported per run: the outer graph's supersteps, the wall time per chunk, and whether the
+run fits the default recursion limit of src.configs.config.
+
+Usage:
+    python -m benchmarks.orchestration_overhead --chunks 10 100 400
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from src.configs import config, preprocessing_config
+from src.databases.database import CharacterDatabase
+from src.graphs import graph_builders
+from src.graphs.nodes import regular_nodes
+from src.language_models.fakes import install_fake_chains
+from src.schemas.states import initial_state
+
+
+CHUNK_SIZE = 500
+
+SENTENCE = "خرج سليم من البيت في الصباح الباكر ومشى نحو السوق القديم حيث كان ينتظره صديقه. "
+
+
+def write_book(directory: Path, chunk_count: int) -> str:
+    """Write a synthetic Arabic book that splits into roughly chunk_count chunks."""
+    repeats = chunk_count * CHUNK_SIZE // len(SENTENCE) + 1
+    path = directory / f'book-{chunk_count}.txt'
+    path.write_text(SENTENCE * repeats, encoding='utf-8')
+    return str(path)
+
+
+def run_graph(graph, file_path: str, database: CharacterDatabase, recursion_limit: int) -> Dict[str, float]:
+    """Stream one run of a graph and count its supersteps and chunks."""
+    database.clear_database()
+    state = {**initial_state, 'file_path': file_path, 'database': database}
+
+    steps = 0
+    started = time.perf_counter()
+    for _ in graph.stream(state, config={**config, 'recursion_limit': recursion_limit}, stream_mode='updates'):
+        steps += 1
+    seconds = time.perf_counter() - started
+
+    return {'steps': steps, 'seconds': seconds}
+
+
+def measure(chunk_counts: List[int], repeat: int) -> List[Dict[str, object]]:
+    """Run both graphs over books of the given lengths and return one row per length."""
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        preprocessing_config.update(cache_dir=str(directory / 'cache'), chunk_size=CHUNK_SIZE, chunk_overlap=0)
+        regular_nodes._get_preprocessing_cache.cache_clear()
+        database = CharacterDatabase(str(directory / 'characters.sqlite'))
+
+        for chunk_count in chunk_counts:
+            file_path = write_book(directory, chunk_count)
+            # Warm the preprocessing cache, so both graphs only pay for the chunk loop
+            run_graph(graph_builders.compiled_chunked_graph, file_path, database, config['recursion_limit'])
+            chunks = len(regular_nodes._get_preprocessing_cache().load_chunks(
+                regular_nodes.hash_file(file_path), regular_nodes.preprocessing_params(preprocessing_config)))
+
+            row = {'chunks': chunks}
+            for name, graph in [('flat', graph_builders.compiled_graph), ('chunked', graph_builders.compiled_chunked_graph)]:
+                runs = [run_graph(graph, file_path, database, 10 * chunks + 25) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run['seconds'])
+                row[name] = {
+                    'steps': best['steps'],
+                    'ms_per_chunk': 1000 * best['seconds'] / chunks,
+                    'fits_default_limit': best['steps'] <= config['recursion_limit'],
+                }
+            rows.append(row)
+
+    return rows
+
+
+def print_report(rows: List[Dict[str, object]]):
+    """Print the measurements as a table."""
+    print(f"{'chunks':>7} | {'flat steps':>10} {'ms/chunk':>9} {'fits':>5} | {'chunked steps':>13} {'ms/chunk':>9} {'fits':>5}")
+    for row in rows:
+        flat, chunked = row['flat'], row['chunked']
+        print(f"{row['chunks']:>7} | {flat['steps']:>10} {flat['ms_per_chunk']:>9.2f} {str(flat['fits_default_limit']):>5} "
+              f"| {chunked['steps']:>13} {chunked['ms_per_chunk']:>9.2f} {str(chunked['fits_default_limit']):>5}")
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure graph orchestration overhead against chunk count.")
+    parser.add_argument('--chunks', type=int, nargs='+', default=[10, 50, 200], help="Approximate chunk counts to run")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per graph and length; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-placeholder')
+    install_fake_chains()
+    print_report(measure(args.chunks, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
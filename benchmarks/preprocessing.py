@@ -0,0 +1,165 @@
+"""
+Throughput and peak memory of the preprocessors on synthetic books of increasing size.
+
+Every stage runs on the input it gets in the pipeline (see src.preprocessors.corpus): the
+language detector and the cleaner on the raw book, the metadata remover on the cleaned
+text, the chunker on the text without metadata. The books come from the seeded generator
+of benchmarks.synthetic_corpus, so a saved report can be compared with a later revision.
+
+Reported per stage and size: the best time over the runs, the throughput in MB/s of
+input, and the peak memory allocated during one extra run traced with tracemalloc.
+
+Usage:
+    python -m benchmarks.preprocessing --sizes 100KB 1MB 10MB --repeat 3
+    python -m benchmarks.preprocessing --sizes 100MB --stages clean metadata chunk
+    python -m benchmarks.preprocessing --save benchmarks/baselines/preprocessing.json
+    python -m benchmarks.preprocessing --compare benchmarks/baselines/preprocessing.json
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic_corpus import SyntheticBookGenerator, format_size, parse_size
+from src.configs import preprocessing_config
+from src.preprocessors import ArabicLanguageDetector, TextChunker, clean_arabic_text_comprehensive, remove_book_metadata
+
+
+STAGES = ['detect', 'clean', 'metadata', 'chunk']
+# Input of every stage, as in the pipeline
+STAGE_INPUTS = {'detect': 'raw', 'clean': 'raw', 'metadata': 'cleaned', 'chunk': 'content'}
+
+
+def stage_functions(preserve_structure: bool) -> Dict[str, Callable[[str], object]]:
+    """Return the function run by every stage, configured like the pipeline."""
+    detector = ArabicLanguageDetector()
+    chunker = TextChunker(chunk_size=preprocessing_config['chunk_size'], chunk_overlap=preprocessing_config['chunk_overlap'])
+    # Load the language models and the splitters once, so the first size does not pay for it
+    detector.check_text("تهيئة نماذج كشف اللغة")
+    chunker.chunk_text_records("تهيئة المقسم", preserve_structure=preserve_structure)
+    return {
+        'detect': detector.check_text,
+        'clean': lambda text: clean_arabic_text_comprehensive(text, preserve_structure=preserve_structure),
+        'metadata': remove_book_metadata,
+        'chunk': lambda text: chunker.chunk_text_records(text, preserve_structure=preserve_structure),
+    }
+
+
+def time_stage(function: Callable[[str], object], text: str, repeat: int) -> float:
+    """Return the best wall time of repeat runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(function: Callable[[str], object], text: str) -> int:
+    """Return the peak memory in bytes allocated by one run, the input excluded."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(sizes: List[int], stages: List[str], repeat: int, seed: int = 0,
+            preserve_structure: bool = False, trace_memory: bool = True) -> Dict[str, object]:
+    """Run the stages over books of the given sizes and return the report."""
+    functions = stage_functions(preserve_structure)
+    rows = []
+
+    for size in sizes:
+        texts = {'raw': SyntheticBookGenerator(seed).generate(size)}
+        texts['cleaned'] = clean_arabic_text_comprehensive(texts['raw'], preserve_structure=preserve_structure)
+        texts['content'] = remove_book_metadata(texts['cleaned'])
+
+        for stage in stages:
+            text = texts[STAGE_INPUTS[stage]]
+            input_bytes = len(text.encode('utf-8'))
+            seconds = time_stage(functions[stage], text, repeat)
+            rows.append({
+                'stage': stage,
+                'size': format_size(size),
+                'input_bytes': input_bytes,
+                'seconds': round(seconds, 4),
+                'mb_per_s': round(input_bytes / 1e6 / seconds, 2) if seconds else None,
+                'peak_mb': round(peak_memory(functions[stage], text) / 1e6, 1) if trace_memory else None,
+            })
+
+    return {
+        'seed': seed,
+        'repeat': repeat,
+        'preserve_structure': preserve_structure,
+        'python': sys.version.split()[0],
+        'results': rows,
+    }
+
+
+def find_regressions(report: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[str]:
+    """Return the stage/size pairs whose throughput dropped by more than tolerance against the baseline."""
+    before = {(row['stage'], row['size']): row for row in baseline['results']}
+    regressions = []
+    for row in report['results']:
+        previous = before.get((row['stage'], row['size']))
+        if previous and previous['mb_per_s'] and row['mb_per_s'] and row['mb_per_s'] < previous['mb_per_s'] * (1 - tolerance):
+            regressions.append(f"{row['stage']} {row['size']}")
+    return regressions
+
+
+def print_report(report: Dict[str, object], baseline: Optional[Dict[str, object]] = None):
+    """Print the measurements as a table, optionally next to a baseline."""
+    before = {(row['stage'], row['size']): row for row in baseline['results']} if baseline else {}
+
+    print(f"{'stage':<9} {'size':>7} | {'seconds':>9} {'MB/s':>8} {'peak MB':>8}" + (" | baseline MB/s  speedup" if baseline else ""))
+    for row in report['results']:
+        peak = f"{row['peak_mb']:>8.1f}" if row['peak_mb'] is not None else f"{'-':>8}"
+        line = f"{row['stage']:<9} {row['size']:>7} | {row['seconds']:>9.4f} {row['mb_per_s'] or 0:>8.2f} {peak}"
+        previous = before.get((row['stage'], row['size']))
+        if previous and previous['mb_per_s'] and row['mb_per_s']:
+            line += f" | {previous['mb_per_s']:>13.2f} {row['mb_per_s'] / previous['mb_per_s']:>7.2f}x"
+        print(line)
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure the throughput and peak memory of the preprocessors.")
+    parser.add_argument('--sizes', nargs='+', default=['100KB', '1MB', '10MB'], help="Book sizes, up to e.g. 100MB")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage and size; the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic books")
+    parser.add_argument('--preserve-structure', action='store_true', help="Clean and chunk like preserve_structure=True")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run of every stage")
+    parser.add_argument('--save', help="Write the measurements to this JSON file")
+    parser.add_argument('--compare', help="Compare against measurements saved with --save")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Throughput drop against the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    report = measure([parse_size(size) for size in args.sizes], args.stages, args.repeat, args.seed,
+                     args.preserve_structure, not args.no_memory)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, indent=2))
+
+    if baseline:
+        regressions = find_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions (more than {args.tolerance:.0%} slower): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
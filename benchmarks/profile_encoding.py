@@ -0,0 +1,98 @@
+"""
+Prompt size of the profiles sent to the profile update model, per encoding.
+
+Reads the profiles of a finished run from its character database and encodes them in
+refresh-sized groups the way profile_refresher does:
+
+- repr: str() of the Profile dataclasses, the previous payload;
+- json / table: the layouts of src.profiles.encoding.
+
+Reported per encoding: characters, tokens and the saving against repr. Tokens are
+estimated from the characters, or counted by the model with --exact (needs an API key).
+
+Usage:
+    python -m benchmarks.profile_encoding --database characters.sqlite --group-size 4
+"""
+
+import argparse
+from typing import Callable, Dict, List
+
+from src.databases.database import CharacterDatabase
+from src.language_models.prompt_cache import estimate_tokens
+from src.profiles.encoding import decode_profiles, encode_profiles
+from src.schemas.data_classes import Profile
+
+
+ENCODERS: Dict[str, Callable[[List[Profile]], str]] = {
+    'repr': str,
+    'json': lambda profiles: encode_profiles(profiles, 'json'),
+    'table': lambda profiles: encode_profiles(profiles, 'table'),
+}
+
+
+def load_profiles(database_path: str) -> List[Profile]:
+    """Return the profiles stored in a character database."""
+    profiles = []
+    for row in CharacterDatabase(database_path).get_all_characters():
+        data = row['profile']
+        profiles.append(Profile(
+            name=row['name'], hint=data.get('hint', ''), age=data.get('age', ''), role=data.get('role', ''),
+            physical_characteristics=data.get('physical_characteristics', []), personality=data.get('personality', ''),
+            events=data.get('events', []), relationships=data.get('relationships', []), aliases=data.get('aliases', []),
+            id=row['id'],
+        ))
+    return profiles
+
+
+def measure(profiles: List[Profile], group_size: int, count_tokens: Callable[[str], int]) -> Dict[str, Dict[str, int]]:
+    """Return the characters and tokens of every encoding, summed over the refresh groups."""
+    groups = [profiles[start:start + group_size] for start in range(0, len(profiles), group_size)]
+    report = {}
+    for name, encode in ENCODERS.items():
+        payloads = [encode(group) for group in groups]
+        if name != 'repr':
+            # The encodings must read back to the same profiles
+            assert all(decode_profiles(payload) == sorted(group, key=lambda profile: (profile.name, profile.id))
+                       for payload, group in zip(payloads, groups))
+        report[name] = {
+            'characters': sum(len(payload) for payload in payloads),
+            'tokens': sum(count_tokens(payload) for payload in payloads),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, int]], profiles: int, groups: int):
+    """Print the size of every encoding and its saving against repr."""
+    print(f"{profiles} profiles in {groups} refresh calls")
+    baseline = report['repr']['tokens']
+    print(f"{'encoding':<8}{'characters':>12}{'tokens':>10}{'saved':>8}")
+    for name, sizes in report.items():
+        saved = 1 - sizes['tokens'] / baseline if baseline else 0.0
+        print(f"{name:<8}{sizes['characters']:>12}{sizes['tokens']:>10}{saved:>8.0%}")
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Compare the prompt size of the profile encodings on a finished run.")
+    parser.add_argument('--database', default='characters.sqlite', help="Character database of the run")
+    parser.add_argument('--group-size', type=int, default=4, help="Profiles sent per refresh call")
+    parser.add_argument('--exact', action='store_true', help="Count the tokens with the model instead of estimating them")
+    args = parser.parse_args(argv)
+
+    count_tokens = estimate_tokens
+    if args.exact:
+        from dotenv import load_dotenv
+        from src.language_models.llms import get_chat_model
+        load_dotenv()
+        count_tokens = get_chat_model(0.0).get_num_tokens
+
+    profiles = load_profiles(args.database)
+    if not profiles:
+        print(f"No profiles in {args.database}")
+        return
+    report = measure(profiles, args.group_size, count_tokens)
+    print_report(report, len(profiles), -(-len(profiles) // args.group_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Seeded generator of Arabic-like books for the benchmarks.
+
+The text is not meaningful Arabic but has what the preprocessors react to: a front matter
+of short metadata lines (publisher, rights, edition, translator), chapter headings, blank
+line separated paragraphs, diacritics (harakat, shadda, tanween), alif and ta marbuta
+variants, Arabic-Indic and Western numerals, and Arabic and Latin punctuation. The same
+seed and size always give the same text, so measurements are comparable across revisions.
+
+Usage:
+    python -m benchmarks.synthetic_corpus --size 10MB --output resources/synthetic-10MB.txt --seed 0
+"""
+
+import argparse
+import random
+import re
+from pathlib import Path
+from typing import List, Optional
+
+
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+ALIF_VARIANTS = "اأإآ"
+DIACRITICS = ["َ", "ُ", "ِ", "ْ", "ّ", "ً", "ٌ", "ٍ"]
+FUNCTION_WORDS = ["في", "من", "إلى", "على", "عن", "مع", "ثم", "قد", "لم", "كان", "هذا", "التي", "الذي", "حتى", "بعد"]
+NAMES = ["سليم", "فاطمة", "أبو علي", "خديجة", "محمود", "ليلى", "عمر الحلبي"]
+SENTENCE_ENDS = [".", ".", ".", "؟", "!", "…"]
+CLAUSE_MARKS = ["،", "،", "؛", ",", ":"]
+ARABIC_DIGITS = "٠١٢٣٤٥٦٧٨٩"
+ORDINALS = ["الأول", "الثاني", "الثالث", "الرابع", "الخامس", "السادس", "السابع", "الثامن", "التاسع", "العاشر"]
+FRONT_MATTER = [
+    "رواية",
+    "تأليف: {name}",
+    "ترجمة: {name}",
+    "دار {word} للنشر والتوزيع",
+    "الطبعة {ordinal} {year}",
+    "جميع الحقوق محفوظة للناشر",
+    "رقم الإيداع: {number}",
+    "تصميم الغلاف: {name}",
+    "إهداء",
+    "إلى {name}",
+]
+
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 1000, 'KB': 1000, 'M': 1000 ** 2, 'MB': 1000 ** 2, 'G': 1000 ** 3, 'GB': 1000 ** 3}
+
+
+def parse_size(size: str) -> int:
+    """Return the number of bytes of a size such as '100KB', '1.5MB' or '2048'."""
+    match = SIZE_PATTERN.match(size)
+    if not match:
+        raise ValueError(f"Invalid size: {size!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size: int) -> str:
+    """Return a short human readable size, e.g. '100KB'."""
+    for unit, factor in [('GB', 1000 ** 3), ('MB', 1000 ** 2), ('KB', 1000)]:
+        if size >= factor:
+            return f"{size / factor:g}{unit}"
+    return f"{size}B"
+
+
+class SyntheticBookGenerator:
+    """
+    Generates books of a given size from a seeded vocabulary of Arabic-like words.
+    """
+
+    def __init__(self, seed: int = 0, vocabulary_size: int = 5000, diacritic_rate: float = 0.15,
+                 number_rate: float = 0.02, paragraphs_per_chapter: int = 40):
+        """
+        Initialize the generator.
+
+        Args:
+            seed: Seed of the random generator; the same seed gives the same books
+            vocabulary_size: Number of distinct content words
+            diacritic_rate: Share of the vocabulary written with diacritics
+            number_rate: Share of the words replaced by a number
+            paragraphs_per_chapter: Average number of paragraphs between two chapter headings
+        """
+        self.seed = seed
+        self.number_rate = number_rate
+        self.paragraphs_per_chapter = paragraphs_per_chapter
+        self._random = random.Random(seed)
+        self.vocabulary = [self._make_word(diacritic_rate) for _ in range(vocabulary_size)]
+
+    def _make_word(self, diacritic_rate: float) -> str:
+        rng = self._random
+        letters = rng.choices(LETTERS, k=rng.randint(2, 6))
+        if rng.random() < 0.3:
+            letters.insert(0, rng.choice(ALIF_VARIANTS))
+        if rng.random() < 0.2:
+            letters = ["ا", "ل"] + letters
+        if rng.random() < 0.15:
+            letters.append("ة")
+        if rng.random() < diacritic_rate:
+            letters = [letter + rng.choice(DIACRITICS) if rng.random() < 0.6 else letter for letter in letters]
+        return "".join(letters)
+
+    def _number(self) -> str:
+        rng = self._random
+        digits = str(rng.randint(1, 3000))
+        if rng.random() < 0.5:
+            digits = digits.translate(str.maketrans("0123456789", ARABIC_DIGITS))
+        return digits
+
+    def _sentence(self) -> str:
+        rng = self._random
+        words = rng.choices(self.vocabulary, k=rng.randint(6, 18))
+        for index in range(len(words)):
+            roll = rng.random()
+            if roll < 0.3:
+                words[index] = rng.choice(FUNCTION_WORDS)
+            elif roll < 0.33:
+                words[index] = rng.choice(NAMES)
+            elif roll < 0.33 + self.number_rate:
+                words[index] = self._number()
+        if len(words) > 8 and rng.random() < 0.5:
+            position = rng.randint(3, len(words) - 3)
+            words[position] += rng.choice(CLAUSE_MARKS)
+        sentence = " ".join(words) + rng.choice(SENTENCE_ENDS)
+        if rng.random() < 0.05:
+            sentence = f"«{sentence}»"
+        return sentence
+
+    def paragraph(self) -> str:
+        """Return one paragraph of 2 to 8 sentences."""
+        return " ".join(self._sentence() for _ in range(self._random.randint(2, 8)))
+
+    def chapter_heading(self, number: int) -> str:
+        """Return the heading line of a chapter, in one of the styles found in the books."""
+        rng = self._random
+        if number <= len(ORDINALS) and rng.random() < 0.7:
+            return f"الفصل {ORDINALS[number - 1]}"
+        return rng.choice([f"الفصل {number}", f"فصل {self._number()}", f"الجزء {number}"])
+
+    def front_matter(self) -> str:
+        """Return the metadata lines preceding the content."""
+        rng = self._random
+        lines = [template.format(name=rng.choice(NAMES), word=rng.choice(self.vocabulary),
+                                 ordinal=rng.choice(ORDINALS), year=self._number(), number=self._number())
+                 for template in FRONT_MATTER if rng.random() < 0.8]
+        return "\n".join(lines)
+
+    def generate(self, size: int) -> str:
+        """
+        Return a book of about size bytes (UTF-8), front matter included.
+
+        Args:
+            size: Target size in bytes; the book stops at the first paragraph reaching it
+        """
+        rng = self._random
+        parts: List[str] = [self.front_matter()]
+        written = len(parts[0].encode('utf-8'))
+        chapter = 0
+        paragraphs_left = 0
+
+        while written < size:
+            if paragraphs_left == 0:
+                chapter += 1
+                paragraphs_left = max(1, int(rng.gauss(self.paragraphs_per_chapter, self.paragraphs_per_chapter / 4)))
+                parts.append(self.chapter_heading(chapter))
+                written += len(parts[-1].encode('utf-8')) + 2
+            parts.append(self.paragraph())
+            written += len(parts[-1].encode('utf-8')) + 2
+            paragraphs_left -= 1
+
+        return "\n\n".join(parts)
+
+
+def generate_book(size: int, seed: int = 0, generator: Optional[SyntheticBookGenerator] = None) -> str:
+    """Return a synthetic book of about size bytes; see SyntheticBookGenerator."""
+    return (generator or SyntheticBookGenerator(seed)).generate(size)
+
+
+def write_book(path: str, size: int, seed: int = 0) -> int:
+    """
+    Write a synthetic book to a file.
+
+    Returns:
+        The number of bytes written
+    """
+    data = generate_book(size, seed).encode('utf-8')
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_bytes(data)
+    return len(data)
+
+
+def main(argv: List[str] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Write a synthetic Arabic-like book for the benchmarks.")
+    parser.add_argument('--size', default='1MB', help="Target size, e.g. 100KB, 10MB")
+    parser.add_argument('--output', required=True, help="Path of the .txt file to write")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    written = write_book(args.output, parse_size(args.size), args.seed)
+    print(f"{format_size(written)} written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,101 @@
 
-config = {"configurable": {"thread_id": 1}, 'recursion_limit': 1000}
\ No newline at end of file
+config = {"configurable": {"thread_id": 1}, 'recursion_limit': 1000}
+
+preprocessing_config = {
+    'chunk_size': 5000,
+    'chunk_overlap': 200,
+    # Keep paragraph/chapter breaks when cleaning and align chunks to them
+    'preserve_structure': False,
+    # Content-addressed cache of the preprocessing outputs; None disables it
+    'cache_dir': 'resources/cache/preprocessing',
+}
+
+llm_config = {
+    # One rate limiter is shared by every chat model, so concurrent books draw from the
+    # same quota; None disables rate limiting
+    'requests_per_second': None,
+    # Register the static system prompts once instead of sending them with every call:
+    # 'gemini' (provider-side cached content), 'local' (in-memory stand-in) or None
+    'prompt_cache': None,
+    'prompt_cache_ttl_seconds': 3600,
+}
+
+llm_routing_config = {
+    # Models tried in order for every chain; a later (stronger) tier is only called when the
+    # structured output of the previous one fails validation or, with escalate_on_empty, is empty
+    'chains': {
+        'name_query': {'tiers': ['gemini-2.5-flash-lite', 'gemini-2.5-flash'], 'temperature': 0.0, 'escalate_on_empty': False},
+        'summary': {'tiers': ['gemini-2.5-flash'], 'temperature': 1.0, 'escalate_on_empty': True},
+        'fused_summary': {'tiers': ['gemini-2.5-flash', 'gemini-2.5-pro'], 'temperature': 1.0, 'escalate_on_empty': True},
+        'summary_merge': {'tiers': ['gemini-2.5-flash'], 'temperature': 1.0, 'escalate_on_empty': True},
+        'profile_update': {'tiers': ['gemini-2.5-flash', 'gemini-2.5-pro'], 'temperature': 0.0, 'escalate_on_empty': True},
+        'event_digest': {'tiers': ['gemini-2.5-flash-lite', 'gemini-2.5-flash'], 'temperature': 0.0, 'escalate_on_empty': True},
+    },
+    # USD per million input/output tokens, used for the cost estimates of the usage tracker
+    'prices': {
+        'gemini-2.5-flash-lite': {'input': 0.10, 'output': 0.40},
+        'gemini-2.5-flash': {'input': 0.30, 'output': 2.50},
+        'gemini-2.5-pro': {'input': 1.25, 'output': 10.00},
+    },
+}
+
+summary_tree_config = {
+    # Number of summaries merged into one at every level of the tree
+    'fan_in': 4,
+    # Maximum number of concurrent summary calls
+    'max_workers': 8,
+    # SQLite file receiving the summaries of every level
+    'db_path': 'summaries.sqlite',
+}
+
+profile_compaction_config = {
+    'enabled': True,
+    # Size budget in characters of every list field of a profile. A field is compacted once it
+    # crosses its budget, down to target_ratio of it so the next chunks do not compact it again
+    'budgets': {'events': 2000, 'relationships': 800, 'physical_characteristics': 500},
+    'target_ratio': 0.6,
+    # Entries whose normalized character trigrams overlap at least this much are merged
+    'duplicate_similarity': 0.8,
+    # Events kept verbatim next to the digest of the older ones
+    'recent_events': 5,
+}
+
+profile_encoding_config = {
+    # Layout of the profiles sent to the profile update model: 'json' (one object per profile,
+    # empty fields omitted) or 'table' (column names once, one row per profile)
+    'layout': 'json',
+}
+
+profile_refresh_config = {
+    # Follow-up calls re-requesting only the profiles that the profile update model returned
+    # malformed, under an unknown id, or not at all; those still failing keep their previous version
+    'max_retries': 2,
+}
+
+profile_retrieval_config = {
+    # Maximum number of stored profiles kept per name extracted from a chunk
+    'top_k': 3,
+    # Estimated tokens of all the profiles of one refresh call
+    'token_budget': 4000,
+    # Minimum name/hint similarity of a stored profile; below it, the name is a new character
+    'min_score': 0.5,
+}
+
+entity_resolution_config = {
+    # Minimum name/alias similarity of two character rows describing the same person
+    'threshold': 0.8,
+    # Blocks of rows sharing a key that are larger than this are not compared
+    'max_block_size': 500,
+    # Also merge the duplicates during the analysis, every this many chunks; None only runs it on demand
+    'every_n_chunks': None,
+}
+
+mention_index_config = {
+    # SQLite file of the inverted index of the chunks, filled by the chunker; None disables it
+    'db_path': 'mentions.sqlite',
+}
+
+cooccurrence_config = {
+    # Accumulate the character pairs of every chunk in the character database
+    'enabled': True,
+}
@@ -0,0 +1,293 @@
+"""
+Character co-occurrence graph, accumulated while the chunks are analysed.
+
+Every chunk tells which characters share a scene: profile_retriever_creator resolves the
+names found in the chunk to character ids and adds one to the weight of every pair. The
+graph is sparse (only pairs that met are stored), keyed by character id, and lives in the
+character database next to the profiles, so every chunk is persisted as soon as it is
+processed and the entity resolution can move the edges of merged characters.
+
+Edges are undirected and stored once per book with the smaller id first; the weight of an
+edge is the number of chunks the two characters share. A chunk is counted at most once, so
+re-running a chunk does not inflate the weights. The tables are created, cleared, pruned of
+deleted characters and merged by CharacterDatabase, in the transactions changing its own.
+
+Usage:
+    python -m src.databases.cooccurrence characters.sqlite --output edges.csv --min-weight 2
+"""
+
+import argparse
+import csv
+import sqlite3
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def create_tables(cursor: sqlite3.Cursor):
+    """Create the tables of the graph; CharacterDatabase creates them with its own."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cooccurrences (
+            book_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            target TEXT NOT NULL,
+            weight INTEGER NOT NULL,
+            first_chunk INTEGER,
+            last_chunk INTEGER,
+            PRIMARY KEY (book_id, source, target)
+        ) WITHOUT ROWID;
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cooccurrence_chunks (
+            book_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            PRIMARY KEY (book_id, chunk_index)
+        ) WITHOUT ROWID;
+    """)
+    # Characters of every indexed chunk, so a merge can recount the chunks instead of summing weights
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cooccurrence_members (
+            book_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            character_id TEXT NOT NULL,
+            PRIMARY KEY (character_id, book_id, chunk_index)
+        ) WITHOUT ROWID;
+    """)
+
+
+def delete_character(cursor: sqlite3.Cursor, character_id: str):
+    """Delete the edges and chunk memberships of a character."""
+    cursor.execute("DELETE FROM cooccurrences WHERE source = ? OR target = ?", (character_id, character_id))
+    cursor.execute("DELETE FROM cooccurrence_members WHERE character_id = ?", (character_id,))
+
+
+def merge_character(cursor: sqlite3.Cursor, survivor_id: str, merged_id: str):
+    """
+    Move the edges and chunk memberships of a merged character to the one it was merged into;
+    CharacterDatabase.merge_characters calls it in the transaction deleting the merged row.
+
+    A chunk where both ids met a third character is counted once, so the weights stay the
+    number of shared chunks; only for chunks added without an index, whose characters are
+    not kept, the weights of both ids are summed.
+    """
+    cursor.execute("""
+        SELECT book_id, source, target, weight, first_chunk, last_chunk
+        FROM cooccurrences
+        WHERE source = ? OR target = ?
+    """, (merged_id, merged_id))
+    rows = cursor.fetchall()
+    cursor.execute("DELETE FROM cooccurrences WHERE source = ? OR target = ?", (merged_id, merged_id))
+
+    moved = []
+    for book_id, source, target, weight, first_chunk, last_chunk in rows:
+        other = target if source == merged_id else source
+        if other == survivor_id:
+            continue
+        source, target = sorted((survivor_id, other))
+        moved.append((book_id, source, target, weight, first_chunk, last_chunk))
+
+    cursor.executemany("""
+        INSERT INTO cooccurrences (book_id, source, target, weight, first_chunk, last_chunk)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (book_id, source, target) DO UPDATE SET
+            weight = weight + excluded.weight,
+            first_chunk = MIN(COALESCE(first_chunk, excluded.first_chunk), COALESCE(excluded.first_chunk, first_chunk)),
+            last_chunk = MAX(COALESCE(last_chunk, excluded.last_chunk), COALESCE(excluded.last_chunk, last_chunk))
+    """, moved)
+
+    # The chunks shared by the survivor, the merged character and a third one were added twice
+    cursor.execute("""
+        SELECT survivor.book_id, other.character_id, COUNT(*)
+        FROM cooccurrence_members AS survivor
+        JOIN cooccurrence_members AS merged
+            ON merged.book_id = survivor.book_id AND merged.chunk_index = survivor.chunk_index
+        JOIN cooccurrence_members AS other
+            ON other.book_id = survivor.book_id AND other.chunk_index = survivor.chunk_index
+        WHERE survivor.character_id = ? AND merged.character_id = ? AND other.character_id NOT IN (?, ?)
+        GROUP BY survivor.book_id, other.character_id
+    """, (survivor_id, merged_id, survivor_id, merged_id))
+    cursor.executemany("""
+        UPDATE cooccurrences
+        SET weight = weight - ?
+        WHERE book_id = ? AND source = ? AND target = ?
+    """, [(count, book_id, *sorted((survivor_id, other))) for book_id, other, count in cursor.fetchall()])
+
+    cursor.execute("""
+        UPDATE OR IGNORE cooccurrence_members SET character_id = ? WHERE character_id = ?
+    """, (survivor_id, merged_id))
+    cursor.execute("DELETE FROM cooccurrence_members WHERE character_id = ?", (merged_id,))
+
+
+def clear_tables(cursor: sqlite3.Cursor):
+    """Delete the whole graph, including which chunks were already counted."""
+    for table in ('cooccurrences', 'cooccurrence_chunks', 'cooccurrence_members'):
+        cursor.execute(f"DELETE FROM {table}")
+
+
+class CooccurrenceGraph:
+    """
+    Sparse weighted adjacency of the characters appearing in the same chunks, stored in SQLite.
+    """
+
+    def __init__(self, db_path: str = "characters.sqlite"):
+        """
+        Initialize the co-occurrence graph.
+
+        Args:
+            db_path: Path to the SQLite database file, usually the character database
+        """
+        self.db_path = db_path
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the database with the required table structure."""
+        with sqlite3.connect(self.db_path) as conn:
+            create_tables(conn.cursor())
+            conn.commit()
+
+    def add_chunk(self, book_id: str, chunk_index: Optional[int], character_ids: Iterable[str]) -> int:
+        """
+        Add the pairs of characters appearing in a chunk.
+
+        Args:
+            book_id: Id of the book, e.g. its content hash
+            chunk_index: Index of the chunk; a chunk already added is skipped. None is never skipped
+            character_ids: Ids of the characters of the chunk
+
+        Returns:
+            The number of pairs added
+        """
+        ids = sorted({character_id for character_id in character_ids if character_id})
+        pairs = list(combinations(ids, 2))
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            if chunk_index is not None:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO cooccurrence_chunks (book_id, chunk_index)
+                    VALUES (?, ?)
+                """, (book_id, chunk_index))
+                if cursor.rowcount == 0:
+                    return 0
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO cooccurrence_members (book_id, chunk_index, character_id)
+                    VALUES (?, ?, ?)
+                """, [(book_id, chunk_index, character_id) for character_id in ids])
+
+            cursor.executemany("""
+                INSERT INTO cooccurrences (book_id, source, target, weight, first_chunk, last_chunk)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (book_id, source, target) DO UPDATE SET
+                    weight = weight + 1,
+                    first_chunk = MIN(COALESCE(first_chunk, excluded.first_chunk), COALESCE(excluded.first_chunk, first_chunk)),
+                    last_chunk = MAX(COALESCE(last_chunk, excluded.last_chunk), COALESCE(excluded.last_chunk, last_chunk))
+            """, [(book_id, source, target, chunk_index, chunk_index) for source, target in pairs])
+            conn.commit()
+        return len(pairs)
+
+    def edges(self, book_id: Optional[str] = None, min_weight: int = 1) -> List[Tuple[str, str, int]]:
+        """
+        Return the edges of the graph, heaviest first.
+
+        Args:
+            book_id: Only the edges of this book if given; otherwise the weights of all books are summed
+            min_weight: Minimum weight of the returned edges
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT source, target, SUM(weight) AS total
+                FROM cooccurrences
+                WHERE ? IS NULL OR book_id = ?
+                GROUP BY source, target
+                HAVING total >= ?
+                ORDER BY total DESC, source, target
+            """, (book_id, book_id, min_weight))
+            return cursor.fetchall()
+
+    def neighbours(self, character_id: str, book_id: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Return the characters sharing chunks with a character and their weights, heaviest first."""
+        neighbours: Dict[str, int] = {}
+        for source, target, weight in self.edges(book_id):
+            if character_id in (source, target):
+                other = target if source == character_id else source
+                neighbours[other] = neighbours.get(other, 0) + weight
+        return sorted(neighbours.items(), key=lambda item: (-item[1], item[0]))
+
+    def to_edge_list(self, path: str, book_id: Optional[str] = None, min_weight: int = 1,
+                     names: Optional[Dict[str, str]] = None) -> int:
+        """
+        Write the edges to a CSV file (source, target, weight, and the names if given).
+
+        Returns:
+            The number of edges written
+        """
+        edges = self.edges(book_id, min_weight)
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['source', 'target', 'weight'] + (['source_name', 'target_name'] if names else []))
+            for source, target, weight in edges:
+                writer.writerow([source, target, weight] + ([names.get(source, ''), names.get(target, '')] if names else []))
+        return len(edges)
+
+    def to_coo(self, book_id: Optional[str] = None, min_weight: int = 1) -> Tuple[List[str], Any, Any, Any]:
+        """
+        Return the symmetric adjacency matrix as COO triplets (both directions of every edge).
+
+        Returns:
+            The character ids in row/column order, and the row, column and weight numpy arrays
+        """
+        import numpy as np  # Imported on first use to keep module import cheap
+
+        edges = self.edges(book_id, min_weight)
+        ids = sorted({character_id for source, target, _ in edges for character_id in (source, target)})
+        position = {character_id: index for index, character_id in enumerate(ids)}
+
+        sources = [position[source] for source, _, _ in edges]
+        targets = [position[target] for _, target, _ in edges]
+        weights = [weight for _, _, weight in edges]
+        return (ids, np.array(sources + targets, dtype=np.int64), np.array(targets + sources, dtype=np.int64),
+                np.array(weights * 2, dtype=np.int64))
+
+    def to_sparse_matrix(self, book_id: Optional[str] = None, min_weight: int = 1) -> Tuple[List[str], Any]:
+        """
+        Return the symmetric adjacency matrix as a scipy.sparse CSR matrix (needs scipy).
+
+        Returns:
+            The character ids in row/column order, and the matrix
+        """
+        from scipy.sparse import coo_matrix
+
+        ids, rows, columns, weights = self.to_coo(book_id, min_weight)
+        return ids, coo_matrix((weights, (rows, columns)), shape=(len(ids), len(ids))).tocsr()
+
+    def merge_characters(self, survivor_id: str, merged_id: str):
+        """Move the edges of a merged character to the one it was merged into; see merge_character."""
+        with sqlite3.connect(self.db_path) as conn:
+            merge_character(conn.cursor(), survivor_id, merged_id)
+            conn.commit()
+
+    def delete_character(self, character_id: str):
+        """Remove a character from the graph."""
+        with sqlite3.connect(self.db_path) as conn:
+            delete_character(conn.cursor(), character_id)
+            conn.commit()
+
+
+def main():
+    """Command line entry point."""
+    from src.databases.database import CharacterDatabase
+
+    parser = argparse.ArgumentParser(description="Export the character co-occurrence graph as an edge list.")
+    parser.add_argument('db_path', nargs='?', default='characters.sqlite')
+    parser.add_argument('--output', default='cooccurrence.csv', help="CSV file receiving the edges")
+    parser.add_argument('--book-id', help="Only export this book")
+    parser.add_argument('--min-weight', type=int, default=1)
+    args = parser.parse_args()
+
+    names = {row['id']: row['name'] for row in CharacterDatabase(args.db_path).get_all_characters()}
+    count = CooccurrenceGraph(args.db_path).to_edge_list(args.output, args.book_id, args.min_weight, names)
+    print(f"{count} edges written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
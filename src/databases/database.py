@@ -3,6 +3,8 @@ import json
 import uuid
 from typing import Dict, List, Optional, Any
 
+from src.databases import cooccurrence
+
 
 class CharacterDatabase:
     """
@@ -33,6 +35,33 @@ class CharacterDatabase:
                 );
             """)
             
+            # Every entry that ever appeared in the list fields of a profile, so compacted
+            # profiles keep their full history (see src.profiles.compaction)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS character_history (
+                    character_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    entry TEXT NOT NULL,
+                    PRIMARY KEY (character_id, field, entry)
+                );
+            """)
+            
+            # Audit log of the entity resolution: every row merged into another one, as it was
+            # (see src.databases.entity_resolution)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS character_merges (
+                    survivor_id TEXT NOT NULL,
+                    merged_id TEXT NOT NULL,
+                    merged_name TEXT NOT NULL,
+                    merged_profile_json TEXT,
+                    score REAL,
+                    merged_at TEXT DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            
+            # Character co-occurrence graph (see src.databases.cooccurrence)
+            cooccurrence.create_tables(cursor)
+            
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_characters_name ON characters(name);")
             
@@ -86,6 +115,117 @@ class CharacterDatabase:
     
 
 
+    def record_history(self, id: str, entries: Dict[str, List[str]]):
+        """
+        Record the entries of a character's list fields; entries already recorded are ignored.
+        
+        Args:
+            id: The character's unique ID
+            entries: Entries by field name
+        """
+        rows = [(id, field, entry) for field, field_entries in entries.items() for entry in field_entries]
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT OR IGNORE INTO character_history (character_id, field, entry)
+                VALUES (?, ?, ?)
+            """, rows)
+            conn.commit()
+    
+    def get_history(self, id: str, field: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Retrieve the recorded history of a character.
+        
+        Args:
+            id: The character's unique ID
+            field: Only return this field if given
+            
+        Returns:
+            Entries by field name, in the order they were first recorded
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT field, entry
+                FROM character_history
+                WHERE character_id = ? AND (? IS NULL OR field = ?)
+                ORDER BY rowid
+            """, (id, field, field))
+            
+            history: Dict[str, List[str]] = {}
+            for field_name, entry in cursor.fetchall():
+                history.setdefault(field_name, []).append(entry)
+            return history
+
+    def merge_characters(self, survivor_id: str, profile: Dict[str, Any], merged: Dict[str, float]) -> int:
+        """
+        Merge characters into another one, in one transaction: the merged rows are logged in
+        character_merges and deleted, and their history and co-occurrence edges move to the survivor.
+        
+        Args:
+            survivor_id: ID of the character that is kept
+            profile: Merged profile of the survivor
+            merged: Similarity score by ID of every character merged into the survivor
+            
+        Returns:
+            The number of characters merged
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            count = 0
+            for merged_id, score in merged.items():
+                cursor.execute("""
+                    INSERT INTO character_merges (survivor_id, merged_id, merged_name, merged_profile_json, score)
+                    SELECT ?, id, name, profile_json, ?
+                    FROM characters
+                    WHERE id = ?
+                """, (survivor_id, score, merged_id))
+                cursor.execute("""
+                    UPDATE OR IGNORE character_history
+                    SET character_id = ?
+                    WHERE character_id = ?
+                """, (survivor_id, merged_id))
+                cursor.execute("DELETE FROM character_history WHERE character_id = ?", (merged_id,))
+                cursor.execute("DELETE FROM characters WHERE id = ?", (merged_id,))
+                count += cursor.rowcount
+                cooccurrence.merge_character(cursor, survivor_id, merged_id)
+            
+            cursor.execute("""
+                UPDATE characters 
+                SET profile_json = ?
+                WHERE id = ?
+            """, (json.dumps(profile, ensure_ascii=False), survivor_id))
+            conn.commit()
+            return count
+    
+    def get_merges(self, survivor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve the audit log of the merged characters.
+        
+        Args:
+            survivor_id: Only return the characters merged into this one if given
+            
+        Returns:
+            Merged characters, oldest merge first, with their profile as it was
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT survivor_id, merged_id, merged_name, merged_profile_json, score, merged_at
+                FROM character_merges
+                WHERE ? IS NULL OR survivor_id = ?
+                ORDER BY rowid
+            """, (survivor_id, survivor_id))
+            
+            return [
+                {
+                    'survivor_id': survivor, 'id': merged_id, 'name': name,
+                    'profile': json.loads(profile_json) if profile_json else None,
+                    'score': score, 'merged_at': merged_at,
+                }
+                for survivor, merged_id, name, profile_json, score, merged_at in cursor.fetchall()
+            ]
+
     def get_character(self, id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a character profile by ID.
@@ -185,8 +325,11 @@ class CharacterDatabase:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM characters WHERE id = ?", (id,))
+            deleted = cursor.rowcount > 0
+            cursor.execute("DELETE FROM character_history WHERE character_id = ?", (id,))
+            cooccurrence.delete_character(cursor, id)
             conn.commit()
-            return cursor.rowcount > 0
+            return deleted
     
     def search_characters(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -236,13 +379,19 @@ class CharacterDatabase:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM characters")
+            cursor.execute("DELETE FROM character_history")
+            cooccurrence.clear_tables(cursor)
             conn.commit()
 
 
-# Global database instance
-character_db = CharacterDatabase()
+# Global database instance, opened on first use so importing this module does not create or
+# migrate the default database file
+_character_db: Optional[CharacterDatabase] = None
 
 
 def get_character_db() -> CharacterDatabase:
     """Get the global character database instance."""
-    return character_db 
\ No newline at end of file
+    global _character_db
+    if _character_db is None:
+        _character_db = CharacterDatabase()
+    return _character_db
@@ -0,0 +1,265 @@
+"""
+Entity resolution of the character database: merges the rows that describe the same person.
+
+Characters are looked up by raw name during the analysis, so the same person can end up as
+several rows (with and without the family name, alias spellings, alif/ta marbuta variants).
+The resolver finds and merges them without comparing every pair of rows:
+
+1. blocking: every row gets keys from its normalized name and aliases (the full names and
+   the 3-letter prefix of every word); only rows sharing a key are compared, and blocks
+   larger than max_block_size (very common prefixes) are skipped;
+2. scoring: two rows match when a name or alias of one is close enough to one of the other
+   (trigram overlap, edit distance, or one name containing every word of the other), unless
+   both have a hint and the hints differ, since hints exist to tell apart namesakes;
+3. clustering: matches are joined with a union-find; two clusters are only joined if all
+   their names are compatible, so "علي" cannot chain "علي حسن" and "علي محمود" together;
+4. merging: every cluster is merged into its richest profile, and every merged row is kept
+   in the character_merges audit table of the database; co-occurrence edges move along.
+
+Usage:
+    python -m src.databases.entity_resolution characters.sqlite --threshold 0.8 --dry-run
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from src.configs import entity_resolution_config
+from src.databases.database import CharacterDatabase
+from src.profiles.ranking import CONTAINED_SCORE
+from src.profiles.similarity import char_ngrams, edit_similarity, jaccard, normalize_text
+
+
+# Share of the hint trigrams two rows must have in common to be the same person when both have a hint
+HINT_AGREEMENT = 0.5
+
+_LIST_FIELDS = ('physical_characteristics', 'events', 'relationships')
+_TEXT_FIELDS = ('hint', 'age', 'role', 'personality')
+
+
+@dataclass
+class MergePlan:
+    survivor_id: str
+    survivor_name: str
+    merged: List[Tuple[str, str, float]] = field(default_factory=list)  # (id, name, score)
+
+
+class _Record:
+    """Normalized names of one character row."""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row['id']
+        self.name = row['name']
+        self.profile = row['profile']
+        names = [row['name'], *self.profile.get('aliases', [])]
+        self.names = sorted({normalize_text(name) for name in names} - {''})
+        self.ngrams = {name: char_ngrams(name) for name in self.names}
+        self.words = {name: frozenset(name.split()) for name in self.names}
+        self.hint = normalize_text(self.profile.get('hint', ''))
+
+
+def _name_score(first: str, first_ngrams: FrozenSet[str], first_words: FrozenSet[str],
+                second: str, second_ngrams: FrozenSet[str], second_words: FrozenSet[str]) -> float:
+    if first == second:
+        return 1.0
+    score = jaccard(first_ngrams, second_ngrams)
+    if first_words <= second_words or second_words <= first_words:
+        score = max(score, CONTAINED_SCORE)
+    if abs(len(first) - len(second)) <= max(len(first), len(second)) // 3:
+        score = max(score, edit_similarity(first, second))
+    return score
+
+
+class EntityResolver:
+    """
+    Finds the character rows describing the same person and merges them.
+    """
+
+    def __init__(self, threshold: float = entity_resolution_config['threshold'],
+                 max_block_size: int = entity_resolution_config['max_block_size']):
+        """
+        Initialize the resolver.
+
+        Args:
+            threshold: Minimum name similarity of two rows of the same person
+            max_block_size: Blocks with more rows than this are not compared
+        """
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.comparisons = 0
+        self.skipped_blocks = 0
+
+    def score(self, first: _Record, second: _Record) -> float:
+        """Return the similarity of two rows, 0 if their hints disagree."""
+        if first.hint and second.hint and jaccard(char_ngrams(first.hint), char_ngrams(second.hint)) < HINT_AGREEMENT:
+            return 0.0
+        return max(
+            _name_score(a, first.ngrams[a], first.words[a], b, second.ngrams[b], second.words[b])
+            for a in first.names for b in second.names
+        )
+
+    def _compatible(self, first: List[_Record], second: List[_Record]) -> bool:
+        """Return True if every row of one cluster matches every row of the other."""
+        return all(self.score(a, b) >= self.threshold for a in first for b in second)
+
+    @staticmethod
+    def _blocking_keys(record: _Record) -> Set[str]:
+        keys = set()
+        for name in record.names:
+            keys.add(f'n:{name}')
+            keys.update(f'p:{word[:3]}' for word in record.words[name] if len(word) >= 3)
+        return keys
+
+    def _candidate_pairs(self, records: List[_Record]) -> Iterator[Tuple[int, int]]:
+        """Yield every pair of rows sharing a blocking key once."""
+        blocks: Dict[str, List[int]] = {}
+        for index, record in enumerate(records):
+            for key in self._blocking_keys(record):
+                blocks.setdefault(key, []).append(index)
+
+        seen = set()
+        for members in blocks.values():
+            if len(members) > self.max_block_size:
+                self.skipped_blocks += 1
+                continue
+            for pair in combinations(members, 2):
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+    def plan(self, rows: List[Dict[str, Any]]) -> List[MergePlan]:
+        """
+        Find the clusters of rows describing the same person.
+
+        Args:
+            rows: Character rows as returned by CharacterDatabase.get_all_characters
+
+        Returns:
+            One merge plan per cluster of two rows or more
+        """
+        records = [_Record(row) for row in rows if row['name']]
+        self.comparisons = self.skipped_blocks = 0
+
+        matches = []
+        for first, second in self._candidate_pairs(records):
+            self.comparisons += 1
+            score = self.score(records[first], records[second])
+            if score >= self.threshold:
+                matches.append((score, first, second))
+
+        # Union-find over the best matches first, joining clusters only if all their rows agree
+        parent = list(range(len(records)))
+        members = {index: [index] for index in range(len(records))}
+        attached: Dict[int, float] = {}
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for score, first, second in sorted(matches, reverse=True):
+            first_root, second_root = find(first), find(second)
+            if first_root == second_root:
+                continue
+            if not self._compatible([records[i] for i in members[first_root]], [records[i] for i in members[second_root]]):
+                continue
+            if len(members[first_root]) < len(members[second_root]):
+                first_root, second_root = second_root, first_root
+            parent[second_root] = first_root
+            members[first_root].extend(members.pop(second_root))
+            # The score with which every row joined its cluster, for the audit
+            attached.setdefault(first, score)
+            attached.setdefault(second, score)
+
+        plans = []
+        for indices in members.values():
+            if len(indices) < 2:
+                continue
+            indices = sorted(indices, key=lambda index: (-_content_size(records[index].profile), records[index].id))
+            survivor = records[indices[0]]
+            plans.append(MergePlan(
+                survivor_id=survivor.id, survivor_name=survivor.name,
+                merged=[(records[index].id, records[index].name, round(attached[index], 3)) for index in indices[1:]],
+            ))
+        return sorted(plans, key=lambda plan: plan.survivor_name)
+
+    def resolve(self, database: CharacterDatabase, dry_run: bool = False) -> List[MergePlan]:
+        """
+        Merge the rows describing the same person in a character database.
+
+        Args:
+            database: The character database
+            dry_run: Only return the merge plans, without changing the database
+
+        Returns:
+            The merge plans
+        """
+        rows = database.get_all_characters()
+        plans = self.plan(rows)
+        if dry_run:
+            return plans
+
+        by_id = {row['id']: row for row in rows}
+        for plan in plans:
+            profile = merge_profiles(by_id[plan.survivor_id], [by_id[merged_id] for merged_id, _, _ in plan.merged])
+            database.merge_characters(plan.survivor_id, profile, {merged_id: score for merged_id, _, score in plan.merged})
+        return plans
+
+
+def _content_size(profile: Dict[str, Any]) -> int:
+    return sum(len(str(value)) for value in profile.values() if value)
+
+
+def merge_profiles(survivor: Dict[str, Any], others: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge character rows into the profile of the survivor.
+
+    List fields are concatenated without repeats, text fields keep the survivor's value
+    unless it is empty, and the names of the other rows become aliases.
+    """
+    profile = dict(survivor['profile'])
+    for field_name in _LIST_FIELDS:
+        profile[field_name] = _unique([entry for row in [survivor, *others] for entry in row['profile'].get(field_name, [])])
+    for field_name in _TEXT_FIELDS:
+        if not profile.get(field_name):
+            profile[field_name] = next((row['profile'][field_name] for row in others if row['profile'].get(field_name)), '')
+
+    aliases = [alias for row in [survivor, *others] for alias in [row['name'], *row['profile'].get('aliases', [])]]
+    profile['aliases'] = [alias for alias in _unique(aliases) if alias != survivor['name']]
+    return profile
+
+
+def _unique(entries: List[str]) -> List[str]:
+    return list(dict.fromkeys(entries))
+
+
+def resolve_entities(database: CharacterDatabase, threshold: Optional[float] = None) -> List[MergePlan]:
+    """Merge the duplicate characters of a database with the configured resolver."""
+    resolver = EntityResolver() if threshold is None else EntityResolver(threshold=threshold)
+    return resolver.resolve(database)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Merge the character rows that describe the same person.")
+    parser.add_argument('db_path', nargs='?', default='characters.sqlite')
+    parser.add_argument('--threshold', type=float, default=entity_resolution_config['threshold'])
+    parser.add_argument('--max-block-size', type=int, default=entity_resolution_config['max_block_size'])
+    parser.add_argument('--dry-run', action='store_true', help="Print the merges without applying them")
+    args = parser.parse_args()
+
+    resolver = EntityResolver(threshold=args.threshold, max_block_size=args.max_block_size)
+    plans = resolver.resolve(CharacterDatabase(args.db_path), dry_run=args.dry_run)
+
+    for plan in plans:
+        merged = ", ".join(f"{name} ({score})" for _, name, score in plan.merged)
+        print(f"{plan.survivor_name} <- {merged}")
+    print(f"{len(plans)} clusters, {sum(len(plan.merged) for plan in plans)} rows merged, "
+          f"{resolver.comparisons} comparisons, {resolver.skipped_blocks} blocks skipped"
+          + (" (dry run)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
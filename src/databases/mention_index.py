@@ -0,0 +1,364 @@
+"""
+Inverted index of the chunks, to find where characters are mentioned without an LLM pass.
+
+Every chunk is a document. Its text is normalized like the character names (see
+src.profiles.similarity) and split into tokens; a token with a one-letter clitic prefix
+(و ف ب ل ك) is also indexed without it, at the same position, so "وسليم" is found by
+"سليم". For every term the index stores one postings blob: per chunk, the gap from the
+previous chunk id, the term frequency and the gaps between the token positions, all as
+varints. New books only append to the blobs, so the index is built incrementally, book by
+book, while the chunks are produced. A book is stored with the fingerprint of its chunking;
+when the same book comes back chunked differently, its old chunks are removed and it is
+indexed again, so the chunk indexes always point to the chunks of the current run.
+
+Queries:
+- search(): BM25 ranking of the chunks for a free-text query;
+- find_mentions(): the chunks containing any of a list of names (as phrases), with the
+  token positions of every mention; profile_mentions() does it for a profile's name and aliases.
+
+Usage:
+    python -m src.databases.mention_index mentions.sqlite "سليم الحلبي" --aliases "أبو علي"
+"""
+
+import argparse
+import math
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.profiles.similarity import normalize_text
+from src.schemas.data_classes import Profile, TextChunk
+
+
+CLITIC_PREFIXES = ('و', 'ف', 'ب', 'ل', 'ك')
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+@dataclass
+class SearchHit:
+    book_id: str
+    chunk_index: int
+    chapter_id: Optional[int]
+    score: float
+
+
+@dataclass
+class Mention:
+    book_id: str
+    chunk_index: int
+    chapter_id: Optional[int]
+    positions: List[int] = field(default_factory=list)  # token positions where a name starts
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the normalized tokens of a text."""
+    return normalize_text(text).split()
+
+
+def index_terms(token: str) -> Tuple[str, ...]:
+    """Return the terms a token is indexed under: itself, and without its clitic prefix."""
+    if len(token) >= 4 and token[0] in CLITIC_PREFIXES:
+        return token, token[1:]
+    return (token,)
+
+
+def encode_varints(values: Iterable[int]) -> bytes:
+    """Encode non-negative integers as LEB128 varints."""
+    output = bytearray()
+    for value in values:
+        while value >= 0x80:
+            output.append((value & 0x7F) | 0x80)
+            value >>= 7
+        output.append(value)
+    return bytes(output)
+
+
+def decode_varints(data: bytes) -> List[int]:
+    """Decode LEB128 varints."""
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+
+def _encode_postings(postings: Sequence[Tuple[int, List[int]]], previous_doc: int) -> bytes:
+    """Encode (doc id, positions) postings, doc ids increasing from previous_doc."""
+    values = []
+    for doc_id, positions in postings:
+        values.extend((doc_id - previous_doc, len(positions)))
+        values.extend(position - previous for position, previous in zip(positions, [0, *positions[:-1]]))
+        previous_doc = doc_id
+    return encode_varints(values)
+
+
+def _decode_postings(data: bytes) -> Dict[int, List[int]]:
+    """Decode a postings blob into the positions by doc id."""
+    values = decode_varints(data)
+    postings, doc_id, index = {}, 0, 0
+    while index < len(values):
+        doc_id += values[index]
+        count = values[index + 1]
+        positions, position = [], 0
+        for gap in values[index + 2:index + 2 + count]:
+            position += gap
+            positions.append(position)
+        postings[doc_id] = positions
+        index += 2 + count
+    return postings
+
+
+class MentionIndex:
+    """
+    SQLite inverted index of the chunks of one or more books.
+    """
+
+    def __init__(self, db_path: str = "mentions.sqlite"):
+        """
+        Initialize the mention index.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Books analysed in parallel append to the same index
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_database(self):
+        """Initialize the database with the required table structure."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    chapter_id INTEGER,
+                    length INTEGER NOT NULL,
+                    UNIQUE (book_id, chunk_index)
+                );
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS books (
+                    book_id TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL
+                );
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS terms (
+                    term TEXT PRIMARY KEY,
+                    doc_freq INTEGER NOT NULL,
+                    last_doc INTEGER NOT NULL,
+                    postings BLOB NOT NULL
+                );
+            """)
+            conn.commit()
+
+    def has_book(self, book_id: str, fingerprint: str = '') -> bool:
+        """Return True if the chunks of a book are indexed with the given chunking fingerprint."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM books WHERE book_id = ? AND fingerprint = ?", (book_id, fingerprint))
+            return cursor.fetchone() is not None
+
+    def add_book(self, book_id: str, chunks: Iterable[TextChunk], fingerprint: str = '') -> int:
+        """
+        Index the chunks of a book, unless it is already indexed with the same chunking.
+
+        Args:
+            book_id: Id of the book, e.g. its content hash
+            chunks: The chunks of the book
+            fingerprint: Fingerprint of the chunking, e.g. of the preprocessing parameters; chunks indexed
+                under another fingerprint are replaced
+
+        Returns:
+            The number of chunks indexed
+        """
+        if self.has_book(book_id, fingerprint):
+            return 0
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            # One writer at a time, so the doc ids of a book are above those of every posting
+            cursor.execute("BEGIN IMMEDIATE")
+            if cursor.execute("SELECT 1 FROM books WHERE book_id = ? AND fingerprint = ?",
+                              (book_id, fingerprint)).fetchone():
+                conn.rollback()
+                return 0
+            self._remove_book(cursor, book_id)
+
+            postings: Dict[str, List[Tuple[int, List[int]]]] = defaultdict(list)
+            count = 0
+            for chunk in chunks:
+                tokens = tokenize(chunk.text)
+                cursor.execute("""
+                    INSERT INTO documents (book_id, chunk_index, chapter_id, length)
+                    VALUES (?, ?, ?, ?)
+                """, (book_id, chunk.index, chunk.chapter_id, len(tokens)))
+                doc_id = cursor.lastrowid
+
+                positions: Dict[str, List[int]] = defaultdict(list)
+                for position, token in enumerate(tokens):
+                    for term in index_terms(token):
+                        positions[term].append(position)
+                for term, term_positions in positions.items():
+                    postings[term].append((doc_id, term_positions))
+                count += 1
+
+            for term, term_postings in postings.items():
+                row = cursor.execute("SELECT doc_freq, last_doc, postings FROM terms WHERE term = ?", (term,)).fetchone()
+                doc_freq, last_doc, blob = row if row else (0, 0, b'')
+                cursor.execute("""
+                    INSERT OR REPLACE INTO terms (term, doc_freq, last_doc, postings)
+                    VALUES (?, ?, ?, ?)
+                """, (term, doc_freq + len(term_postings), term_postings[-1][0],
+                      blob + _encode_postings(term_postings, last_doc)))
+            cursor.execute("INSERT OR REPLACE INTO books (book_id, fingerprint) VALUES (?, ?)", (book_id, fingerprint))
+            conn.commit()
+        return count
+
+    def _remove_book(self, cursor: sqlite3.Cursor, book_id: str):
+        """Remove the chunks of a book and their postings; a no-op for a book not indexed yet."""
+        removed = {row[0] for row in cursor.execute("SELECT doc_id FROM documents WHERE book_id = ?", (book_id,))}
+        if not removed:
+            return
+        cursor.execute("DELETE FROM documents WHERE book_id = ?", (book_id,))
+
+        # Only when a book is chunked differently: every blob is rewritten without the removed chunks
+        for term, blob in cursor.execute("SELECT term, postings FROM terms").fetchall():
+            postings = _decode_postings(blob)
+            kept = [(doc_id, positions) for doc_id, positions in postings.items() if doc_id not in removed]
+            if len(kept) == len(postings):
+                continue
+            if kept:
+                cursor.execute("UPDATE terms SET doc_freq = ?, last_doc = ?, postings = ? WHERE term = ?",
+                               (len(kept), kept[-1][0], _encode_postings(kept, 0), term))
+            else:
+                cursor.execute("DELETE FROM terms WHERE term = ?", (term,))
+
+    def _postings(self, cursor: sqlite3.Cursor, terms: Iterable[str]) -> Dict[str, Dict[int, List[int]]]:
+        terms = list(dict.fromkeys(terms))
+        if not terms:
+            return {}
+        cursor.execute(f"SELECT term, postings FROM terms WHERE term IN ({','.join('?' * len(terms))})", terms)
+        return {term: _decode_postings(blob) for term, blob in cursor.fetchall()}
+
+    def _documents(self, cursor: sqlite3.Cursor, doc_ids: Iterable[int],
+                   book_id: Optional[str]) -> Dict[int, Tuple[str, int, Optional[int], int]]:
+        doc_ids = list(doc_ids)
+        documents = {}
+        # Stay below SQLite's limit of host parameters
+        for start in range(0, len(doc_ids), 900):
+            batch = doc_ids[start:start + 900]
+            cursor.execute(f"""
+                SELECT doc_id, book_id, chunk_index, chapter_id, length
+                FROM documents
+                WHERE doc_id IN ({','.join('?' * len(batch))}) AND (? IS NULL OR book_id = ?)
+            """, (*batch, book_id, book_id))
+            documents.update((row[0], row[1:]) for row in cursor.fetchall())
+        return documents
+
+    def search(self, query: str, limit: int = 10, book_id: Optional[str] = None) -> List[SearchHit]:
+        """
+        Rank the chunks for a query with BM25.
+
+        Args:
+            query: Free text query
+            limit: Maximum number of chunks returned
+            book_id: Only search the chunks of this book if given
+
+        Returns:
+            The best chunks, best first
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            # The collection statistics are those of the searched book
+            total, average_length = cursor.execute("""
+                SELECT COUNT(*), AVG(length) FROM documents WHERE ? IS NULL OR book_id = ?
+            """, (book_id, book_id)).fetchone()
+            if not total:
+                return []
+
+            query_terms = tokenize(query)
+            postings = self._postings(cursor, query_terms)
+            documents = self._documents(cursor, {doc_id for term_postings in postings.values() for doc_id in term_postings},
+                                        book_id)
+
+            scores: Dict[int, float] = defaultdict(float)
+            for term in query_terms:
+                frequencies = {doc_id: len(positions) for doc_id, positions in postings.get(term, {}).items()
+                               if doc_id in documents}
+                idf = math.log((total - len(frequencies) + 0.5) / (len(frequencies) + 0.5) + 1)
+                for doc_id, frequency in frequencies.items():
+                    length = documents[doc_id][3]
+                    scores[doc_id] += idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [SearchHit(book_id=documents[doc_id][0], chunk_index=documents[doc_id][1],
+                          chapter_id=documents[doc_id][2], score=score) for doc_id, score in best]
+
+    def find_mentions(self, names: Iterable[str], book_id: Optional[str] = None) -> List[Mention]:
+        """
+        Find the chunks mentioning any of the names; a name of several words must appear as a phrase.
+
+        Args:
+            names: Names to look up, e.g. a character's name and aliases
+            book_id: Only search the chunks of this book if given
+
+        Returns:
+            One mention per chunk, in book and chunk order, with the positions of all the names
+        """
+        phrases = [tokens for tokens in (tokenize(name) for name in names) if tokens]
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            postings = self._postings(cursor, [term for phrase in phrases for term in phrase])
+
+            found: Dict[int, set] = defaultdict(set)
+            for phrase in phrases:
+                if any(term not in postings for term in phrase):
+                    continue
+                # Only the chunks containing every word can contain the phrase
+                candidates = set.intersection(*(set(postings[term]) for term in phrase))
+                for doc_id in candidates:
+                    following = [set(postings[term][doc_id]) for term in phrase[1:]]
+                    for start in postings[phrase[0]][doc_id]:
+                        if all(start + offset in positions for offset, positions in enumerate(following, start=1)):
+                            found[doc_id].add(start)
+
+            documents = self._documents(cursor, found, book_id)
+
+        mentions = [Mention(book_id=documents[doc_id][0], chunk_index=documents[doc_id][1], chapter_id=documents[doc_id][2],
+                            positions=sorted(found[doc_id]))
+                    for doc_id in found if doc_id in documents]
+        return sorted(mentions, key=lambda mention: (mention.book_id, mention.chunk_index))
+
+    def profile_mentions(self, profile: Profile, book_id: Optional[str] = None) -> List[Mention]:
+        """Find the chunks mentioning a character by its name or one of its aliases."""
+        return self.find_mentions([profile.name, *profile.aliases], book_id)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Find the chunks mentioning a character.")
+    parser.add_argument('db_path', help="Mention index database")
+    parser.add_argument('name', help="Name of the character")
+    parser.add_argument('--aliases', nargs='*', default=[])
+    parser.add_argument('--book-id', help="Only search this book")
+    args = parser.parse_args()
+
+    for mention in MentionIndex(args.db_path).find_mentions([args.name, *args.aliases], args.book_id):
+        print(f"{mention.book_id[:12]} chunk {mention.chunk_index}: {len(mention.positions)} mentions")
+
+
+if __name__ == "__main__":
+    main()
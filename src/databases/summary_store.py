@@ -0,0 +1,110 @@
+import sqlite3
+from typing import Iterable, List, Optional
+
+from src.schemas.data_classes import SummaryNode
+
+
+class SummaryStore:
+    """
+    SQLite store for the summaries of the hierarchical summarization, one row per tree node.
+    Scopes are 'chunk' (level 0), 'partial' (intermediate merges), 'chapter' and 'book'.
+    """
+    
+    def __init__(self, db_path: str = "summaries.sqlite"):
+        """
+        Initialize the summary store.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._init_database()
+    
+    def _init_database(self):
+        """Initialize the database with the required table structure."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    book_id TEXT NOT NULL,            -- Content hash (or other id) of the book
+                    scope TEXT NOT NULL,              -- 'chunk', 'partial', 'chapter' or 'book'
+                    level INTEGER NOT NULL,           -- Depth in the tree, 0 for chunk summaries
+                    position INTEGER NOT NULL,        -- Order of the node within its scope and level
+                    first_chunk INTEGER NOT NULL,     -- Index of the first chunk covered
+                    last_chunk INTEGER NOT NULL,      -- Index of the last chunk covered
+                    chapter_id INTEGER,               -- Chapter of the covered chunks, if they share one
+                    summary TEXT NOT NULL,
+                    PRIMARY KEY (book_id, scope, level, position)
+                );
+            """)
+            
+            conn.commit()
+    
+    def save_summaries(self, book_id: str, nodes: Iterable[SummaryNode]):
+        """
+        Insert or replace summary nodes of a book.
+        
+        Args:
+            book_id: Id of the book
+            nodes: The summary nodes to store
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT OR REPLACE INTO summaries (book_id, scope, level, position, first_chunk, last_chunk, chapter_id, summary)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (book_id, node.scope, node.level, node.position, node.first_chunk, node.last_chunk, node.chapter_id, node.summary)
+                for node in nodes
+            ])
+            conn.commit()
+    
+    def get_summaries(self, book_id: str, scope: Optional[str] = None, level: Optional[int] = None) -> List[SummaryNode]:
+        """
+        Retrieve the summary nodes of a book, ordered by scope, position and level.
+        
+        Args:
+            book_id: Id of the book
+            scope: Only return nodes of this scope
+            level: Only return nodes of this level
+            
+        Returns:
+            List of summary nodes
+        """
+        query = "SELECT scope, level, position, first_chunk, last_chunk, chapter_id, summary FROM summaries WHERE book_id = ?"
+        params = [book_id]
+        if scope is not None:
+            query += " AND scope = ?"
+            params.append(scope)
+        if level is not None:
+            query += " AND level = ?"
+            params.append(level)
+        query += " ORDER BY scope, position, level"
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            
+            return [
+                SummaryNode(summary=summary, scope=scope, level=level, position=position,
+                            first_chunk=first_chunk, last_chunk=last_chunk, chapter_id=chapter_id)
+                for scope, level, position, first_chunk, last_chunk, chapter_id, summary in cursor.fetchall()
+            ]
+    
+    def get_book_summary(self, book_id: str) -> Optional[str]:
+        """
+        Retrieve the whole-book summary.
+        
+        Returns:
+            The book summary, or None if the book has not been summarized
+        """
+        nodes = self.get_summaries(book_id, scope='book')
+        return nodes[0].summary if nodes else None
+    
+    def clear_book(self, book_id: str):
+        """Delete all the summaries of a book."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM summaries WHERE book_id = ?", (book_id,))
+            conn.commit()
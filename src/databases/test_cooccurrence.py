@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the character co-occurrence graph.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import csv
+
+import pytest
+
+from src.configs import preprocessing_config
+from src.databases.cooccurrence import CooccurrenceGraph
+from src.databases.database import CharacterDatabase
+from src.graphs.nodes import regular_nodes
+from src.graphs.nodes.regular_nodes import profile_retriever_creator
+from src.preprocessors.artifact_cache import hash_file
+from src.schemas.data_classes import LastAppearingCharacter
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = CooccurrenceGraph(str(tmp_path / 'characters.sqlite'))
+    graph.add_chunk('book', 0, ['salim', 'fatima', 'ali'])
+    graph.add_chunk('book', 1, ['fatima', 'salim'])
+    graph.add_chunk('book', 2, ['salim'])
+    return graph
+
+
+def test_pairs_accumulate(graph):
+    assert graph.edges('book') == [('fatima', 'salim', 2), ('ali', 'fatima', 1), ('ali', 'salim', 1)]
+    assert graph.edges(min_weight=2) == [('fatima', 'salim', 2)]
+    assert graph.neighbours('salim') == [('fatima', 2), ('ali', 1)]
+
+
+def test_chunk_is_counted_once(graph):
+    assert graph.add_chunk('book', 1, ['fatima', 'salim']) == 0
+    assert graph.add_chunk('sequel', 1, ['fatima', 'salim']) == 1
+
+    assert graph.edges('book')[0] == ('fatima', 'salim', 2)
+    assert graph.edges()[0] == ('fatima', 'salim', 3)
+
+
+def test_exports(graph, tmp_path):
+    ids, rows, columns, weights = graph.to_coo('book')
+
+    assert ids == ['ali', 'fatima', 'salim']
+    matrix = {(int(row), int(column)): int(weight) for row, column, weight in zip(rows, columns, weights)}
+    assert matrix[(1, 2)] == matrix[(2, 1)] == 2
+    assert len(matrix) == 6
+
+    path = tmp_path / 'edges.csv'
+    assert graph.to_edge_list(str(path), names={'salim': "سليم", 'fatima': "فاطمة"}) == 3
+    with open(path, encoding='utf-8') as file:
+        assert next(csv.DictReader(file)) == {'source': 'fatima', 'target': 'salim', 'weight': '2',
+                                              'source_name': "فاطمة", 'target_name': "سليم"}
+
+
+def test_merge_moves_edges(graph):
+    """Merging 'ali' into 'salim' moves his edges to salim and drops the edge between them."""
+    graph.add_chunk('book', 3, ['ali', 'omar'])
+
+    graph.merge_characters('salim', 'ali')
+
+    # chunk 0, where both met fatima, is still counted once
+    assert graph.edges('book') == [('fatima', 'salim', 2), ('omar', 'salim', 1)]
+    graph.add_chunk('book', 4, ['salim', 'omar'])
+    assert graph.neighbours('salim') == [('fatima', 2), ('omar', 2)]
+
+
+def test_retriever_records_the_chunk(tmp_path):
+    database = CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+    state = {
+        'database': database,
+        'content_hash': 'book',
+        'current_chunk_index': 4,
+        'last_appearing_characters': [LastAppearingCharacter(name="سليم", hint=""),
+                                      LastAppearingCharacter(name="فاطمة", hint="")],
+    }
+
+    profile_retriever_creator(state)
+
+    ids = {row['name']: row['id'] for row in database.get_all_characters()}
+    assert CooccurrenceGraph(database.db_path).edges('book') == [tuple(sorted(ids.values())) + (1,)]
+
+
+def test_rerun_after_clearing_the_database(tmp_path):
+    """Clearing the database before a re-run of a book forgets its counted chunks and old ids."""
+    database = CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+    state = {
+        'database': database,
+        'content_hash': 'book',
+        'current_chunk_index': 4,
+        'last_appearing_characters': [LastAppearingCharacter(name="سليم", hint=""),
+                                      LastAppearingCharacter(name="فاطمة", hint="")],
+    }
+
+    edges = []
+    for _ in range(2):
+        database.clear_database()
+        profile_retriever_creator(state)
+        ids = sorted(row['id'] for row in database.get_all_characters())
+        edges.append(CooccurrenceGraph(database.db_path).edges())
+        assert edges[-1] == [tuple(ids) + (1,)]
+    assert edges[0] != edges[1]
+
+
+def test_books_without_preprocessing_cache_do_not_collide(tmp_path, monkeypatch):
+    """With the preprocessing cache disabled, the language checker still identifies every book by its hash."""
+    monkeypatch.setitem(preprocessing_config, 'cache_dir', None)
+    regular_nodes._get_preprocessing_cache.cache_clear()
+    database = CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+    hashed = []
+    monkeypatch.setattr(regular_nodes, 'hash_file', lambda path: hashed.append(path) or hash_file(path))
+
+    for number, text in enumerate(["كتاب أول", "كتاب ثان"]):
+        path = tmp_path / f'book{number}.txt'
+        path.write_text(text, encoding='utf-8')
+        state = {'database': database, 'file_path': str(path)}
+        state.update(regular_nodes.language_checker(state))
+        for chunk_index in range(3):
+            regular_nodes.profile_retriever_creator({
+                **state,
+                'current_chunk_index': chunk_index,
+                'last_appearing_characters': [LastAppearingCharacter(name="سليم", hint=""),
+                                              LastAppearingCharacter(name="فاطمة", hint="")],
+            })
+
+    regular_nodes._get_preprocessing_cache.cache_clear()
+    assert CooccurrenceGraph(database.db_path).edges()[0][2] == 6
+    # The file is hashed once per book, not once per chunk
+    assert len(hashed) == 2
+
+
+def test_deleted_character_loses_its_edges(graph):
+    database = CharacterDatabase(graph.db_path)
+
+    database.delete_character('ali')
+
+    assert graph.edges('book') == [('fatima', 'salim', 2)]
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/databases/test_cooccurrence.py")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for the entity resolution of the character database.
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+
+from src.databases import cooccurrence
+from src.databases.cooccurrence import CooccurrenceGraph
+from src.databases.database import CharacterDatabase
+from src.databases.entity_resolution import EntityResolver, merge_profiles
+
+
+def make_profile(name, hint="", events=(), aliases=(), role=""):
+    return {'name': name, 'hint': hint, 'age': '', 'role': role, 'physical_characteristics': [], 'personality': '',
+            'events': list(events), 'relationships': [], 'aliases': list(aliases)}
+
+
+@pytest.fixture
+def database(tmp_path):
+    return CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+
+
+def insert(database, name, **fields):
+    return database.insert_character(name, make_profile(name, **fields))
+
+
+def test_spelling_variants_and_family_names_are_merged(database):
+    salim = insert(database, "سليم الحلبي", events=["سافر إلى القاهرة", "عاد إلى حلب"])
+    insert(database, "سليم", events=["عاد إلى حلب", "تزوج فاطمة"], role="البطل")
+    fatima = insert(database, "فاطمة")
+    insert(database, "فاطمه", aliases=["أم علي"])
+    other = insert(database, "سالم")
+
+    plans = EntityResolver(threshold=0.8).resolve(database)
+
+    assert sorted(len(plan.merged) for plan in plans) == [1, 1]
+    assert database.get_character_count() == 3
+    merged = database.get_character(salim)['profile']
+    assert merged['events'] == ["سافر إلى القاهرة", "عاد إلى حلب", "تزوج فاطمة"]
+    assert merged['role'] == "البطل"
+    assert merged['aliases'] == ["سليم"]
+    assert database.get_character(other) is not None
+    # The richer row survives: "فاطمه" has an alias
+    assert database.get_character(fatima) is None
+    assert {merge['name'] for merge in database.get_merges()} == {"سليم", "فاطمة"}
+
+
+def test_different_hints_are_kept_apart(database):
+    insert(database, "محمد", hint="الطبيب")
+    insert(database, "محمد", hint="المعلم")
+
+    assert EntityResolver(threshold=0.8).resolve(database) == []
+    assert database.get_character_count() == 2
+
+
+def test_no_chaining_through_a_short_name(database):
+    """'علي' may match both, but 'علي حسن' and 'علي محمود' are different people."""
+    insert(database, "علي حسن", events=["حدث"])
+    insert(database, "علي")
+    insert(database, "علي محمود", events=["حدث", "آخر"])
+
+    plans = EntityResolver(threshold=0.8).resolve(database)
+
+    assert len(plans) == 1
+    assert database.get_character_count() == 2
+
+
+def test_history_moves_to_the_survivor(database):
+    survivor = insert(database, "سليم الحلبي", events=["حدث أول", "حدث ثان"])
+    duplicate = insert(database, "سليم")
+    database.record_history(duplicate, {'events': ["حدث قديم"]})
+
+    EntityResolver(threshold=0.8).resolve(database)
+
+    assert database.get_history(survivor) == {'events': ["حدث قديم"]}
+    assert database.get_merges(survivor)[0]['profile']['name'] == "سليم"
+
+
+def test_edges_move_in_the_merge_transaction(database, monkeypatch):
+    """A merge failing while the edges move leaves the rows, the audit log and the graph as they were."""
+    survivor = insert(database, "سليم الحلبي", events=["حدث أول", "حدث ثان"])
+    duplicate = insert(database, "سليم")
+    fatima = insert(database, "فاطمة")
+    graph = CooccurrenceGraph(database.db_path)
+    graph.add_chunk('book', 0, [duplicate, fatima])
+
+    def fail(cursor, survivor_id, merged_id):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cooccurrence, 'merge_character', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        EntityResolver(threshold=0.8).resolve(database)
+
+    assert database.get_character(duplicate) is not None
+    assert database.get_merges() == []
+    assert graph.edges('book') == [tuple(sorted((duplicate, fatima))) + (1,)]
+
+    monkeypatch.undo()
+    EntityResolver(threshold=0.8).resolve(database)
+
+    assert graph.edges('book') == [tuple(sorted((survivor, fatima))) + (1,)]
+
+
+def test_dry_run_changes_nothing(database):
+    insert(database, "فاطمة")
+    insert(database, "فاطمه")
+
+    plans = EntityResolver(threshold=0.8).resolve(database, dry_run=True)
+
+    assert len(plans) == 1
+    assert database.get_character_count() == 2
+    assert database.get_merges() == []
+
+
+def test_blocking_scales():
+    """Twenty thousand distinct rows are resolved with far fewer comparisons than all pairs."""
+    letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    rows = []
+    for index in range(20000):
+        name = "".join(letters[(index // len(letters) ** power) % len(letters)] for power in range(4))
+        rows.append({'id': str(index), 'name': name, 'profile': make_profile(name)})
+    rows.append({'id': 'duplicate', 'name': rows[0]['name'], 'profile': make_profile(rows[0]['name'])})
+
+    resolver = EntityResolver(threshold=0.8, max_block_size=500)
+    started = time.perf_counter()
+    plans = resolver.plan(rows)
+
+    assert [(plan.survivor_id, plan.merged[0][0]) for plan in plans] == [('0', 'duplicate')]
+    assert resolver.comparisons < len(rows) ** 2 / 100
+    assert time.perf_counter() - started < 30
+
+
+def test_merge_profiles_keeps_survivor_values():
+    survivor = {'id': 'a', 'name': "سليم", 'profile': make_profile("سليم", hint="الطبيب", events=["أ"])}
+    other = {'id': 'b', 'name': "سليم الحلبي", 'profile': make_profile("سليم الحلبي", hint="", events=["أ", "ب"], role="البطل")}
+
+    merged = merge_profiles(survivor, [other])
+
+    assert (merged['hint'], merged['role'], merged['events']) == ("الطبيب", "البطل", ["أ", "ب"])
+    assert merged['aliases'] == ["سليم الحلبي"]
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/databases/test_entity_resolution.py")
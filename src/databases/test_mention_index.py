@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the inverted index of character mentions.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import random
+import sqlite3
+
+import pytest
+
+from src.configs import mention_index_config, preprocessing_config
+from src.databases.mention_index import MentionIndex, decode_varints, encode_varints, tokenize
+from src.graphs.nodes import regular_nodes
+from src.schemas.data_classes import Profile, TextChunk
+
+
+CHUNKS = [
+    TextChunk(text="خرج سليم الحلبي من البيت، ومشى نحو السوق.", index=0, chapter_id=1),
+    TextChunk(text="في السوق قابلت فاطمة أخاها وسليم يضحك.", index=1, chapter_id=1),
+    TextChunk(text="عاد أبو علي إلى البيت متأخرا.", index=2, chapter_id=2),
+    TextChunk(text="لم يذكر أحد شيئا عن الحلبي سليم.", index=3, chapter_id=2),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MentionIndex(str(tmp_path / 'mentions.sqlite'))
+    index.add_book('book', CHUNKS)
+    return index
+
+
+def test_varints_round_trip():
+    values = [0, 1, 127, 128, 300, 2 ** 35]
+
+    assert decode_varints(encode_varints(values)) == values
+    assert len(encode_varints([5, 100])) == 2
+
+
+def test_phrase_and_alias_mentions(index):
+    """A profile is found by its full name as a phrase and by its aliases, also with a clitic prefix."""
+    profile = Profile(name="سليم الحلبي", hint="", age="", role="", physical_characteristics=[], personality="",
+                      events=[], relationships=[], aliases=["سليم", "أبو علي"], id="1")
+
+    mentions = index.profile_mentions(profile)
+
+    assert [(mention.chunk_index, mention.positions) for mention in mentions] == [(0, [1]), (1, [5]), (2, [1]), (3, [6])]
+    assert [mention.chunk_index for mention in index.find_mentions(["سليم الحلبي"])] == [0]
+    assert index.find_mentions(["خليل"]) == []
+
+
+def test_bm25_search(index):
+    hits = index.search("السوق")
+
+    # Same term frequency, the shorter chunk ranks first
+    assert [hit.chunk_index for hit in hits] == [1, 0]
+    assert index.search("البيت", book_id='other') == []
+    assert [hit.chunk_index for hit in index.search("فاطمة")] == [1]
+
+
+def test_incremental_books(index):
+    """A second book appends to the postings; a book already indexed is skipped."""
+    assert index.add_book('book', CHUNKS) == 0
+    assert index.add_book('sequel', [TextChunk(text="سليم كبر.", index=0, chapter_id=None)]) == 1
+
+    mentions = index.find_mentions(["سليم"])
+
+    assert [(mention.book_id, mention.chunk_index) for mention in mentions] == [
+        ('book', 0), ('book', 1), ('book', 3), ('sequel', 0)]
+    assert [mention.book_id for mention in index.find_mentions(["سليم"], book_id='sequel')] == ['sequel']
+
+
+def test_rechunked_book_replaces_its_chunks(index):
+    """A book indexed again with another chunking only keeps the chunks of the new one."""
+    rechunked = [TextChunk(text=" ".join(chunk.text for chunk in CHUNKS[:2]), index=0, chapter_id=1),
+                 TextChunk(text=" ".join(chunk.text for chunk in CHUNKS[2:]), index=1, chapter_id=2)]
+
+    assert index.add_book('book', rechunked, fingerprint='large') == 2
+    assert index.add_book('book', rechunked, fingerprint='large') == 0
+
+    assert [(mention.chunk_index, mention.positions) for mention in index.find_mentions(["سليم"])] == [(0, [1, 13]), (1, [12])]
+    assert [hit.chunk_index for hit in index.search("السوق")] == [0]
+    # The postings of the old chunks are gone, not only hidden
+    with sqlite3.connect(index.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM documents").fetchone() == (2,)
+        postings = index._postings(conn.cursor(), tokenize("سليم خرج"))
+        assert [len(postings[term]) for term in tokenize("سليم خرج")] == [2, 1]
+
+
+def test_chunker_indexes_without_preprocessing_cache(tmp_path, monkeypatch):
+    """The chunker indexes the book under its content hash also when the preprocessing cache is disabled."""
+    monkeypatch.setitem(preprocessing_config, 'cache_dir', None)
+    monkeypatch.setitem(mention_index_config, 'db_path', str(tmp_path / 'mentions.sqlite'))
+    regular_nodes._get_preprocessing_cache.cache_clear()
+    book = tmp_path / 'book.txt'
+    book.write_text("\n\n".join(chunk.text for chunk in CHUNKS), encoding='utf-8')
+
+    state = {'file_path': str(book)}
+    for node in [regular_nodes.language_checker, regular_nodes.cleaner, regular_nodes.metadata_remover,
+                 regular_nodes.chunker]:
+        state.update(node(state))
+    regular_nodes._get_preprocessing_cache.cache_clear()
+
+    mentions = MentionIndex(mention_index_config['db_path']).find_mentions(["فاطمة"])
+    assert [mention.book_id for mention in mentions] == [state['content_hash']]
+
+
+def test_book_search_uses_the_book_statistics(index, tmp_path):
+    """The scores of a book do not depend on the other books of the index."""
+    index.add_book('other', [TextChunk(text=" ".join(["السوق"] * 50), index=number, chapter_id=None)
+                             for number in range(20)])
+    alone = MentionIndex(str(tmp_path / 'alone.sqlite'))
+    alone.add_book('book', CHUNKS)
+
+    assert index.search("السوق", book_id='book') == alone.search("السوق")
+
+
+def test_queries_read_only_the_postings_they_need(tmp_path, monkeypatch):
+    """Queries decode the postings of their terms and load only the chunks containing them."""
+    random.seed(0)
+    words = [f"كلمة{number}" for number in range(5000)] + ["سليم", "فاطمة", "الحلبي"]
+    index = MentionIndex(str(tmp_path / 'mentions.sqlite'))
+    for book in range(3):
+        index.add_book(f'book{book}', [TextChunk(text=" ".join(random.choices(words, k=800)), index=number, chapter_id=None)
+                                       for number in range(100)])
+
+    terms_read, documents_read = [], []
+    postings, documents = MentionIndex._postings, MentionIndex._documents
+
+    def read_postings(self, cursor, terms):
+        result = postings(self, cursor, terms)
+        terms_read.extend(result)
+        return result
+
+    def read_documents(self, cursor, doc_ids, book_id):
+        doc_ids = list(doc_ids)
+        documents_read.extend(doc_ids)
+        return documents(self, cursor, doc_ids, book_id)
+
+    monkeypatch.setattr(MentionIndex, '_postings', read_postings)
+    monkeypatch.setattr(MentionIndex, '_documents', read_documents)
+
+    containing = {(mention.book_id, mention.chunk_index) for mention in index.find_mentions(["سليم", "فاطمة"])}
+    terms_read.clear()
+    documents_read.clear()
+
+    hits = index.search("سليم فاطمة")
+
+    assert hits
+    assert sorted(terms_read) == sorted(tokenize("سليم فاطمة"))
+    assert len(documents_read) == len(containing) < 300
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/databases/test_mention_index.py")
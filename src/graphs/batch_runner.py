@@ -0,0 +1,232 @@
+"""
+Batch runner that analyzes a whole catalogue of books.
+
+Books run concurrently as independent graph instances, bounded by a global limit. Every
+book writes to its own character database, all chat models share one rate limiter
+(see llm_config), and failed books go to a retry queue with exponential backoff. The LLM
+usage of every book (calls, tokens, estimated cost and latency per model tier) is part
+of its result.
+
+Usage:
+    python -m src.graphs.batch_runner resources/texts --workers 4 --retries 2
+"""
+
+import argparse
+import heapq
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.configs import config, llm_config
+from src.databases.database import CharacterDatabase
+from src.language_models.routing import track_usage
+from src.preprocessors.artifact_cache import atomic_write_bytes
+from src.schemas.states import initial_state
+
+
+@dataclass
+class BookResult:
+    file_path: str
+    book_id: str
+    status: str
+    attempts: int
+    seconds: float
+    chunks: int
+    characters: int
+    database_path: str
+    error: str = ''
+    cost: float = 0.0
+    llm_usage: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+class BatchRunner:
+    """
+    Runs the analysis graph over many books with bounded concurrency and retries.
+    """
+
+    def __init__(self, graph=None, output_dir: str = "resources/results", max_concurrent_books: int = 4,
+                 max_retries: int = 2, retry_delay: float = 5.0,
+                 progress: Optional[Callable[[str, str], None]] = None):
+        """
+        Initialize the batch runner.
+
+        Args:
+            graph: Compiled graph to run per book; defaults to the main compiled graph
+            output_dir: Directory receiving one character database and one result file per book
+            max_concurrent_books: Maximum number of books processed at the same time
+            max_retries: How many times a failed book is retried
+            retry_delay: Delay before the first retry in seconds, doubled on every further retry
+            progress: Called with (book_id, message) for every progress event; prints by default
+        """
+        if graph is None:
+            from src.graphs.graph_builders import compiled_graph
+            graph = compiled_graph
+
+        self.graph = graph
+        self.output_dir = Path(output_dir)
+        self.max_concurrent_books = max_concurrent_books
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.progress = progress or self._print_progress
+        self._print_lock = threading.Lock()
+
+    def run(self, file_paths: List[str]) -> List[BookResult]:
+        """
+        Analyze the given books.
+
+        Args:
+            file_paths: Paths of the books' .txt files
+
+        Returns:
+            The final result of every book, in input order
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        book_ids = self._book_ids(file_paths)
+
+        results: Dict[str, BookResult] = {}
+        retry_queue = []  # heap of (ready time, file path, attempt)
+        finished = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_books) as executor:
+            pending = {
+                executor.submit(self.run_book, file_path, book_ids[file_path], 1): file_path
+                for file_path in file_paths
+            }
+
+            while pending or retry_queue:
+                # Submit the retries whose backoff has elapsed
+                while retry_queue and retry_queue[0][0] <= time.monotonic():
+                    _, file_path, attempt = heapq.heappop(retry_queue)
+                    pending[executor.submit(self.run_book, file_path, book_ids[file_path], attempt)] = file_path
+
+                timeout = max(0.0, retry_queue[0][0] - time.monotonic()) if retry_queue else None
+                if not pending:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending.pop(future)
+                    result = future.result()
+                    results[file_path] = result
+
+                    if result.status == 'failed' and result.attempts <= self.max_retries:
+                        delay = self.retry_delay * 2 ** (result.attempts - 1)
+                        heapq.heappush(retry_queue, (time.monotonic() + delay, file_path, result.attempts + 1))
+                        self.progress(result.book_id, f"failed ({result.error}), retry {result.attempts}/{self.max_retries} in {delay:.0f}s")
+                        continue
+
+                    self._write_result(result)
+                    finished += 1
+                    hours = (time.perf_counter() - started) / 3600
+                    self.progress(result.book_id, f"{result.status} after {result.attempts} attempt(s): "
+                                                  f"{result.chunks} chunks, {result.characters} characters, ${result.cost:.4f} "
+                                                  f"| {finished}/{len(file_paths)} books, {finished / hours:.1f} books/hour")
+
+        return [results[file_path] for file_path in file_paths]
+
+    def run_book(self, file_path: str, book_id: str, attempt: int = 1) -> BookResult:
+        """
+        Analyze one book into its own character database.
+
+        Exceptions are caught and reported as a failed result, so the scheduler can retry the book.
+        """
+        database_path = str(self.output_dir / f"{book_id}.sqlite")
+        started = time.perf_counter()
+        chunks = 0
+
+        with track_usage() as tracker:
+            try:
+                database = CharacterDatabase(database_path)
+                database.clear_database()
+                state = {**initial_state, 'file_path': file_path, 'database': database}
+
+                for update in self.graph.stream(state, config=config, stream_mode='updates'):
+                    chunk_update = update.get('chunk_updater')
+                    if chunk_update and not chunk_update.get('no_more_chunks'):
+                        chunks += 1
+                        self.progress(book_id, f"chunk {chunks}")
+
+                return BookResult(file_path=file_path, book_id=book_id, status='completed', attempts=attempt,
+                                  seconds=time.perf_counter() - started, chunks=chunks,
+                                  characters=database.get_character_count(), database_path=database_path,
+                                  cost=tracker.total_cost(), llm_usage=tracker.report())
+            except Exception as e:
+                return BookResult(file_path=file_path, book_id=book_id, status='failed', attempts=attempt,
+                                  seconds=time.perf_counter() - started, chunks=chunks, characters=0,
+                                  database_path=database_path, error=f"{type(e).__name__}: {e}",
+                                  cost=tracker.total_cost(), llm_usage=tracker.report())
+
+    def _write_result(self, result: BookResult):
+        """Write a book's final result next to its database."""
+        path = self.output_dir / f"{result.book_id}.json"
+        atomic_write_bytes(path, json.dumps(asdict(result), ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def _book_ids(self, file_paths: List[str]) -> Dict[str, str]:
+        """Derive a unique, file-system friendly id for every book from its file name."""
+        book_ids = {}
+        used = set()
+        for file_path in file_paths:
+            base = Path(file_path).stem
+            book_id = base
+            suffix = 2
+            while book_id in used:
+                book_id = f"{base}-{suffix}"
+                suffix += 1
+            used.add(book_id)
+            book_ids[file_path] = book_id
+        return book_ids
+
+    def _print_progress(self, book_id: str, message: str):
+        with self._print_lock:
+            print(f"[{book_id}] {message}")
+
+
+def collect_books(paths: List[str]) -> List[str]:
+    """Expand directories into the .txt files they contain (recursively), keeping files as given."""
+    file_paths = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            file_paths.extend(sorted(str(file) for file in path.rglob('*.txt')))
+        else:
+            file_paths.append(str(path))
+    return file_paths
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Analyze many books concurrently.")
+    parser.add_argument('paths', nargs='+', help="Book files and/or directories of .txt books")
+    parser.add_argument('--output-dir', default="resources/results")
+    parser.add_argument('--workers', type=int, default=4, help="Maximum number of books processed concurrently")
+    parser.add_argument('--retries', type=int, default=2, help="Retries per failed book")
+    parser.add_argument('--retry-delay', type=float, default=5.0, help="Initial retry backoff in seconds")
+    parser.add_argument('--requests-per-second', type=float, default=llm_config['requests_per_second'],
+                        help="LLM request quota shared by all books")
+    args = parser.parse_args()
+
+    llm_config['requests_per_second'] = args.requests_per_second
+
+    runner = BatchRunner(output_dir=args.output_dir, max_concurrent_books=args.workers,
+                         max_retries=args.retries, retry_delay=args.retry_delay)
+
+    started = time.perf_counter()
+    results = runner.run(collect_books(args.paths))
+    hours = (time.perf_counter() - started) / 3600
+
+    completed = [result for result in results if result.status == 'completed']
+    cost = sum(result.cost for result in results)
+    print(f"(📚) {len(completed)}/{len(results)} books completed, {len(completed) / hours:.1f} books/hour, "
+          f"${cost:.4f} estimated LLM cost")
+    for result in results:
+        if result.status != 'completed':
+            print(f"  ✗ {result.book_id}: {result.error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,179 @@
 from langgraph.graph import StateGraph, START, END
-from src.schemas.states import State
+from src.schemas.states import SlimState, State
 from src.graphs.nodes.regular_nodes import *
 from src.graphs.nodes.router_nodes import *
 
-graph = StateGraph(State)
-graph.add_node("language_checker",language_checker)
-graph.add_node('cleaner', cleaner)
-graph.add_node('chunker', chunker)
-graph.add_node('first_name_querier', first_name_querier)
-graph.add_node('second_name_querier', second_name_querier)
-graph.add_node('profile_retriever_creator', profile_retriever_creator)
-graph.add_node('profile_refresher', profile_refresher)
-graph.add_node('chunk_updater', chunk_updater)
-graph.add_node('summarizer', summarizer)
-graph.add_node('metadata_remover', metadata_remover)
-
-graph.set_entry_point('language_checker')
-graph.add_edge('cleaner', 'metadata_remover')
-graph.add_edge('metadata_remover', 'chunker')
-graph.add_edge('chunker', 'chunk_updater')
-
-graph.add_conditional_edges('language_checker', router_from_language_checker_to_cleaner_or_end, {
-    'cleaner': 'cleaner',
-    'END': END
-})
-
-graph.add_conditional_edges('chunk_updater', router_from_chunker_to_first_name_querier_or_end, {
-    'first_name_querier': 'first_name_querier',
-    'END': END
-})
-
-graph.add_conditional_edges(
-    'first_name_querier',
-    router_from_first_name_querier_to_summarizer_or_chunk_updater,
-    {
-        'summarizer': 'summarizer',
+
+def _add_summary_nodes(graph, fused, summary_node, fused_summary_node):
+    """
+    Add the summary step, which ends at profile_retriever_creator: summarizer and
+    second_name_querier, or a single fused summarizer that also extracts the characters.
+    """
+    if fused:
+        graph.add_node('summarizer', fused_summary_node)
+        graph.add_edge('summarizer', 'profile_retriever_creator')
+    else:
+        graph.add_node('summarizer', summary_node)
+        graph.add_node('second_name_querier', second_name_querier)
+        graph.add_edge('summarizer', 'second_name_querier')
+        graph.add_edge('second_name_querier', 'profile_retriever_creator')
+
+
+def build_graph(fused: bool = False):
+    """
+    Build the flat graph, in which every chunk loops back through chunk_updater.
+    Each chunk costs about six supersteps, so the recursion limit caps the book length.
+    With fused=True, the summarizer also extracts the characters of its summary and the
+    second name query is skipped.
+    """
+    graph = StateGraph(State)
+    graph.add_node("language_checker",language_checker)
+    graph.add_node('cleaner', cleaner)
+    graph.add_node('chunker', chunker)
+    graph.add_node('first_name_querier', first_name_querier)
+    graph.add_node('profile_retriever_creator', profile_retriever_creator)
+    graph.add_node('profile_refresher', profile_refresher)
+    graph.add_node('chunk_updater', chunk_updater)
+    _add_summary_nodes(graph, fused, summarizer, fused_summarizer)
+    graph.add_node('metadata_remover', metadata_remover)
+
+    graph.set_entry_point('language_checker')
+    graph.add_edge('cleaner', 'metadata_remover')
+    graph.add_edge('metadata_remover', 'chunker')
+    graph.add_edge('chunker', 'chunk_updater')
+
+    graph.add_conditional_edges('language_checker', router_from_language_checker_to_cleaner_or_end, {
+        'cleaner': 'cleaner',
+        'chunker': 'chunker',
+        'END': END
+    })
+
+    graph.add_conditional_edges('chunk_updater', router_from_chunker_to_first_name_querier_or_end, {
+        'first_name_querier': 'first_name_querier',
+        'END': END
+    })
+
+    graph.add_conditional_edges(
+        'first_name_querier',
+        router_from_first_name_querier_to_summarizer_or_chunk_updater,
+        {
+            'summarizer': 'summarizer',
+            'chunk_updater': 'chunk_updater',
+        }
+    )
+
+    graph.add_edge('profile_retriever_creator', 'profile_refresher')
+
+    graph.add_edge('profile_refresher', 'chunk_updater')
+
+    return graph
+
+
+def build_chunk_graph(fused: bool = False):
+    """
+    Build the per-chunk subgraph: name query, then summary, second name query and
+    profile refresh when the chunk has characters. See build_graph for fused.
+    """
+    graph = StateGraph(State)
+    graph.add_node('first_name_querier', first_name_querier)
+    _add_summary_nodes(graph, fused, summarizer, fused_summarizer)
+    graph.add_node('profile_retriever_creator', profile_retriever_creator)
+    graph.add_node('profile_refresher', profile_refresher)
+
+    graph.set_entry_point('first_name_querier')
+
+    graph.add_conditional_edges(
+        'first_name_querier',
+        router_from_first_name_querier_to_summarizer_or_chunk_updater,
+        {
+            'summarizer': 'summarizer',
+            'chunk_updater': END,
+        }
+    )
+
+    graph.add_edge('profile_retriever_creator', 'profile_refresher')
+
+    graph.add_edge('profile_refresher', END)
+
+    return graph
+
+
+def build_chunked_graph(chunk_graph):
+    """
+    Build the graph that runs the compiled per-chunk subgraph once per chunk from a single
+    chunk_loop node, so its number of supersteps does not depend on the book length.
+    """
+    graph = StateGraph(State)
+    graph.add_node("language_checker",language_checker)
+    graph.add_node('cleaner', cleaner)
+    graph.add_node('metadata_remover', metadata_remover)
+    graph.add_node('chunker', chunker)
+    graph.add_node('chunk_loop', make_chunk_loop(chunk_graph))
+
+    graph.set_entry_point('language_checker')
+    graph.add_edge('cleaner', 'metadata_remover')
+    graph.add_edge('metadata_remover', 'chunker')
+    graph.add_edge('chunker', 'chunk_loop')
+    graph.add_edge('chunk_loop', END)
+
+    graph.add_conditional_edges('language_checker', router_from_language_checker_to_cleaner_or_end, {
+        'cleaner': 'cleaner',
+        'chunker': 'chunker',
+        'END': END
+    })
+
+    return graph
+
+
+def build_slim_graph(fused: bool = False):
+    """
+    Build the graph over the slim state: the same per-chunk flow as the flat graph, but the
+    state only references the preprocessed artifacts, so it stays small and serializable.
+    See build_graph for fused.
+    """
+    graph = StateGraph(SlimState)
+    graph.add_node('slim_preprocessor', slim_preprocessor)
+    graph.add_node('chunk_updater', slim_chunk_updater)
+    graph.add_node('first_name_querier', slim_first_name_querier)
+    _add_summary_nodes(graph, fused, slim_summarizer, slim_fused_summarizer)
+    # Nodes typed with SlimState, so LangGraph passes them database_path
+    graph.add_node('profile_retriever_creator', slim_profile_retriever_creator)
+    graph.add_node('profile_refresher', slim_profile_refresher)
+
+    graph.set_entry_point('slim_preprocessor')
+
+    graph.add_conditional_edges('slim_preprocessor', router_from_slim_preprocessor_to_chunk_updater_or_end, {
         'chunk_updater': 'chunk_updater',
-    }
-)
+        'END': END
+    })
+
+    graph.add_conditional_edges('chunk_updater', router_from_chunker_to_first_name_querier_or_end, {
+        'first_name_querier': 'first_name_querier',
+        'END': END
+    })
+
+    graph.add_conditional_edges(
+        'first_name_querier',
+        router_from_first_name_querier_to_summarizer_or_chunk_updater,
+        {
+            'summarizer': 'summarizer',
+            'chunk_updater': 'chunk_updater',
+        }
+    )
+
+    graph.add_edge('profile_retriever_creator', 'profile_refresher')
+
+    graph.add_edge('profile_refresher', 'chunk_updater')
+
+    return graph
+
 
-graph.add_edge('summarizer', 'second_name_querier')
+graph = build_graph()
 
-graph.add_edge('second_name_querier', 'profile_retriever_creator')
+compiled_graph = graph.compile()
 
-graph.add_edge('profile_retriever_creator', 'profile_refresher')
+compiled_chunk_graph = build_chunk_graph().compile()
 
-graph.add_edge('profile_refresher', 'chunk_updater')
+compiled_chunked_graph = build_chunked_graph(compiled_chunk_graph).compile()
 
-compiled_graph = graph.compile()
\ No newline at end of file
+compiled_slim_graph = build_slim_graph().compile()
@@ -1,8 +1,29 @@
-from IPython.display import Image, display
+import hashlib
+from pathlib import Path
 
-def visualize_graph(graph):
-        mermaid_png = graph.get_graph().draw_mermaid_png()
-        display(Image(mermaid_png))
-        with open('resources/images/graph.png', 'wb') as f:
-            f.write(mermaid_png)
-        print("(🎨) Graph saved to graph.png")
\ No newline at end of file
+
+def visualize_graph(graph, output_path='resources/images/graph.png', display_inline=False):
+        """
+        Render the graph as a mermaid PNG saved to output_path.
+        The PNG is only re-rendered when the graph changed: the hash of its mermaid
+        definition is stored next to the image and compared on every call.
+        IPython is imported only when display_inline is requested.
+        """
+        output_path = Path(output_path)
+        hash_path = output_path.with_suffix('.sha256')
+        graph_hash = hashlib.sha256(graph.get_graph().draw_mermaid().encode('utf-8')).hexdigest()
+        
+        if output_path.exists() and hash_path.exists() and hash_path.read_text() == graph_hash:
+            mermaid_png = output_path.read_bytes()
+            print(f"(🎨) Graph unchanged, reusing {output_path}")
+        else:
+            mermaid_png = graph.get_graph().draw_mermaid_png()
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(mermaid_png)
+            hash_path.write_text(graph_hash)
+            print(f"(🎨) Graph saved to {output_path}")
+        
+        if display_inline:
+            from IPython.display import Image, display
+            display(Image(mermaid_png))
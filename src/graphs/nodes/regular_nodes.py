@@ -1,31 +1,118 @@
-from src.language_models.prompts import name_query_prompt, profile_update_prompt, summary_prompt
-from src.language_models.llms import name_query_llm, profile_update_llm, summary_llm
+from src.language_models.chains import get_chain
 from src.preprocessors.text_checkers import ArabicLanguageDetector
-from src.schemas.states import State
+from src.schemas.states import SlimState, State
 from src.preprocessors.text_splitters import TextChunker
 from src.preprocessors.text_cleaners import clean_arabic_text_comprehensive
 from src.preprocessors.metadata_remover import remove_book_metadata
-from src.databases.database import character_db
-from src.schemas.data_classes import Profile
+from src.preprocessors.artifact_cache import ChunkStore, PreprocessingCache, hash_file, preprocessing_params, stage_fingerprint
+from src.preprocessors.corpus import preprocess_book
+from src.databases.cooccurrence import CooccurrenceGraph
+from src.databases.database import CharacterDatabase, get_character_db
+from src.databases.entity_resolution import resolve_entities
+from src.databases.mention_index import MentionIndex
+from src.profiles import get_profile_compactor, get_profile_ranker, history_entries, refresh_profiles
+from src.schemas.data_classes import Profile, TextChunk
+from src.configs import cooccurrence_config, entity_resolution_config, mention_index_config, preprocessing_config, profile_compaction_config
+from dataclasses import asdict
+from functools import lru_cache
 import os
 
+
+@lru_cache(maxsize=1)
+def _get_preprocessing_cache() -> PreprocessingCache | None:
+    """Return the shared preprocessing cache, or None when caching is disabled."""
+    cache_dir = preprocessing_config['cache_dir']
+    return PreprocessingCache(cache_dir) if cache_dir else None
+
+
+@lru_cache(maxsize=None)
+def _open_database(database_path: str) -> CharacterDatabase:
+    """Return the character database stored at a path, opened once per path."""
+    return CharacterDatabase(database_path)
+
+
+@lru_cache(maxsize=None)
+def _open_cooccurrence_graph(database_path: str) -> CooccurrenceGraph:
+    """Return the co-occurrence graph stored in a character database, opened once per path."""
+    return CooccurrenceGraph(database_path)
+
+
+@lru_cache(maxsize=None)
+def _open_mention_index(db_path: str) -> MentionIndex:
+    """Return the mention index stored at a path, opened once per path."""
+    return MentionIndex(db_path)
+
+
+def _index_mentions(content_hash: str | None, chunks):
+    """
+    Add the chunks of a book to the mention index, if enabled; a book is only indexed again
+    when its chunking parameters change.
+    """
+    db_path = mention_index_config['db_path']
+    if db_path and content_hash:
+        fingerprint = stage_fingerprint('chunks', preprocessing_params(preprocessing_config))
+        _open_mention_index(db_path).add_book(content_hash, chunks, fingerprint)
+
+
+@lru_cache(maxsize=8)
+def _open_chunk_store(chunk_store: str) -> ChunkStore:
+    """Return the chunk store in a directory, opened once per directory."""
+    return ChunkStore(chunk_store)
+
+
+def _get_database(state: State) -> CharacterDatabase:
+    """
+    Return the character database of the run: the one in the state, the one at the
+    state's database_path (slim state), or the global one.
+    """
+    if state.get('database'):
+        return state['database']
+    if state.get('database_path'):
+        return _open_database(state['database_path'])
+    return get_character_db()
+
+
 def language_checker(state : State):
     """
     Node that Checks the text from the file before cleaning.
     Uses the check_text function to make sure the input text is in Arabic.
+    The file's content hash identifies the book for the rest of the run. With the preprocessing
+    cache enabled, the result is looked up by that hash and the node reports whether the chunks
+    of this file are already cached.
     """
     file_path = state['file_path']
     if not file_path or not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
+    content_hash = hash_file(file_path)
+    cache = _get_preprocessing_cache()
+    if cache is None:
+        return {
+            'is_arabic': _check_file_language(file_path),
+            'content_hash': content_hash
+        }
+    
+    params = preprocessing_params(preprocessing_config)
+    
+    result = cache.load_language(content_hash, params)
+    if result is None:
+        result = _check_file_language(file_path)
+        cache.save_language(content_hash, params, result)
+    
+    return {
+        'is_arabic': result,
+        'content_hash': content_hash,
+        'chunks_cached': cache.has_chunks(content_hash, params)
+    }
+
+
+def _check_file_language(file_path: str) -> bool:
+    """Run the Arabic language detector on the content of a file."""
     with open(file_path, 'r', encoding='utf-8') as file:
         raw_text = file.read()
     detector = ArabicLanguageDetector()
     
-    result = detector.check_text(raw_text)
-    return {
-        'is_arabic': result
-    }
+    return detector.check_text(raw_text)
     
     
 def cleaner(state: State):
@@ -38,11 +125,28 @@ def cleaner(state: State):
     if not file_path or not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
+    cache = _get_preprocessing_cache()
+    content_hash = state.get('content_hash')
+    params = preprocessing_params(preprocessing_config)
+    
+    if cache and content_hash:
+        cleaned_text = cache.load_text(content_hash, 'cleaned', params)
+        if cleaned_text is not None:
+            return {
+                'cleaned_text': cleaned_text
+            }
+    
     with open(file_path, 'r', encoding='utf-8') as file:
         raw_text = file.read()
 
     # Clean the text using the clean_text function
-    cleaned_text = clean_arabic_text_comprehensive(raw_text)
+    cleaned_text = clean_arabic_text_comprehensive(
+        raw_text,
+        preserve_structure=preprocessing_config['preserve_structure']
+    )
+    
+    if cache and content_hash:
+        cache.save_text(content_hash, 'cleaned', params, cleaned_text)
     
     return {
         'cleaned_text': cleaned_text
@@ -59,9 +163,23 @@ def metadata_remover(state: State):
     if not cleaned_text:
         raise ValueError("No cleaned text available in state")
     
+    cache = _get_preprocessing_cache()
+    content_hash = state.get('content_hash')
+    params = preprocessing_params(preprocessing_config)
+    
+    if cache and content_hash:
+        content_text = cache.load_text(content_hash, 'content', params)
+        if content_text is not None:
+            return {
+                'content_text': content_text
+            }
+    
     # Remove metadata from the cleaned text
     content_text = remove_book_metadata(cleaned_text)
     
+    if cache and content_hash:
+        cache.save_text(content_hash, 'content', params, content_text)
+    
     return {
         'content_text': content_text
     }
@@ -71,25 +189,52 @@ def chunker(state: State):
     """
     Node that takes the content text from the state and yields chunks using a generator for memory efficiency.
     Only the current chunk is kept in the state.
+    In structure-preserving mode the chunks are aligned to paragraphs and tagged with their chapter id.
+    With the preprocessing cache enabled, chunks are read lazily from the memory-mapped chunk store,
+    so a warm run does not need the cleaned or content text at all; the store is closed when
+    the generator is exhausted or closed.
     """
-    content_text = state['content_text']
-    
-    if not content_text:
-        raise ValueError("No content text available in state")
-        
-    chunker = TextChunker(chunk_size=5000, chunk_overlap=200)
-    
-    chunks = chunker.chunk_text_arabic_optimized(content_text)
+    cache = _get_preprocessing_cache()
+    content_hash = state.get('content_hash')
+    
+    if cache and content_hash:
+        params = preprocessing_params(preprocessing_config)
+        chunks = cache.load_chunks(content_hash, params)
+        if chunks is None:
+            chunks = cache.save_chunks(content_hash, params, _split_content(state))
+    else:
+        chunks = _split_content(state)
+    _index_mentions(content_hash, chunks)
     
     def chunk_generator():
-        for chunk in chunks:
-            yield chunk
+        try:
+            for chunk in chunks:
+                yield chunk
+        finally:
+            # release the memory map of the chunk store once the book is done
+            if isinstance(chunks, ChunkStore):
+                chunks.close()
             
     gen = chunk_generator()
         
     return {
         'chunk_generator': gen,
     }
+
+
+def _split_content(state: State) -> list[TextChunk]:
+    """Split the content text of the state into chunks according to the preprocessing config."""
+    content_text = state['content_text']
+    
+    if not content_text:
+        raise ValueError("No content text available in state")
+        
+    chunker = TextChunker(
+        chunk_size=preprocessing_config['chunk_size'],
+        chunk_overlap=preprocessing_config['chunk_overlap']
+    )
+    
+    return chunker.chunk_text_records(content_text, preserve_structure=preprocessing_config['preserve_structure'])
     
     
 def first_name_querier(state: State):
@@ -104,7 +249,7 @@ def first_name_querier(state: State):
         "text": str(context)
     }
     
-    chain = name_query_prompt | name_query_llm
+    chain = get_chain('name_query')
     
     response = chain.invoke(chain_input)
     
@@ -124,7 +269,7 @@ def second_name_querier(state: State):
         "text": str(context)
     }
     
-    chain = name_query_prompt | name_query_llm
+    chain = get_chain('name_query')
     
     response = chain.invoke(chain_input)
     
@@ -135,39 +280,55 @@ def second_name_querier(state: State):
     } 
 
 
+def _profile_from_row(row) -> Profile:
+    """Return the Profile of a character row of the database."""
+    profile_data = row['profile']
+    return Profile(
+        name=row['name'],
+        hint=profile_data['hint'],
+        age=profile_data['age'],
+        role=profile_data['role'],
+        physical_characteristics=profile_data['physical_characteristics'],
+        personality=profile_data['personality'],
+        events=profile_data['events'],
+        relationships=profile_data['relationships'],
+        aliases=profile_data['aliases'],
+        id=row['id']
+    )
+
+
 def profile_retriever_creator(state: State):
     """
     Node that creates a new profile or retrieves an existing one.
-    Uses last_appearing_characters to retrieve profiles from character_db. If no character exists,
-    creates a new entry with that name and hint, keeping other profile data null.
+    Uses last_appearing_characters to retrieve profiles from the run's character database. The stored profiles
+    matching each name are ranked by name/hint similarity, and only the best ones that fit the token budget are
+    kept (see src.profiles.ranking). If no stored profile matches, creates a new entry with that name and hint,
+    keeping other profile data null; the created profiles are always sent to the refresher.
     """
     last_appearing_characters = state['last_appearing_characters']
+    database = _get_database(state)
+    ranker = get_profile_ranker()
+    
+    every_n_chunks = entity_resolution_config['every_n_chunks']
+    chunk_index = state.get('current_chunk_index')
+    if every_n_chunks and chunk_index and chunk_index % every_n_chunks == 0:
+        # merge the duplicate characters created so far before looking the names up
+        resolve_entities(database)
     
-    profiles = []
+    ranked = []
+    created = []
+    appearing_ids = []
     
     for character in last_appearing_characters:
         name = character.name
         hint = character.hint
         
-        existing_characters = character_db.find_characters_by_name(name)
+        candidates = [_profile_from_row(row) for row in database.find_characters_by_name(name)]
+        matches = ranker.rank(name, hint, candidates)
         
-        if existing_characters:
-            # create the data dictionary that will be send to the LLM
-            for char in existing_characters:
-                profile_data = char['profile']
-                profile = Profile(
-                    name=char['name'],
-                    hint=profile_data['hint'],
-                    age=profile_data['age'],
-                    role=profile_data['role'],
-                    physical_characteristics=profile_data['physical_characteristics'],
-                    personality=profile_data['personality'],
-                    events=profile_data['events'],
-                    relationships=profile_data['relationships'],
-                    aliases=profile_data['aliases'],
-                    id=char['id']
-                )
-                profiles.append(profile)
+        if matches:
+            ranked.append(matches)
+            appearing_ids.append(matches[0][1].id)
         else:
             # create the json object that will be stored in the database (no need for id because it has its own column)
             new_profile = {
@@ -182,7 +343,8 @@ def profile_retriever_creator(state: State):
                 'aliases': [],
             }
             
-            character_db.insert_character(name, new_profile)
+            character_id = database.insert_character(name, new_profile)
+            appearing_ids.append(character_id)
             
             # Create data dictionary that will be send to the LLM
             profile = Profile(
@@ -195,62 +357,47 @@ def profile_retriever_creator(state: State):
                 events=[],
                 relationships=[],
                 aliases=[],
-                id='',
+                id=character_id,
             )
-            profiles.append(profile)
+            created.append(profile)
     
-    return {'last_profiles': profiles}
+    if cooccurrence_config['enabled']:
+        # the characters of the chunk share a scene: count every pair
+        book_id = state.get('content_hash')
+        if book_id is None:
+            # without a book id the chunk cannot be told apart from those of other books: never skip it
+            chunk_index = None
+        _open_cooccurrence_graph(database.db_path).add_chunk(book_id or '', chunk_index, appearing_ids)
+    
+    return {'last_profiles': ranker.select(ranked, created)}
 
 
 def profile_refresher(state: State):
     """
     Node that refreshes the profiles based on the current chunk.
     """
-    chain_input = {
-        "text": str(state['last_summary']),
-        "profiles": str(state['last_profiles'])
-    }
-    chain = profile_update_prompt | profile_update_llm
-    response = chain.invoke(chain_input)
+    result = refresh_profiles(str(state['last_summary']), state['last_profiles'])
+    database = _get_database(state)
     
-    # Extract profiles from the structured output
+    # Only the profiles that passed the validation are written; the others keep their previous version
     updated_profiles = []
-    for profile_data in response.profiles:
-        # create the data dictionary that will be an item in the list of profiles in the state
-        profile = Profile(
-            name=profile_data.name,
-            hint=profile_data.hint,
-            age=profile_data.age,
-            role=profile_data.role,  # Use the role determined by the LLM with tool
-            physical_characteristics=profile_data.physical_characteristics,
-            personality=profile_data.personality,
-            events=profile_data.events,
-            relationships=profile_data.relations,
-            aliases=profile_data.aliases,
-            id=profile_data.id
-        )
+    for profile in result.updated:
+        if profile_compaction_config['enabled']:
+            # keep every entry in the history before the fields are brought back within budget
+            database.record_history(profile.id, history_entries(profile))
+            profile = get_profile_compactor().compact(profile)
         updated_profiles.append(profile)
         
         # create the json object that will be updated in the database
-        updated_profile_dict = {
-            'name': profile_data.name,
-            'hint': profile_data.hint,
-            'age': profile_data.age,
-            'role': profile_data.role,  # Use the role determined by the LLM with tool
-            'physical_characteristics': profile_data.physical_characteristics,
-            'personality': profile_data.personality,
-            'events': profile_data.events,
-            'relationships': profile_data.relations,
-            'aliases': profile_data.aliases,
-        }
+        updated_profile_dict = {field: value for field, value in asdict(profile).items() if field != 'id'}
     
-        character_db.update_character(
-            profile_data.id,
+        database.update_character(
+            profile.id,
             updated_profile_dict
         )
     
     return {
-        'last_profiles': updated_profiles,
+        'last_profiles': updated_profiles + result.failed,
     }
 
 def chunk_updater(state: State):
@@ -258,15 +405,63 @@ def chunk_updater(state: State):
     Node that updates the previous and current chunks in the state.
     """
     try:
-        current_chunk = next(state['chunk_generator'])
+        chunk = next(state['chunk_generator'])
         return {
             'previous_chunk': state.get('current_chunk', ''),
-            'current_chunk': current_chunk,
+            'current_chunk': chunk.text,
+            'current_chunk_index': chunk.index,
+            'current_chapter_id': chunk.chapter_id,
             'no_more_chunks': False
         }
     except StopIteration:
         return {'no_more_chunks': True}
 
+
+def make_chunk_loop(chunk_graph):
+    """
+    Create the node that runs the compiled per-chunk subgraph once for every chunk of the generator.
+    The summary and profiles produced for a chunk are carried over to the next one, and the
+    subgraph's supersteps do not count against the outer graph's recursion limit.
+    """
+    def chunk_loop(state: State):
+        """
+        Node that processes all the chunks, one subgraph invocation per chunk.
+        """
+        carried = {
+            'last_summary': state.get('last_summary', ''),
+            'last_profiles': state.get('last_profiles'),
+            'last_appearing_characters': state.get('last_appearing_characters'),
+        }
+        previous_chunk = state.get('current_chunk', '')
+        chunk = None
+        
+        for chunk in state['chunk_generator']:
+            result = chunk_graph.invoke({
+                **carried,
+                'database': state.get('database'),
+                'content_hash': state.get('content_hash'),
+                'previous_chunk': previous_chunk,
+                'current_chunk': chunk.text,
+                'current_chunk_index': chunk.index,
+                'current_chapter_id': chunk.chapter_id,
+            })
+            carried = {key: result.get(key, value) for key, value in carried.items()}
+            previous_chunk = chunk.text
+        
+        if chunk is None:
+            return {'no_more_chunks': True}
+        
+        return {
+            **carried,
+            'previous_chunk': previous_chunk,
+            'current_chunk': chunk.text,
+            'current_chunk_index': chunk.index,
+            'current_chapter_id': chunk.chapter_id,
+            'no_more_chunks': True
+        }
+    
+    return chunk_loop
+
     
 
 def summarizer(state: State):
@@ -279,7 +474,121 @@ def summarizer(state: State):
         "text": context,
         "names": str(state['last_appearing_characters'])
     }
-    chain = summary_prompt | summary_llm
+    chain = get_chain('summary')
     response = chain.invoke(chain_input)
     
-    return {'last_summary': response.summary}
\ No newline at end of file
+    return {'last_summary': response.summary}
+
+def fused_summarizer(state: State):
+    """
+    Node that summarizes the text based on the profiles and extracts the characters of the summary
+    in the same call, replacing the summarizer and second_name_querier pair.
+    """
+    third_of_length_of_last_summary = len(state['last_summary'])//3
+    context = str(state['last_summary'][2 * third_of_length_of_last_summary:]) + " " + str(state['current_chunk'])
+    chain_input = {
+        "text": context,
+        "names": str(state['last_appearing_characters'])
+    }
+    chain = get_chain('fused_summary')
+    response = chain.invoke(chain_input)
+    
+    return {
+        'last_summary': response.summary,
+        'last_appearing_characters': response.characters
+    }
+
+def slim_preprocessor(state: SlimState):
+    """
+    Node of the slim graph that runs the whole preprocessing into the preprocessing cache.
+    Only references to the results (content hash, chunk store directory, chunk count) go
+    into the state, never the text itself.
+    """
+    file_path = state['file_path']
+    if not file_path or not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    cache = _get_preprocessing_cache()
+    if cache is None:
+        raise ValueError("The slim state mode needs the preprocessing cache (preprocessing_config['cache_dir'])")
+    
+    params = preprocessing_params(preprocessing_config)
+    result = preprocess_book(file_path, cache, params)
+    
+    if not result['is_arabic']:
+        return {
+            'is_arabic': False,
+            'content_hash': result['content_hash']
+        }
+    
+    chunk_store = str(cache.artifact_path(result['content_hash'], 'chunks', params))
+    _index_mentions(result['content_hash'], _open_chunk_store(chunk_store))
+    
+    return {
+        'is_arabic': True,
+        'content_hash': result['content_hash'],
+        'chunk_store': chunk_store,
+        'chunk_count': result['chunk_count']
+    }
+
+
+def _chunk_texts(state: SlimState) -> dict:
+    """Resolve the current and previous chunk of a slim state from its chunk store."""
+    chunks = _open_chunk_store(state['chunk_store'])
+    index = state['current_chunk_index']
+    
+    return {
+        'current_chunk': chunks[index].text,
+        'previous_chunk': chunks[index - 1].text if index > 0 else ''
+    }
+
+
+def slim_chunk_updater(state: SlimState):
+    """
+    Node of the slim graph that advances to the next chunk by index.
+    """
+    index = state['current_chunk_index'] + 1
+    if index >= state['chunk_count']:
+        return {'no_more_chunks': True}
+    
+    return {
+        'current_chunk_index': index,
+        'current_chapter_id': _open_chunk_store(state['chunk_store']).chapter_id(index),
+        'no_more_chunks': False
+    }
+
+
+def slim_first_name_querier(state: SlimState):
+    """
+    Node of the slim graph that queries the names in the current chunk, read from the chunk store.
+    """
+    return first_name_querier({**state, **_chunk_texts(state)})
+
+
+def slim_summarizer(state: SlimState):
+    """
+    Node of the slim graph that summarizes the current chunk, read from the chunk store.
+    """
+    return summarizer({**state, **_chunk_texts(state)})
+
+
+def slim_fused_summarizer(state: SlimState):
+    """
+    Node of the slim graph that summarizes the current chunk, read from the chunk store,
+    and extracts the characters of the summary in the same call.
+    """
+    return fused_summarizer({**state, **_chunk_texts(state)})
+
+
+def slim_profile_retriever_creator(state: SlimState):
+    """
+    Node of the slim graph that creates or retrieves the profiles, in the database at the state's database_path.
+    """
+    return profile_retriever_creator(state)
+
+
+def slim_profile_refresher(state: SlimState):
+    """
+    Node of the slim graph that refreshes the profiles, in the database at the state's database_path.
+    """
+    return profile_refresher(state)
@@ -1,15 +1,28 @@
-from src.schemas.states import State
+from src.schemas.states import SlimState, State
 
 def router_from_language_checker_to_cleaner_or_end(state : State):
     """
      Node that routes to the cleaner or end based on the response from the language checker.
+     When the chunks of the file are already cached, cleaning and metadata removal are skipped.
     """
     if state["is_arabic"]:
+        if state.get("chunks_cached"):
+            return "chunker"
         return "cleaner"
     else:
         return "END"
     
     
+def router_from_slim_preprocessor_to_chunk_updater_or_end(state: SlimState):
+    """
+    Node that routes to the chunk updater or end based on the language check of the slim preprocessor.
+    """
+    if state["is_arabic"]:
+        return "chunk_updater"
+    else:
+        return "END"
+    
+    
 def router_from_chunker_to_first_name_querier_or_end(state: State):
     """
     Node that routes to the name querier or end based on the response from the chunker.
@@ -0,0 +1,231 @@
+"""
+Pipelined execution of the per-chunk analysis.
+
+Only the profile stage has to see the chunks strictly in order, one at a time. This runner
+splits the per-chunk work into three stages connected by bounded queues:
+
+1. name extraction (first_name_querier) runs ahead on a thread pool, since it only needs
+   the chunk and its predecessor;
+2. summarization (summarizer + second_name_querier, or the fused summarizer) runs serially
+   in chunk order, since each summary continues the previous one, but ahead of the profile stage;
+3. profile retrieval and refresh (profile_retriever_creator + profile_refresher) stay
+   serial and ordered on the calling thread.
+
+Throughput then approaches that of the slowest stage instead of the sum of all stages.
+"""
+
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from src.databases.database import CharacterDatabase
+from src.graphs.nodes.regular_nodes import (
+    chunker,
+    cleaner,
+    first_name_querier,
+    fused_summarizer,
+    language_checker,
+    metadata_remover,
+    profile_refresher,
+    profile_retriever_creator,
+    second_name_querier,
+    summarizer,
+)
+from src.schemas.data_classes import TextChunk
+
+
+_END = object()
+
+
+class _StageFailure:
+    """Carries an exception raised in a stage thread to the calling thread."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class PipelinedRunner:
+    """
+    Runs the analysis of a book as a pipeline of bounded, overlapping stages.
+    """
+
+    def __init__(self, name_workers: int = 4, lookahead: int = 8,
+                 progress: Optional[Callable[[TextChunk, int], None]] = None, fused: bool = False):
+        """
+        Initialize the pipelined runner.
+
+        Args:
+            name_workers: Number of concurrent name extraction calls
+            lookahead: Maximum number of chunks a stage may run ahead of the next one
+            progress: Called with (chunk, number of characters) after a chunk's profiles are refreshed
+            fused: Extract the summary's characters in the summary call instead of a second name query
+        """
+        self.name_workers = name_workers
+        self.lookahead = lookahead
+        self.progress = progress
+        self.fused = fused
+
+    def run(self, file_path: str, database: Optional[CharacterDatabase] = None) -> Dict[str, Any]:
+        """
+        Analyze one book.
+
+        Args:
+            file_path: Path of the book's .txt file
+            database: Character database of the run; defaults to the global one
+
+        Returns:
+            Dictionary with the number of chunks, the last summary and the last refreshed profiles
+        """
+        state = {'file_path': file_path, 'database': database}
+
+        state.update(language_checker(state))
+        if not state['is_arabic']:
+            return {'is_arabic': False, 'chunks': 0, 'last_summary': '', 'last_profiles': None}
+
+        if not state.get('chunks_cached'):
+            state.update(cleaner(state))
+            state.update(metadata_remover(state))
+        state.update(chunker(state))
+
+        book_id = state['content_hash']
+        result = self.run_chunks(state['chunk_generator'], database, book_id)
+        result['is_arabic'] = True
+        return result
+
+    def run_chunks(self, chunks: Iterable[TextChunk], database: Optional[CharacterDatabase] = None,
+                   book_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run the per-chunk analysis over already prepared chunks.
+
+        Args:
+            chunks: The chunks of the book, in order
+            database: Character database of the run; defaults to the global one
+            book_id: Id of the book, e.g. its content hash, under which its co-occurrences are counted;
+                defaults to a new id, so the chunks of two runs are never taken for each other
+
+        Returns:
+            Dictionary with the number of chunks, the last summary and the last refreshed profiles
+        """
+        book_id = book_id or uuid.uuid4().hex
+        stop = threading.Event()
+        named = queue.Queue(maxsize=self.lookahead)
+        summarized = queue.Queue(maxsize=self.lookahead)
+
+        with ThreadPoolExecutor(max_workers=self.name_workers) as executor:
+            threads = [
+                threading.Thread(target=self._guard, args=(self._extract_names, named, stop, chunks, executor, named, stop), daemon=True),
+                threading.Thread(target=self._guard, args=(self._summarize, summarized, stop, named, summarized, stop), daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+
+            try:
+                result = self._refresh_profiles(summarized, database, book_id)
+            finally:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+
+        return result
+
+    def _extract_names(self, chunks: Iterable[TextChunk], executor: ThreadPoolExecutor,
+                       output: queue.Queue, stop: threading.Event):
+        """Stage 1: submit name extraction for every chunk, keeping at most `lookahead` chunks in flight."""
+        previous_text = ''
+        for chunk in chunks:
+            future = executor.submit(first_name_querier, {'previous_chunk': previous_text, 'current_chunk': chunk.text})
+            if not self._put(output, (chunk, future), stop):
+                future.cancel()
+                return
+            previous_text = chunk.text
+        self._put(output, _END, stop)
+
+    def _summarize(self, named: queue.Queue, output: queue.Queue, stop: threading.Event):
+        """Stage 2: summarize chunks with characters in order and re-extract names from the summaries."""
+        last_summary = ''
+        while True:
+            item = self._get(named, stop)
+            if item is _END or item is None:
+                self._put(output, _END, stop)
+                return
+            if isinstance(item, _StageFailure):
+                self._put(output, item, stop)
+                return
+
+            chunk, future = item
+            characters = future.result()['last_appearing_characters']
+
+            summary_characters = []
+            if characters:
+                summary_state = {
+                    'last_summary': last_summary,
+                    'current_chunk': chunk.text,
+                    'last_appearing_characters': characters,
+                }
+                if self.fused:
+                    result = fused_summarizer(summary_state)
+                    last_summary, summary_characters = result['last_summary'], result['last_appearing_characters']
+                else:
+                    last_summary = summarizer(summary_state)['last_summary']
+                    summary_characters = second_name_querier({'last_summary': last_summary})['last_appearing_characters']
+
+            if not self._put(output, (chunk, last_summary, summary_characters), stop):
+                return
+
+    def _refresh_profiles(self, summarized: queue.Queue, database: Optional[CharacterDatabase],
+                          book_id: str) -> Dict[str, Any]:
+        """Stage 3: retrieve and refresh the profiles of every chunk, serially and in order."""
+        chunk_count = 0
+        last_summary = ''
+        last_profiles = None
+
+        while True:
+            item = summarized.get()
+            if item is _END:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.error
+
+            chunk, last_summary, characters = item
+            chunk_count += 1
+
+            if characters:
+                state = {'last_appearing_characters': characters, 'last_summary': last_summary, 'database': database,
+                         'content_hash': book_id, 'current_chunk_index': chunk.index}
+                state.update(profile_retriever_creator(state))
+                last_profiles = profile_refresher(state)['last_profiles']
+
+            if self.progress:
+                self.progress(chunk, len(characters))
+
+        return {'chunks': chunk_count, 'last_summary': last_summary, 'last_profiles': last_profiles}
+
+    def _guard(self, stage: Callable, output: queue.Queue, stop: threading.Event, *args):
+        """Run a stage, forwarding any exception downstream instead of losing it in the thread."""
+        try:
+            stage(*args)
+        except BaseException as e:
+            self._put(output, _StageFailure(e), stop)
+
+    @staticmethod
+    def _put(output: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """Put an item, blocking while the queue is full; returns False if the pipeline was stopped."""
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source: queue.Queue, stop: threading.Event) -> Any:
+        """Get an item, blocking while the queue is empty; returns None if the pipeline was stopped."""
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
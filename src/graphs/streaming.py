@@ -0,0 +1,175 @@
+"""
+Incremental results of the analysis graph as a stream of per-chunk events.
+
+The graph is run with stream_mode='updates' and every node update is translated into
+events that are handed to one or more sinks as soon as they happen:
+
+- chunk: a new chunk is being processed (index, chapter)
+- characters: the characters found in the chunk
+- summary: the rolling summary after the chunk
+- new_character: a character seen for the first time in this run
+- profile_patch: the profile fields changed by the profile refresh
+- done: the end of the book
+
+The graph's stream is a pull-based generator, so a sink that blocks (e.g. a full bounded
+queue) pauses the analysis until the consumer catches up: backpressure needs no extra
+buffering. Works with the flat graph and the slim graph, whose node names are the same;
+the chunked graph runs every chunk inside its chunk_loop node and only reports the end.
+
+Usage:
+    python -m src.main book.txt --stream resources/results/book.jsonl
+"""
+
+import json
+import queue
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class JsonlSink:
+    """
+    Appends every event as one JSON line to a file, flushed immediately so readers can tail it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the JSONL file.
+
+        Args:
+            path: File receiving the events; its parent directories are created
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def put(self, event: Dict[str, Any]):
+        self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class QueueSink:
+    """
+    Hands every event to a bounded queue consumed by another thread; None marks the end.
+    """
+
+    def __init__(self, output: queue.Queue, timeout: Optional[float] = None):
+        """
+        Initialize the queue sink.
+
+        Args:
+            output: Queue the events are put into; a maxsize bounds how far the analysis runs ahead
+            timeout: Seconds to wait for room in the queue before raising queue.Full; None waits forever
+        """
+        self.output = output
+        self.timeout = timeout
+
+    def put(self, event: Dict[str, Any]):
+        self.output.put(event, timeout=self.timeout)
+
+    def close(self):
+        self.output.put(None, timeout=self.timeout)
+
+
+def _to_json(value: Any) -> Any:
+    """Convert dataclasses and pydantic models of the state into JSON-compatible values."""
+    if is_dataclass(value):
+        return asdict(value)
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    return value
+
+
+class EventTranslator:
+    """
+    Turns the node updates of one run into events, remembering what was already reported.
+    """
+
+    def __init__(self):
+        self.chunk_index: Optional[int] = None
+        self.chunks = 0
+        self._known_characters = set()
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+
+    def translate(self, node: str, update: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return the events of one node update."""
+        if not update:
+            return []
+
+        if node == 'chunk_updater':
+            if update.get('no_more_chunks'):
+                return []
+            self.chunks += 1
+            self.chunk_index = update.get('current_chunk_index', self.chunks - 1)
+            return [self._event('chunk', chapter_id=update.get('current_chapter_id'))]
+
+        events = []
+        # Set by the name queriers, and by the summarizer in fused mode
+        if 'last_appearing_characters' in update:
+            characters = _to_json(update.get('last_appearing_characters') or [])
+            events.append(self._event('characters', source=node, characters=characters))
+
+        if node == 'summarizer':
+            events.append(self._event('summary', summary=update['last_summary']))
+
+        if node == 'profile_retriever_creator':
+            for profile in _to_json(update.get('last_profiles') or []):
+                key = profile['id'] or profile['name']
+                if profile['name'] not in self._known_characters:
+                    self._known_characters.add(profile['name'])
+                    events.append(self._event('new_character', name=profile['name'], hint=profile['hint']))
+                self._profiles.setdefault(key, profile)
+
+        if node == 'profile_refresher':
+            for profile in _to_json(update.get('last_profiles') or []):
+                key = profile['id'] or profile['name']
+                previous = self._profiles.get(key, {})
+                patch = {field: value for field, value in profile.items() if previous.get(field) != value}
+                self._profiles[key] = profile
+                if patch:
+                    events.append(self._event('profile_patch', id=profile['id'], name=profile['name'], patch=patch))
+
+        return events
+
+    def _event(self, kind: str, **fields) -> Dict[str, Any]:
+        return {'event': kind, 'chunk_index': self.chunk_index, **fields}
+
+
+def stream_events(graph, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run a graph and yield its events as they happen, ending with a 'done' event.
+
+    Args:
+        graph: Compiled flat or slim analysis graph
+        state: Initial state of the run
+        config: Run config of the graph
+    """
+    translator = EventTranslator()
+    for update in graph.stream(state, config=config, stream_mode='updates'):
+        for node, node_update in update.items():
+            yield from translator.translate(node, node_update)
+
+    yield {'event': 'done', 'chunk_index': translator.chunk_index, 'chunks': translator.chunks}
+
+
+def run_streaming(graph, state: Dict[str, Any], sinks: List[Any], config: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Run a graph and hand every event to all the sinks, closing them at the end.
+
+    Returns:
+        The number of events emitted
+    """
+    count = 0
+    try:
+        for event in stream_events(graph, state, config):
+            for sink in sinks:
+                sink.put(event)
+            count += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return count
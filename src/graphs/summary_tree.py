@@ -0,0 +1,182 @@
+"""
+Hierarchical summarization of a whole book.
+
+Instead of the serial rolling summary of the analysis graph, every chunk is summarized
+independently and in parallel; the chunk summaries are then merged, `fan_in` at a time,
+level by level, into one summary per chapter and finally into one summary of the book.
+All the merges of a level run in parallel, so the wall-clock time grows with the depth
+of the tree (logarithmic in the number of chunks) instead of the number of chunks.
+Every node of the tree is persisted in a SummaryStore.
+
+Usage:
+    python -m src.graphs.summary_tree resources/texts/book.txt --fan-in 4 --workers 8
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from src.configs import summary_tree_config
+from src.databases.summary_store import SummaryStore
+from src.graphs.nodes.regular_nodes import chunker, cleaner, language_checker, metadata_remover
+from src.language_models.chains import get_chain
+from src.schemas.data_classes import SummaryNode, TextChunk
+
+
+class SummaryTree:
+    """
+    Builds the summary tree of a book with parallel chunk summaries and tree reductions.
+    """
+
+    def __init__(self, fan_in: int = summary_tree_config['fan_in'],
+                 max_workers: int = summary_tree_config['max_workers'],
+                 store: Optional[SummaryStore] = None):
+        """
+        Initialize the summary tree.
+
+        Args:
+            fan_in: Number of summaries merged into one at every level (at least 2)
+            max_workers: Maximum number of concurrent summary calls
+            store: Store receiving every node of the tree; nothing is persisted if omitted
+        """
+        if fan_in < 2:
+            raise ValueError(f"fan_in must be at least 2, got {fan_in}")
+
+        self.fan_in = fan_in
+        self.max_workers = max_workers
+        self.store = store
+
+    def summarize_book(self, file_path: str) -> Optional[SummaryNode]:
+        """
+        Preprocess a book and build its summary tree.
+
+        Args:
+            file_path: Path of the book's .txt file
+
+        Returns:
+            The book summary node, or None if the book is not in Arabic or has no chunks
+        """
+        state = {'file_path': file_path}
+
+        state.update(language_checker(state))
+        if not state['is_arabic']:
+            return None
+
+        if not state.get('chunks_cached'):
+            state.update(cleaner(state))
+            state.update(metadata_remover(state))
+        state.update(chunker(state))
+
+        book_id = state['content_hash']
+        return self.summarize_chunks(state['chunk_generator'], book_id)
+
+    def summarize_chunks(self, chunks: Iterable[TextChunk], book_id: str = '') -> Optional[SummaryNode]:
+        """
+        Build the summary tree over already prepared chunks.
+
+        Args:
+            chunks: The chunks of the book, in order
+            book_id: Id under which the nodes are persisted
+
+        Returns:
+            The book summary node, or None if there are no chunks
+        """
+        chunks = list(chunks)
+        if not chunks:
+            return None
+
+        nodes: List[SummaryNode] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            leaves = list(executor.map(self._summarize_chunk, chunks))
+            nodes.extend(leaves)
+
+            chapters: Dict[Optional[int], List[SummaryNode]] = {}
+            for leaf in leaves:
+                chapters.setdefault(leaf.chapter_id, []).append(leaf)
+
+            if len(chapters) > 1 or None not in chapters:
+                roots = self._reduce(list(chapters.values()), nodes, executor)
+                for position, root in enumerate(roots):
+                    nodes.append(self._promote(root, 'chapter', position))
+            else:
+                roots = leaves
+
+            [book] = self._reduce([roots], nodes, executor)
+            book = self._promote(book, 'book', 0)
+            nodes.append(book)
+
+        if self.store:
+            self.store.save_summaries(book_id, nodes)
+        return book
+
+    def _summarize_chunk(self, chunk: TextChunk) -> SummaryNode:
+        """Summarize one chunk on its own (level 0)."""
+        response = get_chain('summary').invoke({'names': '[]', 'text': chunk.text})
+        return SummaryNode(summary=response.summary, scope='chunk', level=0, position=chunk.index,
+                           first_chunk=chunk.index, last_chunk=chunk.index, chapter_id=chunk.chapter_id)
+
+    def _reduce(self, groups: List[List[SummaryNode]], nodes: List[SummaryNode],
+                executor: ThreadPoolExecutor) -> List[SummaryNode]:
+        """
+        Merge every group of nodes down to a single node, level by level.
+        The merges of all the groups at the same level run in parallel.
+
+        Returns:
+            The root node of every group, in group order
+        """
+        level = max(node.level for group in groups for node in group)
+
+        while any(len(group) > 1 for group in groups):
+            level += 1
+            batches = []  # (group index, nodes merged into one)
+            for index, group in enumerate(groups):
+                batches.extend((index, group[start:start + self.fan_in]) for start in range(0, len(group), self.fan_in))
+
+            merged = list(executor.map(self._merge, [batch for _, batch in batches],
+                                       [level] * len(batches), range(len(batches))))
+
+            groups = [[] for _ in groups]
+            for (index, batch), node in zip(batches, merged):
+                groups[index].append(node)
+                if len(batch) > 1:
+                    nodes.append(node)
+
+        return [group[0] for group in groups]
+
+    def _merge(self, batch: List[SummaryNode], level: int, position: int) -> SummaryNode:
+        """Merge consecutive summaries into one node; a single summary is carried up unchanged."""
+        if len(batch) == 1:
+            return batch[0]
+
+        summaries = "\n".join(f"{number}. {node.summary}" for number, node in enumerate(batch, start=1))
+        response = get_chain('summary_merge').invoke({'summaries': summaries})
+
+        chapter_ids = {node.chapter_id for node in batch}
+        return SummaryNode(summary=response.summary, scope='partial', level=level, position=position,
+                           first_chunk=batch[0].first_chunk, last_chunk=batch[-1].last_chunk,
+                           chapter_id=chapter_ids.pop() if len(chapter_ids) == 1 else None)
+
+    @staticmethod
+    def _promote(node: SummaryNode, scope: str, position: int) -> SummaryNode:
+        """Return a copy of a root node recorded under a chapter or book scope."""
+        return SummaryNode(summary=node.summary, scope=scope, level=node.level, position=position,
+                           first_chunk=node.first_chunk, last_chunk=node.last_chunk,
+                           chapter_id=node.chapter_id if scope == 'chapter' else None)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Summarize a whole book with a parallel summary tree.")
+    parser.add_argument('file_path', help="Path of the book's .txt file")
+    parser.add_argument('--fan-in', type=int, default=summary_tree_config['fan_in'])
+    parser.add_argument('--workers', type=int, default=summary_tree_config['max_workers'])
+    parser.add_argument('--db-path', default=summary_tree_config['db_path'])
+    args = parser.parse_args()
+
+    tree = SummaryTree(fan_in=args.fan_in, max_workers=args.workers, store=SummaryStore(args.db_path))
+    book = tree.summarize_book(args.file_path)
+    print(book.summary if book else "(✗) The book is not in Arabic or has no content")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-book batch runner, using a stand-in graph instead of the LLM graph.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.graphs.batch_runner import BatchRunner
+
+
+class FlakyGraph:
+    """Emits two chunk updates per book and fails the first attempt of books named 'flaky'."""
+    
+    def __init__(self):
+        self.attempts = {}
+    
+    def stream(self, state, config=None, stream_mode=None):
+        file_path = state['file_path']
+        self.attempts[file_path] = self.attempts.get(file_path, 0) + 1
+        
+        state['database'].insert_character(Path(file_path).stem, {'hint': ''})
+        for _ in range(2):
+            yield {'chunk_updater': {'no_more_chunks': False}}
+        
+        if 'flaky' in file_path and self.attempts[file_path] == 1:
+            raise RuntimeError("quota exceeded")
+        yield {'chunk_updater': {'no_more_chunks': True}}
+
+
+def test_batch_runner_isolates_books_and_retries_failures():
+    """Every book gets its own database and result file, failed books are retried."""
+    with tempfile.TemporaryDirectory() as directory:
+        graph = FlakyGraph()
+        events = []
+        runner = BatchRunner(graph=graph, output_dir=directory, max_concurrent_books=2,
+                             max_retries=1, retry_delay=0.01,
+                             progress=lambda book_id, message: events.append((book_id, message)))
+        
+        results = runner.run(["books/a.txt", "books/flaky.txt", "other/a.txt"])
+        
+        assert [result.book_id for result in results] == ["a", "flaky", "a-2"]
+        assert [result.status for result in results] == ["completed"] * 3
+        assert [result.attempts for result in results] == [1, 2, 1]
+        assert all(result.chunks == 2 and result.characters == 1 for result in results)
+        assert json.loads((Path(directory) / "flaky.json").read_text())['attempts'] == 2
+        assert any("retry 1/1" in message for book_id, message in events if book_id == "flaky")
+
+
+def test_batch_runner_gives_up_after_max_retries():
+    """A book failing on every attempt is reported as failed once its retries are exhausted."""
+    class BrokenGraph:
+        def stream(self, state, config=None, stream_mode=None):
+            raise RuntimeError("broken book")
+            yield
+    
+    with tempfile.TemporaryDirectory() as directory:
+        runner = BatchRunner(graph=BrokenGraph(), output_dir=directory, max_retries=2,
+                             retry_delay=0.01, progress=lambda book_id, message: None)
+        
+        [result] = runner.run(["broken.txt"])
+        
+        assert result.status == "failed"
+        assert result.attempts == 3
+        assert "broken book" in result.error
+
+
+if __name__ == "__main__":
+    test_batch_runner_isolates_books_and_retries_failures()
+    test_batch_runner_gives_up_after_max_retries()
+    print("✓ All batch runner tests passed")
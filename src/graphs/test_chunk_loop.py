@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the chunk loop node that runs the per-chunk subgraph.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.graphs.nodes.regular_nodes import make_chunk_loop
+from src.schemas.data_classes import TextChunk
+
+
+class RecordingChunkGraph:
+    """Stand-in for the compiled chunk subgraph that appends every chunk to the summary."""
+    
+    def __init__(self):
+        self.inputs = []
+    
+    def invoke(self, state):
+        self.inputs.append(state)
+        return {**state, 'last_summary': (state['last_summary'] + " " + state['current_chunk']).strip(),
+                'last_profiles': [state['current_chunk_index']]}
+
+
+def make_chunks(count):
+    return iter([TextChunk(text=f"مقطع {index}", index=index, chapter_id=index // 2) for index in range(count)])
+
+
+def test_chunk_loop_carries_state_between_chunks():
+    """Every chunk sees its predecessor and the summary of all previous chunks."""
+    chunk_graph = RecordingChunkGraph()
+    chunk_loop = make_chunk_loop(chunk_graph)
+    
+    result = chunk_loop({'chunk_generator': make_chunks(4), 'last_summary': '', 'current_chunk': '', 'database': None})
+    
+    assert [state['previous_chunk'] for state in chunk_graph.inputs] == ['', "مقطع 0", "مقطع 1", "مقطع 2"]
+    assert chunk_graph.inputs[2]['last_summary'] == "مقطع 0 مقطع 1"
+    assert chunk_graph.inputs[3]['current_chapter_id'] == 1
+    assert result['last_summary'] == "مقطع 0 مقطع 1 مقطع 2 مقطع 3"
+    assert result['last_profiles'] == [3]
+    assert result['current_chunk_index'] == 3
+    assert result['no_more_chunks']
+
+
+def test_chunk_loop_without_chunks():
+    """An empty book finishes without invoking the subgraph."""
+    chunk_graph = RecordingChunkGraph()
+    
+    result = make_chunk_loop(chunk_graph)({'chunk_generator': make_chunks(0), 'last_summary': ''})
+    
+    assert result == {'no_more_chunks': True}
+    assert chunk_graph.inputs == []
+
+
+if __name__ == "__main__":
+    test_chunk_loop_carries_state_between_chunks()
+    test_chunk_loop_without_chunks()
+    print("All chunk loop tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the fused summary mode, counting the calls of every chain.
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.databases.database import CharacterDatabase
+from src.graphs.graph_builders import build_chunk_graph
+from src.language_models.chains import chain_registry
+from src.language_models.fakes import fake_chains, fake_fused_summary_llm
+from src.language_models.prompts import fused_summary_prompt
+from src.schemas.output_structures import Character
+
+
+@pytest.fixture
+def chain_calls():
+    """Install fake chains that count their calls; the fused summary mentions a second character."""
+    calls = Counter()
+    chains = fake_chains()
+    chains['fused_summary'] = fused_summary_prompt | fake_fused_summary_llm(
+        characters=[Character(name="سليم", hint=""), Character(name="ليلى", hint="")])
+    
+    for name, chain in chains.items():
+        def counted(chain_input, name=name, chain=chain):
+            calls[name] += 1
+            return chain.invoke(chain_input)
+        chain_registry.override(name, RunnableLambda(counted))
+    
+    yield calls
+    chain_registry.reset()
+
+
+def run_chunk(tmp_path, fused):
+    database = CharacterDatabase(str(tmp_path / f'characters-{fused}.sqlite'))
+    build_chunk_graph(fused=fused).compile().invoke({
+        'previous_chunk': '',
+        'current_chunk': "خرج سليم من البيت في الصباح الباكر.",
+        'last_summary': '',
+        'last_profiles': None,
+        'last_appearing_characters': None,
+        'database': database,
+    })
+    return database
+
+
+def test_fused_mode_saves_one_call_per_chunk(chain_calls, tmp_path):
+    """Without fusion a chunk with characters costs four calls, with fusion three."""
+    run_chunk(tmp_path, fused=False)
+    assert chain_calls == Counter(name_query=2, summary=1, profile_update=1)
+    
+    chain_calls.clear()
+    database = run_chunk(tmp_path, fused=True)
+    assert chain_calls == Counter(name_query=1, fused_summary=1, profile_update=1)
+    
+    # The characters of the fused output are the ones whose profiles are created
+    assert database.find_characters_by_name("ليلى")
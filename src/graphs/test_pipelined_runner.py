@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the pipelined runner, with the LLM nodes replaced by stand-ins.
+"""
+
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+
+from src.graphs import pipelined_runner
+from src.graphs.pipelined_runner import PipelinedRunner
+from src.schemas.data_classes import LastAppearingCharacter, TextChunk
+
+
+def install_fake_nodes(monkeypatch, refreshed, active_name_calls):
+    """Replace the LLM nodes with quick stand-ins that record what they were called with."""
+    lock = threading.Lock()
+    
+    def first_name_querier(state):
+        with lock:
+            active_name_calls.append(len(active_name_calls))
+        time.sleep(random.uniform(0, 0.01))
+        index = int(state['current_chunk'].split()[-1])
+        characters = [] if index % 3 == 2 else [LastAppearingCharacter(name=f"شخصيه {index}", hint='')]
+        return {'last_appearing_characters': characters}
+    
+    def summarizer(state):
+        return {'last_summary': (state['last_summary'] + " " + state['current_chunk']).strip()}
+    
+    def second_name_querier(state):
+        return {'last_appearing_characters': [LastAppearingCharacter(name=state['last_summary'].split()[-1], hint='')]}
+    
+    def profile_retriever_creator(state):
+        return {'last_profiles': [character.name for character in state['last_appearing_characters']]}
+    
+    def profile_refresher(state):
+        refreshed.append((state['last_profiles'], state['last_summary']))
+        return {'last_profiles': state['last_profiles']}
+    
+    for function in (first_name_querier, summarizer, second_name_querier, profile_retriever_creator, profile_refresher):
+        monkeypatch.setattr(pipelined_runner, function.__name__, function)
+
+
+def make_chunks(count):
+    return [TextChunk(text=f"مقطع {index}", index=index, chapter_id=None) for index in range(count)]
+
+
+def test_profile_stage_stays_ordered(monkeypatch):
+    """Profiles are refreshed in chunk order with the summary that includes the current chunk."""
+    refreshed, active_name_calls = [], []
+    install_fake_nodes(monkeypatch, refreshed, active_name_calls)
+    
+    result = PipelinedRunner(name_workers=4, lookahead=3).run_chunks(make_chunks(12))
+    
+    expected_indices = [index for index in range(12) if index % 3 != 2]
+    assert result['chunks'] == 12
+    assert [profiles for profiles, _ in refreshed] == [[str(index)] for index in expected_indices]
+    for (_, summary), index in zip(refreshed, expected_indices):
+        assert summary.endswith(f"مقطع {index}")
+    assert len(active_name_calls) == 12
+
+
+def test_stage_failure_is_raised(monkeypatch):
+    """An exception in a background stage surfaces on the calling thread."""
+    refreshed, active_name_calls = [], []
+    install_fake_nodes(monkeypatch, refreshed, active_name_calls)
+    
+    def failing_summarizer(state):
+        raise RuntimeError("summary failed")
+    monkeypatch.setattr(pipelined_runner, 'summarizer', failing_summarizer)
+    
+    with pytest.raises(RuntimeError, match="summary failed"):
+        PipelinedRunner(name_workers=2, lookahead=2).run_chunks(make_chunks(20))
+
+
+def test_profile_stage_knows_the_chunk(monkeypatch):
+    """The profile stage gets the book id and the chunk index, to count the co-occurrences once per chunk."""
+    refreshed, active_name_calls = [], []
+    install_fake_nodes(monkeypatch, refreshed, active_name_calls)
+    seen = []
+    monkeypatch.setattr(pipelined_runner, 'profile_retriever_creator',
+                        lambda state: seen.append((state['content_hash'], state['current_chunk_index'])) or {'last_profiles': []})
+    
+    PipelinedRunner(name_workers=2, lookahead=2).run_chunks(make_chunks(4), book_id='book')
+    
+    assert seen == [('book', 0), ('book', 1), ('book', 3)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
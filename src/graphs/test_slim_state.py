@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the slim graph state, with the chat models replaced by fakes.
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.configs import preprocessing_config
+from src.databases.database import CharacterDatabase
+from src.graphs.graph_builders import build_slim_graph
+from src.graphs.nodes import regular_nodes
+from src.language_models.chains import chain_registry
+from src.language_models.fakes import install_fake_chains
+from src.schemas.states import initial_slim_state
+
+
+SENTENCE = "خرج سليم من البيت في الصباح الباكر ومشى نحو السوق القديم حيث كان ينتظره صديقه. "
+
+
+@pytest.fixture
+def slim_setup(monkeypatch, tmp_path):
+    """Fake chat models and a temporary preprocessing cache with small chunks."""
+    monkeypatch.setitem(preprocessing_config, 'cache_dir', str(tmp_path / 'cache'))
+    monkeypatch.setitem(preprocessing_config, 'chunk_size', 500)
+    monkeypatch.setitem(preprocessing_config, 'chunk_overlap', 0)
+    regular_nodes._get_preprocessing_cache.cache_clear()
+    install_fake_chains()
+    yield tmp_path
+    chain_registry.reset()
+    regular_nodes._get_preprocessing_cache.cache_clear()
+
+
+def run_slim_graph(directory, repeats):
+    """Run the slim graph with a checkpointer over a synthetic book; return the largest state and the final state."""
+    book = directory / f'book-{repeats}.txt'
+    book.write_text(SENTENCE * repeats, encoding='utf-8')
+    
+    graph = build_slim_graph().compile(checkpointer=InMemorySaver())
+    config = {'configurable': {'thread_id': repeats}, 'recursion_limit': 10000}
+    state = {**initial_slim_state, 'file_path': str(book), 'database_path': str(directory / 'characters.sqlite')}
+    
+    largest = 0
+    for values in graph.stream(state, config=config, stream_mode='values'):
+        largest = max(largest, len(pickle.dumps(values)))
+    return largest, values
+
+
+def test_state_size_does_not_grow_with_book(slim_setup):
+    """Every step's state stays at a few KB, for a short and a twenty times longer book."""
+    short_size, short_state = run_slim_graph(slim_setup, 20)
+    long_size, long_state = run_slim_graph(slim_setup, 400)
+    
+    assert long_state['chunk_count'] > 10 * short_state['chunk_count']
+    assert long_state['current_chunk_index'] == long_state['chunk_count'] - 1
+    assert long_state['no_more_chunks']
+    assert long_size < 4096
+    assert long_size < short_size + 256
+
+
+def test_chunk_texts_resolve_from_store(slim_setup):
+    """The slim nodes read the current and previous chunk from the chunk store."""
+    _, state = run_slim_graph(slim_setup, 40)
+    
+    texts = regular_nodes._chunk_texts({**state, 'current_chunk_index': 1})
+    chunks = regular_nodes._open_chunk_store(state['chunk_store'])
+    
+    assert texts['current_chunk'] == chunks[1].text
+    assert texts['previous_chunk'] == chunks[0].text
+    assert regular_nodes._chunk_texts({**state, 'current_chunk_index': 0})['previous_chunk'] == ''
+
+
+def test_profiles_are_written_to_the_run_database(slim_setup):
+    """The profile nodes use the database at the state's database_path, not the global one."""
+    run_slim_graph(slim_setup, 40)
+    
+    assert CharacterDatabase(str(slim_setup / 'characters.sqlite')).get_character_count() > 0
+
+
+def test_non_arabic_book_ends_after_the_preprocessor(slim_setup):
+    book = slim_setup / 'english.txt'
+    book.write_text("The boy walked to the old market early in the morning. " * 20, encoding='utf-8')
+    state = {**initial_slim_state, 'file_path': str(book), 'database_path': str(slim_setup / 'characters.sqlite')}
+    
+    nodes = [node for update in build_slim_graph().compile().stream(state) for node in update]
+    
+    assert nodes == ['slim_preprocessor']
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the event streaming of the analysis graph, with fake chat models.
+"""
+
+import json
+import queue
+import sys
+import threading
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+
+from src.configs import preprocessing_config
+from src.databases.database import CharacterDatabase
+from src.graphs.graph_builders import compiled_graph
+from src.graphs.nodes import regular_nodes
+from src.graphs.streaming import JsonlSink, QueueSink, run_streaming
+from src.language_models.chains import chain_registry
+from src.language_models.fakes import install_fake_chains
+from src.schemas.states import initial_state
+
+
+SENTENCE = "خرج سليم من البيت في الصباح الباكر ومشى نحو السوق القديم حيث كان ينتظره صديقه. "
+
+
+@pytest.fixture
+def fake_run(monkeypatch, tmp_path):
+    """Fake chat models, a temporary cache with small chunks and a temporary database."""
+    monkeypatch.setitem(preprocessing_config, 'cache_dir', str(tmp_path / 'cache'))
+    monkeypatch.setitem(preprocessing_config, 'chunk_size', 500)
+    monkeypatch.setitem(preprocessing_config, 'chunk_overlap', 0)
+    regular_nodes._get_preprocessing_cache.cache_clear()
+    install_fake_chains()
+    
+    book = tmp_path / 'book.txt'
+    book.write_text(SENTENCE * 20, encoding='utf-8')
+    database = CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+    yield {**initial_state, 'file_path': str(book), 'database': database}
+    
+    chain_registry.reset()
+    regular_nodes._get_preprocessing_cache.cache_clear()
+
+
+def test_jsonl_events_per_chunk(fake_run, tmp_path):
+    """Every chunk emits its events; a character is new only once."""
+    path = tmp_path / 'events.jsonl'
+    
+    count = run_streaming(compiled_graph, fake_run, [JsonlSink(str(path))], config={'recursion_limit': 1000})
+    
+    events = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    kinds = [event['event'] for event in events]
+    chunks = kinds.count('chunk')
+    assert count == len(events)
+    assert chunks > 2
+    assert kinds.count('summary') == chunks
+    assert kinds.count('new_character') == 1
+    assert events[-1] == {'event': 'done', 'chunk_index': chunks - 1, 'chunks': chunks}
+    assert [event['chunk_index'] for event in events if event['event'] == 'summary'] == list(range(chunks))
+
+
+def test_full_queue_pauses_the_graph():
+    """With a bounded queue, the graph is not pulled further than the queue can hold."""
+    pulled = []
+    third_pulled = threading.Event()
+    
+    class CountingGraph:
+        def stream(self, state, config=None, stream_mode=None):
+            for index in range(20):
+                pulled.append(index)
+                if index == 2:
+                    third_pulled.set()
+                yield {'chunk_updater': {'current_chunk_index': index, 'no_more_chunks': False}}
+    
+    events = queue.Queue(maxsize=2)
+    runner = threading.Thread(target=run_streaming, args=(CountingGraph(), {}, [QueueSink(events)]))
+    runner.start()
+    assert third_pulled.wait(timeout=10)
+    
+    # Two events in the queue and one blocked in put: nothing more is pulled until the queue is read
+    assert events.full()
+    assert len(pulled) == 3
+    
+    received = []
+    while (event := events.get()) is not None:
+        received.append(event)
+    runner.join()
+    
+    assert len(received) == 21
+    assert received[-1]['event'] == 'done'
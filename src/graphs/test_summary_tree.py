@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the hierarchical summary tree, with stand-in summary chains.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.databases.summary_store import SummaryStore
+from src.graphs.summary_tree import SummaryTree
+from src.language_models.chains import chain_registry
+from src.schemas.data_classes import TextChunk
+from src.schemas.output_structures import Summary
+
+
+@pytest.fixture
+def merge_calls():
+    """Chunk summaries are the chunk texts, merges join their inputs with '+'."""
+    calls = {'merges': 0, 'active': 0, 'max_active': 0}
+    lock = threading.Lock()
+    
+    def merge(chain_input):
+        with lock:
+            calls['merges'] += 1
+            calls['active'] += 1
+            calls['max_active'] = max(calls['max_active'], calls['active'])
+        time.sleep(0.02)
+        with lock:
+            calls['active'] -= 1
+        lines = chain_input['summaries'].split("\n")
+        return Summary(summary="+".join(line.split(". ", 1)[1] for line in lines))
+    
+    chain_registry.override('summary', RunnableLambda(lambda chain_input: Summary(summary=chain_input['text'])))
+    chain_registry.override('summary_merge', RunnableLambda(merge))
+    yield calls
+    chain_registry.reset()
+
+
+def make_chunks(chapter_ids):
+    return [TextChunk(text=f"c{index}", index=index, chapter_id=chapter_id) for index, chapter_id in enumerate(chapter_ids)]
+
+
+def test_tree_reduce_without_chapters(merge_calls, tmp_path):
+    """Ten chunks with fan-in 3 take three levels and five merges, run in parallel."""
+    store = SummaryStore(str(tmp_path / 'summaries.sqlite'))
+    
+    book = SummaryTree(fan_in=3, max_workers=4, store=store).summarize_chunks(make_chunks([None] * 10), 'book')
+    
+    assert book.summary == "+".join(f"c{index}" for index in range(10))
+    assert (book.level, book.first_chunk, book.last_chunk) == (3, 0, 9)
+    assert merge_calls['merges'] == 5
+    assert merge_calls['max_active'] > 1
+    assert len(store.get_summaries('book', scope='chunk')) == 10
+    assert [node.first_chunk for node in store.get_summaries('book', level=1)] == [0, 3, 6]
+    assert store.get_book_summary('book') == book.summary
+
+
+def test_chapters_are_reduced_separately(merge_calls, tmp_path):
+    """Chapter summaries never mix chunks of different chapters and are persisted."""
+    store = SummaryStore(str(tmp_path / 'summaries.sqlite'))
+    
+    book = SummaryTree(fan_in=2, store=store).summarize_chunks(make_chunks([0, 0, 0, 1, 1, 2]), 'book')
+    
+    chapters = store.get_summaries('book', scope='chapter')
+    assert [node.summary for node in chapters] == ["c0+c1+c2", "c3+c4", "c5"]
+    assert [node.chapter_id for node in chapters] == [0, 1, 2]
+    assert book.summary == "c0+c1+c2+c3+c4+c5"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
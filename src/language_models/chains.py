@@ -0,0 +1,88 @@
+"""
+Registry of the chains used by the graph nodes.
+
+Each chain is built once, on first use, and then reused by every node invocation. Built
+chains hold no per-call state, so the same chain object can be invoked concurrently from
+threads and from async tasks. Tests and benchmarks can override a chain, e.g. with a fake
+model from src.language_models.fakes.
+"""
+
+import threading
+from typing import Callable, Dict, Optional
+
+from langchain_core.runnables import Runnable
+
+from src.language_models.prompts import (event_digest_prompt, fused_summary_prompt, name_query_prompt, profile_update_prompt,
+                                         summary_merge_prompt, summary_prompt)
+from src.language_models.routing import build_routed_chain
+
+
+# Every chain is routed over the model tiers of llm_routing_config
+CHAIN_BUILDERS: Dict[str, Callable[[], Runnable]] = {
+    'name_query': lambda: build_routed_chain('name_query', name_query_prompt),
+    'summary': lambda: build_routed_chain('summary', summary_prompt),
+    'fused_summary': lambda: build_routed_chain('fused_summary', fused_summary_prompt),
+    'summary_merge': lambda: build_routed_chain('summary_merge', summary_merge_prompt),
+    'profile_update': lambda: build_routed_chain('profile_update', profile_update_prompt),
+    'event_digest': lambda: build_routed_chain('event_digest', event_digest_prompt),
+}
+
+
+class ChainRegistry:
+    """
+    Thread-safe cache of built chains, keyed by name.
+    """
+
+    def __init__(self, builders: Dict[str, Callable[[], Runnable]]):
+        """
+        Initialize the registry.
+
+        Args:
+            builders: Function building each chain, by chain name
+        """
+        self._builders = dict(builders)
+        self._chains: Dict[str, Runnable] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Runnable:
+        """
+        Return the chain with the given name, building it on first use.
+
+        Raises:
+            KeyError: If no chain with this name is registered
+        """
+        chain = self._chains.get(name)
+        if chain is not None:
+            return chain
+
+        with self._lock:
+            chain = self._chains.get(name)
+            if chain is None:
+                if name not in self._builders:
+                    raise KeyError(f"Unknown chain: {name}")
+                chain = self._builders[name]()
+                self._chains[name] = chain
+        return chain
+
+    def override(self, name: str, chain: Runnable):
+        """Use the given chain instead of building it, e.g. a chain with a fake model."""
+        if name not in self._builders:
+            raise KeyError(f"Unknown chain: {name}")
+        with self._lock:
+            self._chains[name] = chain
+
+    def reset(self, name: Optional[str] = None):
+        """Drop the built or overridden chain with the given name, or all of them."""
+        with self._lock:
+            if name is None:
+                self._chains.clear()
+            else:
+                self._chains.pop(name, None)
+
+
+chain_registry = ChainRegistry(CHAIN_BUILDERS)
+
+
+def get_chain(name: str) -> Runnable:
+    """Return a chain (one of the keys of CHAIN_BUILDERS) from the shared registry."""
+    return chain_registry.get(name)
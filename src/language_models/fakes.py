@@ -0,0 +1,68 @@
+"""
+Instant stand-ins for the chat models, for tests and benchmarks that must not call the API.
+
+The fakes return fixed structured outputs of the same types as the real models; only the
+profile update fake reads its prompt, to return the profiles it was sent.
+"""
+
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from src.language_models.chains import ChainRegistry, chain_registry
+from src.language_models.prompts import (event_digest_prompt, fused_summary_prompt, name_query_prompt, profile_update_prompt,
+                                         summary_merge_prompt, summary_prompt)
+from src.schemas.output_structures import Character, NameQuerier, ProfileData, ProfileRefresher, Summary, SummaryWithCharacters
+
+
+def fake_name_query_llm(characters: Optional[List[Character]] = None) -> Runnable:
+    """Return a fake name query model that always finds the given characters."""
+    if characters is None:
+        characters = [Character(name="سليم", hint="")]
+    return RunnableLambda(lambda _: NameQuerier(characters=characters))
+
+
+def fake_summary_llm(summary: str = "مشى سليم إلى السوق.") -> Runnable:
+    """Return a fake summary model that always returns the given summary."""
+    return RunnableLambda(lambda _: Summary(summary=summary))
+
+
+def fake_fused_summary_llm(summary: str = "مشى سليم إلى السوق.",
+                           characters: Optional[List[Character]] = None) -> Runnable:
+    """Return a fake fused summary model that always returns the given summary and characters."""
+    if characters is None:
+        characters = [Character(name="سليم", hint="")]
+    return RunnableLambda(lambda _: SummaryWithCharacters(summary=summary, characters=characters))
+
+
+def fake_profile_update_llm() -> Runnable:
+    """Return a fake profile update model that returns the profiles of its prompt unchanged."""
+    def update(prompt) -> ProfileRefresher:
+        # Imported on first use to keep module import cheap
+        from src.profiles.encoding import FIELDS, decode_profiles
+
+        _, _, encoded = prompt.to_messages()[-1].content.partition("الملفات الشخصية: ")
+        return ProfileRefresher(profiles=[
+            ProfileData(**{key: getattr(profile, attribute) for key, attribute in FIELDS.items()})
+            for profile in decode_profiles(encoded)
+        ])
+
+    return RunnableLambda(update)
+
+
+def fake_chains() -> Dict[str, Runnable]:
+    """Return the chains of the registry, with the real prompts and fake models."""
+    return {
+        'name_query': name_query_prompt | fake_name_query_llm(),
+        'summary': summary_prompt | fake_summary_llm(),
+        'fused_summary': fused_summary_prompt | fake_fused_summary_llm(),
+        'summary_merge': summary_merge_prompt | fake_summary_llm(),
+        'profile_update': profile_update_prompt | fake_profile_update_llm(),
+        'event_digest': event_digest_prompt | fake_summary_llm("أحداث سابقة لسليم."),
+    }
+
+
+def install_fake_chains(registry: ChainRegistry = chain_registry):
+    """Override every chain of the registry with its fake; undo with registry.reset()."""
+    for name, chain in fake_chains().items():
+        registry.override(name, chain)
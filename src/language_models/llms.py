@@ -1,41 +1,97 @@
-from langchain_google_genai import (
-    ChatGoogleGenerativeAI,
-    HarmBlockThreshold,
-    HarmCategory,
-)
-from src.schemas.output_structures import NameQuerier, ProfileRefresher, Summary
-from src.language_models.tools import character_role_tool
+from functools import lru_cache
+from src.schemas.output_structures import NameQuerier, ProfileRefresher, Summary, SummaryWithCharacters
+from src.configs import llm_config
 from dotenv import load_dotenv
 
 load_dotenv()
 
 model = 'gemini-2.5-flash'
 
-safety_settings = {
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_DEROGATORY: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_TOXICITY: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_VIOLENCE: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_SEXUAL: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_MEDICAL: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_DANGEROUS: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.OFF,
-    HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY: HarmBlockThreshold.OFF,
+
+def get_safety_settings():
+    """Return the safety settings shared by all the chat models (all filters off)."""
+    from langchain_google_genai import HarmBlockThreshold, HarmCategory
+    
+    return {
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_DEROGATORY: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_TOXICITY: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_VIOLENCE: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_SEXUAL: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_MEDICAL: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_DANGEROUS: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.OFF,
+        HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY: HarmBlockThreshold.OFF,
+    }
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter():
+    """Return the rate limiter shared by all the chat models, or None when rate limiting is disabled."""
+    requests_per_second = llm_config['requests_per_second']
+    if not requests_per_second:
+        return None
+    
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+    
+    return InMemoryRateLimiter(
+        requests_per_second=requests_per_second,
+        check_every_n_seconds=0.1,
+        max_bucket_size=max(1, requests_per_second),
+    )
+
+
+# The clients are built on first use, so importing this module is cheap and needs no API key
+
+@lru_cache(maxsize=None)
+def get_chat_model(temperature: float, model_name: str = model, cached_content: str | None = None):
+    """
+    Return the shared chat model client for a temperature and model (and cached prompt prefix).
+    The structured models of get_tier_llm are thin wrappers around it, so chains with the same
+    temperature reuse one client and its underlying connection.
+    """
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    
+    return ChatGoogleGenerativeAI(model=model_name, 
+                                  temperature=temperature, 
+                                  safety_settings=get_safety_settings(),
+                                  rate_limiter=get_rate_limiter(),
+                                  cached_content=cached_content,
+                                  )
+
+
+CHAIN_SCHEMAS = {
+    'name_query': NameQuerier,
+    'summary': Summary,
+    'fused_summary': SummaryWithCharacters,
+    'summary_merge': Summary,
+    'profile_update': ProfileRefresher,
+    'event_digest': Summary,
 }
 
-profile_update_llm = ChatGoogleGenerativeAI(model=model, 
-                                            temperature=0.0, 
-                                            safety_settings=safety_settings,
-                                            ).bind_tools([character_role_tool]).with_structured_output(ProfileRefresher)
-name_query_llm = ChatGoogleGenerativeAI(model=model, 
-                                        temperature=0.0,
-                                        safety_settings=safety_settings,
-                                        ).with_structured_output(NameQuerier)
-summary_llm = ChatGoogleGenerativeAI(model=model,
-                                     temperature=1.0, 
-                                     safety_settings=safety_settings,
-                                     ).with_structured_output(Summary)
+
+# Chains whose model is bound to tools; Gemini only accepts tools with cached content if they are part of the cache
+CHAINS_WITH_TOOLS = {'profile_update'}
+
+
+@lru_cache(maxsize=None)
+def get_tier_llm(chain_name: str, model_name: str, temperature: float, cached_content: str | None = None):
+    """
+    Return the structured model of a chain for one routing tier (see src.language_models.routing).
+    It returns the raw message and the parsing error alongside the parsed output.
+    With cached content, the output schema is requested as a JSON response schema, since
+    requests on cached content cannot declare tools.
+    """
+    chat_model = get_chat_model(temperature, model_name, cached_content)
+    if cached_content:
+        return chat_model.with_structured_output(CHAIN_SCHEMAS[chain_name], method='json_mode', include_raw=True)
+    
+    if chain_name in CHAINS_WITH_TOOLS:
+        from src.language_models.tools import character_role_tool
+        chat_model = chat_model.bind_tools([character_role_tool])
+    
+    return chat_model.with_structured_output(CHAIN_SCHEMAS[chain_name], include_raw=True)
+
@@ -0,0 +1,304 @@
+"""
+Static-prefix prompt caching.
+
+The system prompts are identical for every call of a chain; only the human message
+carries per-call variables. split_prompt() separates the two, and a prefix cache
+registers the static prefix once per (chain, model):
+
+- GeminiPrefixCache stores it as provider-side cached content, so the calls only send
+  the variable messages and reference the cache by name;
+- LocalPrefixCache is a stand-in for tests and offline runs: it keeps the prefix in
+  memory and puts it back in front of the variable messages before calling the model.
+
+Both count the prefix tokens not re-sent; only for GeminiPrefixCache are they actually
+saved, the local stand-in still sends the prefix.
+"""
+
+import hashlib
+import math
+from abc import ABC, abstractmethod
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from src.configs import llm_config
+
+
+# Rough average for Arabic text with the Gemini tokenizer, used when the provider gives no count
+CHARS_PER_TOKEN = 3
+# An expiring prefix is renewed this long (at most a tenth of its lifetime) before it expires
+REFRESH_MARGIN_SECONDS = 300
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_prompt(prompt: ChatPromptTemplate) -> Tuple[str, ChatPromptTemplate]:
+    """
+    Split a chat prompt into its static system prefix and a template of the remaining messages.
+
+    Raises:
+        ValueError: If the prompt does not start with a system message without variables
+    """
+    first, *rest = prompt.messages
+    if getattr(first, 'input_variables', None) or not rest:
+        raise ValueError("The prompt must start with a static system message followed by other messages")
+
+    system_message = first.format()
+    if not isinstance(system_message, SystemMessage):
+        raise ValueError("The prompt must start with a static system message followed by other messages")
+
+    return system_message.content, ChatPromptTemplate.from_messages(rest)
+
+
+class PrefixCache(ABC):
+    """
+    Base class of the prefix caches: registration bookkeeping, renewal of the prefixes that
+    expire and token savings report.
+    """
+
+    # Lifetime of a registered prefix; None if it never expires
+    ttl_seconds: Optional[int] = None
+
+    def __init__(self):
+        self._prefixes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, chain_name: str, model_name: str, prefix: str) -> Optional[str]:
+        """
+        Register the static prefix of a chain for a model, once.
+
+        Returns:
+            The handle of the cached prefix, or None if it cannot be cached
+        """
+        key = f'{chain_name}/{model_name}'
+        with self._lock:
+            if key not in self._prefixes:
+                created = self._create(model_name, prefix)
+                self._prefixes[key] = None if created is None else {
+                    'model_name': model_name, 'handle': created[0], 'prefix': prefix, 'tokens': created[1],
+                    'calls': 0, 'expires_at': self._expiry(),
+                }
+            entry = self._prefixes[key]
+        return entry['handle'] if entry else None
+
+    @abstractmethod
+    def _create(self, model_name: str, prefix: str) -> Optional[Tuple[str, int]]:
+        """Store a prefix; return its handle and token count, or None if it cannot be cached."""
+
+    def _extend(self, handle: str) -> bool:
+        """Extend the lifetime of a stored prefix; return False if it is gone and must be stored again."""
+        return False
+
+    def _expiry(self) -> Optional[float]:
+        return None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+
+    def current_handle(self, entry: Dict[str, Any]) -> Optional[str]:
+        """
+        Return the handle of a registered prefix, renewing it shortly before it expires.
+
+        Returns:
+            The handle, or None if the prefix could not be stored again and must be sent in full
+        """
+        with self._lock:
+            expires_at = entry['expires_at']
+            if expires_at is not None and time.monotonic() >= expires_at - min(REFRESH_MARGIN_SECONDS, self.ttl_seconds / 10):
+                self._renew(entry)
+            return entry['handle']
+
+    def _renew(self, entry: Dict[str, Any]):
+        """Extend the prefix of an entry, or store it again; the caller holds the lock."""
+        if entry['handle'] is None or not self._extend(entry['handle']):
+            created = self._create(entry['model_name'], entry['prefix'])
+            entry['handle'] = created[0] if created else None
+        entry['expires_at'] = self._expiry()
+
+    def invalidate(self, entry: Dict[str, Any], handle: str):
+        """Forget a handle the provider no longer knows, so the next call stores the prefix again."""
+        with self._lock:
+            if entry['handle'] == handle:
+                entry['handle'] = None
+                entry['expires_at'] = time.monotonic()
+
+    def wrap(self, chain_name: str, model_name: str, get_llm: Callable[[Optional[str]], Runnable]) -> Runnable:
+        """
+        Return the runnable that calls the model with the variable messages, counting the prefix as saved.
+
+        Args:
+            chain_name: Name of the chain
+            model_name: Model of the tier
+            get_llm: Returns the tier's model for a prefix handle, or the uncached model for None
+        """
+        key = f'{chain_name}/{model_name}'
+
+        def call(prompt_value, config=None):
+            return self._invoke(self._prefixes[key], get_llm, prompt_value.to_messages(), config)
+
+        return RunnableLambda(call)
+
+    def _count_call(self, entry: Dict[str, Any]):
+        with self._lock:
+            entry['calls'] += 1
+
+    def _invoke(self, entry: Dict[str, Any], get_llm: Callable[[Optional[str]], Runnable], messages: list, config) -> Any:
+        self._count_call(entry)
+        return get_llm(entry['handle']).invoke(messages, config)
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """Return per 'chain/model' the prefix size, the calls and the prefix tokens not re-sent."""
+        with self._lock:
+            return {
+                key: {'prefix_tokens': entry['tokens'], 'calls': entry['calls'],
+                      'tokens_saved': entry['tokens'] * entry['calls']}
+                for key, entry in sorted(self._prefixes.items()) if entry
+            }
+
+    def tokens_saved(self) -> int:
+        """Return the total number of prefix tokens not re-sent."""
+        return sum(entry['tokens_saved'] for entry in self.report().values())
+
+    def reset_stats(self):
+        """Reset the call counts, e.g. at the start of a run."""
+        with self._lock:
+            for entry in self._prefixes.values():
+                if entry:
+                    entry['calls'] = 0
+
+
+class LocalPrefixCache(PrefixCache):
+    """
+    In-memory stand-in for provider-side caching: the model still receives the prefix, but
+    it is assembled locally from the registered copy, as the provider would do.
+    """
+
+    def _create(self, model_name: str, prefix: str) -> Optional[Tuple[str, int]]:
+        return f"local/{hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]}", estimate_tokens(prefix)
+
+    def _invoke(self, entry: Dict[str, Any], get_llm: Callable[[Optional[str]], Runnable], messages: list, config) -> Any:
+        self._count_call(entry)
+        return get_llm(None).invoke([SystemMessage(content=entry['prefix'])] + messages, config)
+
+
+def is_cache_error(error: Exception) -> bool:
+    """Return True if a model call failed because its cached content expired or is unknown."""
+    from google.api_core import exceptions
+
+    if isinstance(error, (exceptions.NotFound, exceptions.PermissionDenied, exceptions.FailedPrecondition)):
+        return True
+    # langchain_google_genai wraps the API errors in its own exception type
+    message = str(error).lower()
+    return 'cachedcontent' in message.replace(' ', '') or 'cached content' in message
+
+
+class GeminiPrefixCache(PrefixCache):
+    """
+    Registers the prefixes as Gemini cached content; the model is then created with
+    cached_content set to the returned name.
+
+    The cached content expires after ttl_seconds: its lifetime is extended shortly before,
+    and a call whose cached content is gone anyway (e.g. after a long pause) is sent with the
+    full prompt to the uncached model, while the prefix is stored again for the next calls.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600):
+        """
+        Initialize the Gemini prefix cache.
+
+        Args:
+            ttl_seconds: Lifetime of the cached content on the provider side
+        """
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+
+    def _get_client(self):
+        from google.ai import generativelanguage_v1beta as genai
+
+        if self._client is None:
+            self._client = genai.CacheServiceClient(client_options={'api_key': os.environ.get('GOOGLE_API_KEY')})
+        return self._client
+
+    def _create(self, model_name: str, prefix: str) -> Optional[Tuple[str, int]]:
+        from google.ai import generativelanguage_v1beta as genai
+        from google.api_core import exceptions
+        from google.protobuf import duration_pb2
+
+        try:
+            cached = self._get_client().create_cached_content(cached_content=genai.CachedContent(
+                model=f'models/{model_name}',
+                system_instruction=genai.Content(parts=[genai.Part(text=prefix)]),
+                ttl=duration_pb2.Duration(seconds=self.ttl_seconds),
+            ))
+        except exceptions.GoogleAPICallError:
+            # E.g. a prefix below the model's minimum cacheable size: send it in full instead
+            return None
+
+        return cached.name, cached.usage_metadata.total_token_count
+
+    def _extend(self, handle: str) -> bool:
+        from google.ai import generativelanguage_v1beta as genai
+        from google.api_core import exceptions
+        from google.protobuf import duration_pb2, field_mask_pb2
+
+        try:
+            self._get_client().update_cached_content(
+                cached_content=genai.CachedContent(name=handle, ttl=duration_pb2.Duration(seconds=self.ttl_seconds)),
+                update_mask=field_mask_pb2.FieldMask(paths=['ttl']),
+            )
+        except exceptions.GoogleAPICallError:
+            return False
+        return True
+
+    def _invoke(self, entry: Dict[str, Any], get_llm: Callable[[Optional[str]], Runnable], messages: list, config) -> Any:
+        handle = self.current_handle(entry)
+        if handle is not None:
+            try:
+                response = get_llm(handle).invoke(messages, config)
+            except Exception as e:
+                if not is_cache_error(e):
+                    raise
+                self.invalidate(entry, handle)
+            else:
+                self._count_call(entry)
+                return response
+
+        # No usable cached content: send the prefix with the call
+        return get_llm(None).invoke([SystemMessage(content=entry['prefix'])] + messages, config)
+
+
+_prefix_cache: Optional[PrefixCache] = None
+_prefix_cache_lock = threading.Lock()
+
+
+def get_prefix_cache() -> Optional[PrefixCache]:
+    """Return the prefix cache selected by llm_config['prompt_cache'], or None when disabled."""
+    global _prefix_cache
+
+    backend = llm_config['prompt_cache']
+    if not backend:
+        return None
+
+    with _prefix_cache_lock:
+        if _prefix_cache is None:
+            if backend == 'local':
+                _prefix_cache = LocalPrefixCache()
+            elif backend == 'gemini':
+                _prefix_cache = GeminiPrefixCache(llm_config['prompt_cache_ttl_seconds'])
+            else:
+                raise ValueError(f"Unknown prompt cache backend: {backend}")
+        return _prefix_cache
+
+
+def reset_prefix_cache():
+    """Forget the prefix cache, so the next get_prefix_cache() follows the current config."""
+    global _prefix_cache
+
+    with _prefix_cache_lock:
+        _prefix_cache = None
@@ -71,7 +71,8 @@ PROFILE_UPDATE_SYSTEM_PROMPT = '''
 
 
 
-TEXT_SUMMARY_SYSTEM_PROMPT = '''دورك
+# Shared by the summary and the fused summary, which only differ in their output section
+_SUMMARY_INSTRUCTIONS = '''دورك
 أنت خبير في تلخيص النصوص العربية لأغراض التحليل الأدبي. مهمتك هي إنشاء ملخص دقيق وموجز للنص المُعطى، مع الالتزام بشرط أساسي واحد.
 
 الشرط الأساسي (إلزامي)
@@ -96,9 +97,52 @@ TEXT_SUMMARY_SYSTEM_PROMPT = '''دورك
 
 الدقة والإيجاز: كن دقيقًا وموجزًا. لا تضف معلومات من خارج النص. حافظ على جوهر القصة.
 
-المخرج النهائي
+'''
+
+SUMMARY_OUTPUT_SECTION = '''المخرج النهائي
 ملخص نصي باللغة العربية.
 '''
+
+# The fused summary also lists the characters of the summary, in place of the second name query
+FUSED_SUMMARY_OUTPUT_SECTION = '''استخراج الشخصيات من الملخص: بعد كتابة الملخص، استخرج جميع الشخصيات المذكورة فيه بنفس قواعد استخراج الأسماء:
+    * قم بتوحيد الاسم بإزالة الألقاب والأوصاف السابقة له (مثال: "الأستاذ محمد" يصبح "محمد").
+    * اعتبر الأوصاف المختلفة لنفس الشخصية شخصية واحدة، وأضف تلميحًا مميزًا من النص فقط إذا كان الاسم يشير إلى شخصيتين مختلفتين، وإلا اترك التلميح فارغًا.
+
+المخرج النهائي
+ملخص نصي باللغة العربية، وقائمة بالشخصيات المذكورة في الملخص، لكل شخصية اسمها وتلميحها.
+'''
+
+TEXT_SUMMARY_SYSTEM_PROMPT = _SUMMARY_INSTRUCTIONS + SUMMARY_OUTPUT_SECTION
+FUSED_SUMMARY_SYSTEM_PROMPT = _SUMMARY_INSTRUCTIONS + FUSED_SUMMARY_OUTPUT_SECTION
+
+SUMMARY_MERGE_SYSTEM_PROMPT = '''دورك
+أنت خبير في تلخيص النصوص العربية لأغراض التحليل الأدبي. ستُعطى ملخصات متتالية لأجزاء متتابعة من نفس الكتاب، مرقمة حسب ترتيب ورودها في النص. مهمتك هي دمجها في ملخص واحد مترابط.
+
+تعليمات التنفيذ
+الترتيب: حافظ على التسلسل الزمني للأحداث كما يرد في الملخصات.
+
+الشخصيات: احتفظ بجميع الشخصيات المذكورة في الملخصات، مع أدوارها وأفعالها المهمة.
+
+الإيجاز: احذف التكرار والتفاصيل الثانوية. لا تضف معلومات من خارج الملخصات.
+
+المخرج النهائي
+ملخص نصي واحد باللغة العربية.
+'''
+
+EVENT_DIGEST_SYSTEM_PROMPT = '''دورك
+أنت خبير في التحليل الأدبي للنصوص العربية. ستُعطى قائمة بالأحداث القديمة لشخصية واحدة من رواية، مرتبة حسب ورودها في النص. مهمتك هي تكثيفها في فقرة موجزة واحدة.
+
+تعليمات التنفيذ
+الأولوية: احتفظ بالأحداث المحورية التي تؤثر على تطور الشخصية أو القصة (القرارات، الصراعات، التحولات)، واحذف التفاصيل الثانوية والتكرار.
+
+الترتيب: حافظ على التسلسل الزمني للأحداث.
+
+الإيجاز: لا تتجاوز بضع جمل. لا تضف معلومات من خارج القائمة.
+
+المخرج النهائي
+فقرة واحدة باللغة العربية.
+'''
+
 name_query_prompt = ChatPromptTemplate.from_messages([
     ("system", NAME_QUERY_SYSTEM_PROMPT),
     ("human", "النص: {text}")
@@ -112,4 +156,17 @@ profile_update_prompt = ChatPromptTemplate.from_messages([
 summary_prompt = ChatPromptTemplate.from_messages([
     ("system", TEXT_SUMMARY_SYSTEM_PROMPT),
     ("human", "اسماء الشخصيات: {names}\nالنص: {text}")
-])
\ No newline at end of file
+])
+fused_summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", FUSED_SUMMARY_SYSTEM_PROMPT),
+    ("human", "اسماء الشخصيات: {names}\nالنص: {text}")
+])
+
+summary_merge_prompt = ChatPromptTemplate.from_messages([
+    ("system", SUMMARY_MERGE_SYSTEM_PROMPT),
+    ("human", "الملخصات:\n{summaries}")
+])
+event_digest_prompt = ChatPromptTemplate.from_messages([
+    ("system", EVENT_DIGEST_SYSTEM_PROMPT),
+    ("human", "الأحداث:\n{events}")
+])
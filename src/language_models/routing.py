@@ -0,0 +1,194 @@
+"""
+Per-chain model routing with escalation, and per-tier usage tracking.
+
+Every chain has an ordered list of model tiers in llm_routing_config. A RoutedChain calls
+the first tier and only escalates to the next one when the structured output fails
+validation or, for chains configured with escalate_on_empty, comes back empty. Every tier
+call is recorded (tokens, estimated cost, latency, outcome) in the active usage tracker:
+the one installed with track_usage(), e.g. per book, or else the global one.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from src.configs import llm_routing_config
+from src.language_models.prompt_cache import get_prefix_cache, split_prompt
+
+
+@dataclass
+class TierUsage:
+    calls: int = 0
+    failures: int = 0
+    escalations: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    seconds: float = 0.0
+
+
+class UsageTracker:
+    """
+    Thread-safe counters of the calls of every (chain, model) tier.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Initialize the usage tracker.
+
+        Args:
+            prices: USD per million input/output tokens by model; defaults to llm_routing_config['prices']
+        """
+        self.prices = llm_routing_config['prices'] if prices is None else prices
+        self._usage: Dict[Tuple[str, str], TierUsage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, chain_name: str, model_name: str, input_tokens: int, output_tokens: int,
+               seconds: float, failed: bool, escalated: bool):
+        """Record one tier call."""
+        price = self.prices.get(model_name, {'input': 0.0, 'output': 0.0})
+        cost = (input_tokens * price['input'] + output_tokens * price['output']) / 1_000_000
+
+        with self._lock:
+            usage = self._usage.setdefault((chain_name, model_name), TierUsage())
+            usage.calls += 1
+            usage.failures += failed
+            usage.escalations += escalated
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.cost += cost
+            usage.seconds += seconds
+
+    def total_cost(self) -> float:
+        """Return the estimated cost of all the recorded calls in USD."""
+        with self._lock:
+            return sum(usage.cost for usage in self._usage.values())
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Return the usage of every tier, keyed by 'chain/model', with the mean latency per call."""
+        with self._lock:
+            return {
+                f'{chain_name}/{model_name}': {
+                    **asdict(usage),
+                    'mean_seconds': usage.seconds / usage.calls if usage.calls else 0.0,
+                }
+                for (chain_name, model_name), usage in sorted(self._usage.items())
+            }
+
+
+usage_tracker = UsageTracker()
+
+_active_tracker: contextvars.ContextVar[Optional[UsageTracker]] = contextvars.ContextVar('active_tracker', default=None)
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the tracker installed by track_usage() in the current context, or the global one."""
+    return _active_tracker.get() or usage_tracker
+
+
+@contextlib.contextmanager
+def track_usage(tracker: Optional[UsageTracker] = None) -> Iterator[UsageTracker]:
+    """
+    Record the LLM calls made in this context (e.g. the analysis of one book) in their own tracker.
+    Calls are also recorded in the global tracker.
+    """
+    tracker = tracker or UsageTracker()
+    token = _active_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _active_tracker.reset(token)
+
+
+def _is_empty(parsed: Any) -> bool:
+    """Return True if every field of a structured output is empty."""
+    return not any(value for value in parsed.__dict__.values())
+
+
+class RoutedChain(Runnable):
+    """
+    Runnable that calls the chain's model tiers in order, escalating on invalid (or,
+    optionally, empty) structured output.
+    """
+
+    def __init__(self, chain_name: str, tiers: List[Tuple[str, Runnable]], escalate_on_empty: bool = False):
+        """
+        Initialize the routed chain.
+
+        Args:
+            chain_name: Name of the chain, used for the usage records
+            tiers: (model name, runnable from the chain input to the raw/parsed/parsing_error
+                output of a structured model) pairs, cheapest first
+            escalate_on_empty: Whether an output with only empty fields is escalated too
+        """
+        self.chain_name = chain_name
+        self.tiers = tiers
+        self.escalate_on_empty = escalate_on_empty
+
+    def invoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        """
+        Run the chain on the tiers until one returns acceptable structured output.
+
+        Raises:
+            ValueError: If no tier returns valid structured output
+        """
+        tracker = get_usage_tracker()
+        parsed, error = None, None
+
+        for position, (model_name, tier) in enumerate(self.tiers):
+            started = time.perf_counter()
+            response = tier.invoke(input, config)
+            seconds = time.perf_counter() - started
+
+            parsed, error = response.get('parsed'), response.get('parsing_error')
+            failed = parsed is None or error is not None
+            unacceptable = failed or (self.escalate_on_empty and _is_empty(parsed))
+            escalated = unacceptable and position + 1 < len(self.tiers)
+
+            usage = getattr(response.get('raw'), 'usage_metadata', None) or {}
+            for active in {id(tracker): tracker, id(usage_tracker): usage_tracker}.values():
+                active.record(self.chain_name, model_name, usage.get('input_tokens', 0),
+                              usage.get('output_tokens', 0), seconds, failed, escalated)
+
+            if not unacceptable:
+                return parsed
+
+        if parsed is None or error is not None:
+            raise ValueError(f"No tier of the {self.chain_name} chain returned valid output: {error}")
+        return parsed
+
+
+def _build_tier(chain_name: str, model_name: str, prompt: ChatPromptTemplate, temperature: float) -> Runnable:
+    """
+    Build the runnable of one tier: the prompt and the structured model, with the static
+    system prefix registered in the prompt cache when one is enabled.
+    """
+    from src.language_models.llms import CHAINS_WITH_TOOLS, get_tier_llm
+
+    prefix_cache = get_prefix_cache()
+    if prefix_cache is not None and chain_name not in CHAINS_WITH_TOOLS:
+        prefix, variable_prompt = split_prompt(prompt)
+        handle = prefix_cache.register(chain_name, model_name, prefix)
+        if handle is not None:
+            # the handle changes when an expired prefix is stored again: look the model up per call
+            def get_llm(cached_content):
+                return get_tier_llm(chain_name, model_name, temperature, cached_content)
+            return variable_prompt | prefix_cache.wrap(chain_name, model_name, get_llm)
+
+    return prompt | get_tier_llm(chain_name, model_name, temperature)
+
+
+def build_routed_chain(chain_name: str, prompt: ChatPromptTemplate) -> RoutedChain:
+    """Build the routed chain of a chain name from llm_routing_config."""
+    settings = llm_routing_config['chains'][chain_name]
+    tiers = [
+        (model_name, _build_tier(chain_name, model_name, prompt, settings['temperature']))
+        for model_name in settings['tiers']
+    ]
+    return RoutedChain(chain_name, tiers, escalate_on_empty=settings['escalate_on_empty'])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the chain registry, using the fake models.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+
+from src.language_models.chains import ChainRegistry
+from src.language_models.fakes import fake_chains, fake_name_query_llm, fake_summary_llm
+from src.language_models.prompts import name_query_prompt
+
+
+def test_chain_is_built_once_across_threads():
+    """Concurrent first calls build the chain only once and all get the same object."""
+    builds = []
+    
+    def build():
+        builds.append(1)
+        return name_query_prompt | fake_name_query_llm()
+    
+    registry = ChainRegistry({'name_query': build})
+    chains = []
+    threads = [threading.Thread(target=lambda: chains.append(registry.get('name_query'))) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(builds) == 1
+    assert all(chain is chains[0] for chain in chains)
+    assert registry.get('name_query').invoke({'text': "نص"}).characters[0].name == "سليم"
+
+
+def test_override_and_reset():
+    """An overridden chain is used until the registry is reset."""
+    registry = ChainRegistry({name: (lambda chain=chain: chain) for name, chain in fake_chains().items()})
+    registry.override('summary', fake_summary_llm("ملخص آخر"))
+    
+    assert registry.get('summary').invoke({}).summary == "ملخص آخر"
+    
+    registry.reset('summary')
+    assert registry.get('summary').invoke({'names': "سليم", 'text': "نص"}).summary == "مشى سليم إلى السوق."
+    
+    with pytest.raises(KeyError):
+        registry.get('unknown')
+
+
+if __name__ == "__main__":
+    test_chain_is_built_once_across_threads()
+    test_override_and_reset()
+    print("All chain registry tests passed")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the static-prefix prompt cache, with the local stand-in and a fake model.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from src.configs import llm_config
+from src.language_models import llms, prompt_cache
+from src.language_models.prompt_cache import (GeminiPrefixCache, estimate_tokens, get_prefix_cache, reset_prefix_cache,
+                                              split_prompt)
+from src.language_models.prompts import summary_prompt
+from src.language_models.routing import build_routed_chain
+from src.schemas.output_structures import Summary
+
+
+SYSTEM_PROMPT = summary_prompt.format_messages(names="[]", text="")[0].content
+
+
+def test_split_prompt():
+    """The system prompt is the static prefix; the human message keeps the variables."""
+    prefix, variable_prompt = split_prompt(summary_prompt)
+
+    assert prefix == SYSTEM_PROMPT
+    assert set(variable_prompt.input_variables) == {'names', 'text'}
+    assert all(message.type != 'system' for message in variable_prompt.format_messages(names="[]", text="نص"))
+
+    with pytest.raises(ValueError):
+        split_prompt(ChatPromptTemplate.from_messages([('human', "{text}")]))
+
+
+def test_local_cache_restores_prefix_and_reports_savings(monkeypatch):
+    """Every tier registers its prefix once, the model still sees it, and the savings add up per call."""
+    received = []
+
+    def fake_tier_llm(chain_name, model_name, temperature, cached_content=None):
+        def respond(messages):
+            received.append(messages)
+            raw = AIMessage(content='', usage_metadata={'input_tokens': 10, 'output_tokens': 5, 'total_tokens': 15})
+            return {'raw': raw, 'parsed': Summary(summary="ملخص"), 'parsing_error': None}
+        return RunnableLambda(respond)
+
+    monkeypatch.setattr(llms, 'get_tier_llm', fake_tier_llm)
+    monkeypatch.setitem(llm_config, 'prompt_cache', 'local')
+    reset_prefix_cache()
+    try:
+        chain = build_routed_chain('summary', summary_prompt)
+        for _ in range(3):
+            assert chain.invoke({'names': "[]", 'text': "نص"}).summary == "ملخص"
+
+        assert isinstance(received[0][0], SystemMessage)
+        assert received[0][0].content == SYSTEM_PROMPT
+        assert [message.type for message in received[0]] == ['system', 'human']
+
+        report = get_prefix_cache().report()
+        first_tier = next(iter(report.values()))
+        assert first_tier['calls'] == 3
+        assert first_tier['tokens_saved'] == 3 * estimate_tokens(SYSTEM_PROMPT)
+        assert get_prefix_cache().tokens_saved() == first_tier['tokens_saved']
+    finally:
+        reset_prefix_cache()
+
+
+class FakeGeminiCache(GeminiPrefixCache):
+    """Gemini cache whose cached contents are numbered handles, stored without the API."""
+
+    def __init__(self, ttl_seconds):
+        super().__init__(ttl_seconds)
+        self.created = []
+        self.extended = []
+        self.extendable = True
+
+    def _create(self, model_name, prefix):
+        self.created.append(f"cachedContents/{len(self.created) + 1}")
+        return self.created[-1], 100
+
+    def _extend(self, handle):
+        self.extended.append(handle)
+        return self.extendable
+
+
+def make_get_llm(received, dead_handles=()):
+    """Return get_llm for the wrapped tier: it records (handle, message types) and fails on dead handles."""
+    def get_llm(handle):
+        def respond(messages):
+            if handle in dead_handles:
+                raise google_exceptions.NotFound(f"CachedContent not found: {handle}")
+            received.append((handle, [message.type for message in messages]))
+            return "ok"
+        return RunnableLambda(respond)
+    return get_llm
+
+
+def test_gemini_cache_is_renewed_before_it_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prompt_cache.time, 'monotonic', lambda: now[0])
+    cache = FakeGeminiCache(ttl_seconds=3600)
+    cache.register('summary', 'model', SYSTEM_PROMPT)
+    received = []
+    call = cache.wrap('summary', 'model', make_get_llm(received))
+    prompt_value = ChatPromptTemplate.from_messages([('human', "نص")]).invoke({})
+
+    call.invoke(prompt_value)
+    now[0] += 3600 - 60
+    call.invoke(prompt_value)
+    cache.extendable = False
+    now[0] += 3600 - 60
+    call.invoke(prompt_value)
+
+    assert cache.extended == ["cachedContents/1", "cachedContents/1"]
+    assert [handle for handle, _ in received] == ["cachedContents/1", "cachedContents/1", "cachedContents/2"]
+    assert cache.tokens_saved() == 300
+
+
+def test_expired_gemini_cache_falls_back_to_the_full_prompt():
+    cache = FakeGeminiCache(ttl_seconds=3600)
+    cache.register('summary', 'model', SYSTEM_PROMPT)
+    received = []
+    call = cache.wrap('summary', 'model', make_get_llm(received, dead_handles={"cachedContents/1"}))
+    prompt_value = ChatPromptTemplate.from_messages([('human', "نص")]).invoke({})
+
+    assert call.invoke(prompt_value) == "ok"
+    call.invoke(prompt_value)
+
+    # the failed call is sent uncached with its prefix, the next one uses the stored-again prefix
+    assert received == [(None, ['system', 'human']), ("cachedContents/2", ['human'])]
+    assert cache.tokens_saved() == 100
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/language_models/test_prompt_cache.py")
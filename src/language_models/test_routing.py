@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the model routing layer, with fake model tiers.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.language_models.prompts import name_query_prompt, summary_prompt
+from src.language_models.routing import RoutedChain, UsageTracker, track_usage
+from src.schemas.output_structures import Character, NameQuerier, Summary
+
+
+PRICES = {'small': {'input': 1.0, 'output': 2.0}, 'large': {'input': 10.0, 'output': 20.0}}
+
+
+def fake_tier(parsed, calls, name, parsing_error=None):
+    """Fake structured model returning the include_raw=True output shape."""
+    def respond(_):
+        calls.append(name)
+        raw = AIMessage(content='', usage_metadata={'input_tokens': 1000, 'output_tokens': 100, 'total_tokens': 1100})
+        return {'raw': raw, 'parsed': parsed, 'parsing_error': parsing_error}
+    return RunnableLambda(respond)
+
+
+def test_first_tier_answers():
+    """A valid answer of the cheap tier is returned without escalation, even if empty when allowed."""
+    calls = []
+    chain = RoutedChain('name_query', [
+        ('small', name_query_prompt | fake_tier(NameQuerier(characters=[]), calls, 'small')),
+        ('large', name_query_prompt | fake_tier(NameQuerier(characters=[Character(name="سليم", hint="")]), calls, 'large')),
+    ])
+    
+    with track_usage(UsageTracker(PRICES)) as tracker:
+        assert chain.invoke({'text': "نص"}).characters == []
+    
+    assert calls == ['small']
+    assert tracker.report()['name_query/small']['calls'] == 1
+    assert tracker.total_cost() == pytest.approx((1000 * 1.0 + 100 * 2.0) / 1_000_000)
+
+
+def test_escalation_on_parse_failure_and_empty_output():
+    """Invalid output, and empty output when configured, go to the next tier."""
+    calls = []
+    chain = RoutedChain('summary', [
+        ('small', summary_prompt | fake_tier(None, calls, 'small', parsing_error=ValueError("bad json"))),
+        ('small', summary_prompt | fake_tier(Summary(summary=""), calls, 'small')),
+        ('large', summary_prompt | fake_tier(Summary(summary="ملخص"), calls, 'large')),
+    ], escalate_on_empty=True)
+    
+    with track_usage(UsageTracker(PRICES)) as tracker:
+        assert chain.invoke({'names': "", 'text': "نص"}).summary == "ملخص"
+    
+    report = tracker.report()
+    assert calls == ['small', 'small', 'large']
+    assert report['summary/small']['failures'] == 1
+    assert report['summary/small']['escalations'] == 2
+    assert report['summary/large']['escalations'] == 0
+
+
+def test_all_tiers_fail():
+    """Without any valid output the chain raises."""
+    chain = RoutedChain('summary', [
+        ('small', summary_prompt | fake_tier(None, [], 'small', parsing_error=ValueError("bad json"))),
+    ])
+    
+    with pytest.raises(ValueError, match="summary"):
+        chain.invoke({'names': "", 'text': "نص"})
+
+
+if __name__ == "__main__":
+    test_first_tier_answers()
+    test_escalation_on_parse_failure_and_empty_output()
+    test_all_tiers_fail()
+    print("All routing tests passed")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached role catalogue of the character role tool.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.language_models import tools
+from src.language_models.tools import character_role_tool, role_catalogue_text
+
+
+def test_catalogue_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    """The catalogue is parsed once and rebuilt after the file's mtime changes."""
+    csv_path = tmp_path / 'roles.csv'
+    csv_path.write_text("الكلمة,المعنى,الأمثلة\nالبطل,شخصية رئيسية,\n", encoding='utf-8-sig')
+    
+    parses = []
+    format_role_catalogue = tools._format_role_catalogue
+    monkeypatch.setattr(tools, '_format_role_catalogue', lambda path: parses.append(path) or format_role_catalogue(path))
+    
+    first = role_catalogue_text(str(csv_path))
+    assert role_catalogue_text(str(csv_path)) is first
+    assert "1. Role: البطل\nDescription: شخصية رئيسية\n" in first
+    assert "Examples" not in first
+    assert len(parses) == 1
+    
+    csv_path.write_text("الكلمة,المعنى,الأمثلة\nالخصم,يعارض البطل,مثال\n", encoding='utf-8-sig')
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    assert "Role: الخصم" in role_catalogue_text(str(csv_path))
+    assert len(parses) == 2
+    assert role_catalogue_text(str(tmp_path / 'missing.csv')) is None
+
+
+def test_async_run_matches_sync_run():
+    """The async tool returns the same text as the sync one."""
+    expected = character_role_tool._run("وصف", "هادئ")
+    
+    assert asyncio.run(character_role_tool._arun("وصف", "هادئ")) == expected
+    assert expected.startswith("AVAILABLE CHARACTER ROLES:")
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
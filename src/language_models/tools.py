@@ -1,7 +1,67 @@
-import pandas as pd
+import asyncio
+import csv
 import os
+import threading
 from langchain.tools import BaseTool
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+ROLE_CATALOGUE_PATH = "resources/character_data/character_terms_arabic.csv"
+
+# Formatted catalogue by path, with the (mtime, size) of the file it was built from
+_catalogue_cache: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_catalogue_lock = threading.Lock()
+
+
+def _format_role_catalogue(csv_path: str) -> str:
+    """Parse the role catalogue CSV (Arabic or English columns) into the text given to the LLM."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+        rows = list(csv.DictReader(file))
+    
+    role_definitions = []
+    for row in rows:
+        if 'الكلمة' in row:  # Arabic
+            word, meaning, examples = row['الكلمة'], row['المعنى'], row.get('الأمثلة')
+        else:  # English
+            word, meaning, examples = row['Word'], row['Meaning'], row.get('Examples')
+        
+        role_def = f"Role: {word}\nDescription: {meaning}"
+        if examples:
+            role_def += f"\nExamples: {examples}"
+        role_definitions.append(role_def)
+    
+    output = "AVAILABLE CHARACTER ROLES:\n"
+    output += "=" * 50 + "\n\n"
+    
+    for i, role_def in enumerate(role_definitions, 1):
+        output += f"{i}. {role_def}\n\n"
+    
+    return output
+
+
+def role_catalogue_text(csv_path: str = ROLE_CATALOGUE_PATH) -> Optional[str]:
+    """
+    Return the formatted role catalogue, parsed once and rebuilt only when the file changes.
+    
+    Returns:
+        The formatted catalogue, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        return None
+    
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _catalogue_cache.get(csv_path)
+    if cached and cached[0] == version:
+        return cached[1]
+    
+    with _catalogue_lock:
+        cached = _catalogue_cache.get(csv_path)
+        if not cached or cached[0] != version:
+            cached = (version, _format_role_catalogue(csv_path))
+            _catalogue_cache[csv_path] = cached
+        return cached[1]
+
 
 class CharacterRoleTool(BaseTool):
     name: str = "character_role_classifier"
@@ -25,37 +85,10 @@ class CharacterRoleTool(BaseTool):
         Returns:
             Formatted string with available roles and classification result
         """
-        # Load character terms
-        csv_path = "resources/character_data/character_terms_arabic.csv"
-        if not os.path.exists(csv_path):
+        output = role_catalogue_text()
+        if output is None:
             return "Error: Character terms file not found"
         
-        df = pd.read_csv(csv_path)
-        
-        # Format the CSV data for the LLM
-        role_definitions = []
-        for idx, row in df.iterrows():
-            if 'الكلمة' in df.columns:  # Arabic
-                word = row['الكلمة']
-                meaning = row['المعنى']
-                examples = row['الأمثلة'] if pd.notna(row['الأمثلة']) else ""
-            else:  # English
-                word = row['Word']
-                meaning = row['Meaning']
-                examples = row['Examples'] if pd.notna(row['Examples']) else ""
-            
-            role_def = f"Role: {word}\nDescription: {meaning}"
-            if examples:
-                role_def += f"\nExamples: {examples}"
-            role_definitions.append(role_def)
-        
-        # Format the output
-        output = "AVAILABLE CHARACTER ROLES:\n"
-        output += "=" * 50 + "\n\n"
-        
-        for i, role_def in enumerate(role_definitions, 1):
-            output += f"{i}. {role_def}\n\n"
-        
         # If character information is provided, also include classification
         if character_description or personality:
             output += "\nCHARACTER TO CLASSIFY:\n"
@@ -70,10 +103,10 @@ class CharacterRoleTool(BaseTool):
         
         return output
     
-    def _arun(self, character_description: str = "", personality: str = "", 
-              events: str = "", relationships: str = "") -> str:
-        """Async version of the tool."""
-        return self._run(character_description, personality, events, relationships)
+    async def _arun(self, character_description: str = "", personality: str = "", 
+                    events: str = "", relationships: str = "") -> str:
+        """Async version of the tool; the file access runs in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self._run, character_description, personality, events, relationships)
 
 # Create the tool instance
-character_role_tool = CharacterRoleTool() 
\ No newline at end of file
+character_role_tool = CharacterRoleTool() 
@@ -1,14 +1,69 @@
+import argparse
 from dotenv import load_dotenv
-from src.graphs.graph_builders import compiled_graph
-from src.schemas.states import initial_state
+from src.graphs.graph_builders import (build_chunk_graph, build_chunked_graph, build_graph, build_slim_graph,
+                                       compiled_graph, compiled_chunked_graph, compiled_slim_graph)
+from src.schemas.states import initial_state, initial_slim_state
 from src.configs import config
-from src.graphs.graph_visualizers import visualize_graph
-from src.databases.database import character_db
+from src.databases.database import get_character_db
+from src.language_models.prompt_cache import GeminiPrefixCache, get_prefix_cache
+from src.language_models.routing import usage_tracker
 
 load_dotenv()
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the literary analysis graph on a book.")
+    parser.add_argument('file_path', nargs='?', default=initial_state['file_path'], help="Path of the book's .txt file")
+    parser.add_argument('--pipelined', action='store_true', help="Overlap name extraction and summarization with the profile refresh")
+    parser.add_argument('--chunk-subgraph', action='store_true', help="Run the per-chunk work as a subgraph, so long books fit the recursion limit")
+    parser.add_argument('--slim-state', action='store_true', help="Keep only artifact references in the graph state and read chunks on demand")
+    parser.add_argument('--fused', action='store_true', help="Extract the summary's characters in the summary call instead of a second name query")
+    parser.add_argument('--stream', metavar='JSONL_PATH', help="Write per-chunk events to this JSONL file as they happen instead of waiting for the final state")
+    parser.add_argument('--render-graph', action='store_true', help="Render the graph to resources/images/graph.png (cached by graph hash)")
+    args = parser.parse_args()
+    if args.stream and args.chunk_subgraph and not args.slim_state:
+        # The chunks run inside the chunk_loop node, whose updates carry no per-chunk events
+        parser.error("--stream does not support --chunk-subgraph")
+    return args
+
+
+def select_graph(args):
+    """Return the compiled graph for the command line options."""
+    if args.slim_state:
+        return build_slim_graph(fused=True).compile() if args.fused else compiled_slim_graph
+    if args.chunk_subgraph:
+        return build_chunked_graph(build_chunk_graph(fused=True).compile()).compile() if args.fused else compiled_chunked_graph
+    return build_graph(fused=True).compile() if args.fused else compiled_graph
+
+
 if __name__ == "__main__":
-    visualize_graph(compiled_graph)
+    args = parse_args()
+    if args.render_graph:
+        from src.graphs.graph_visualizers import visualize_graph
+        visualize_graph(compiled_graph)
+    character_db = get_character_db()
     character_db.clear_database()
-    response = compiled_graph.invoke(initial_state, config=config)
-    print(response)
\ No newline at end of file
+    if args.pipelined:
+        from src.graphs.pipelined_runner import PipelinedRunner
+        response = PipelinedRunner(fused=args.fused).run(args.file_path)
+    else:
+        if args.slim_state:
+            state = {**initial_slim_state, 'file_path': args.file_path, 'database_path': character_db.db_path}
+        else:
+            state = {**initial_state, 'file_path': args.file_path}
+        
+        if args.stream:
+            from src.graphs.streaming import JsonlSink, run_streaming
+            events = run_streaming(select_graph(args), state, [JsonlSink(args.stream)], config=config)
+            response = f"{events} events written to {args.stream}"
+        else:
+            response = select_graph(args).invoke(state, config=config)
+    print(response)
+    for tier, usage in usage_tracker.report().items():
+        print(f"{tier}: {usage['calls']} calls, {usage['escalations']} escalated, "
+              f"{usage['mean_seconds']:.1f}s mean latency, ${usage['cost']:.4f}")
+    print(f"Estimated LLM cost: ${usage_tracker.total_cost():.4f}")
+    prefix_cache = get_prefix_cache()
+    if isinstance(prefix_cache, GeminiPrefixCache):
+        # the local stand-in still sends the prefix: only the provider-side cache saves tokens
+        print(f"Cached prompt prefix tokens not re-sent: {prefix_cache.tokens_saved()}")
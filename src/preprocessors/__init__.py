@@ -1,11 +1,12 @@
 from .text_cleaners import clean_arabic_text_comprehensive
 from .text_checkers import ArabicLanguageDetector
 from .text_splitters import TextChunker
-from .metadata_remover import remove_book_metadata
+from .metadata_remover import remove_book_metadata, remove_book_metadata_batch
 
 __all__ = [
     'clean_arabic_text_comprehensive',
     'ArabicLanguageDetector', 
     'TextChunker',
-    'remove_book_metadata'
+    'remove_book_metadata',
+    'remove_book_metadata_batch'
 ]
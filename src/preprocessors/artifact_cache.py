@@ -0,0 +1,249 @@
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.preprocessors.text_splitters import TextChunker
+from src.schemas.data_classes import TextChunk
+
+
+# Bump when the on-disk layout or the meaning of a stage changes without a code change
+PREPROCESSING_VERSION = 1
+
+# Source files whose content is part of every artifact fingerprint
+PREPROCESSING_MODULES = ['text_checkers.py', 'text_cleaners.py', 'metadata_remover.py', 'text_splitters.py']
+
+# Parameters each stage depends on; a change to any of them invalidates that stage only
+STAGE_PARAMETERS = {
+    'language': [],
+    'cleaned': ['preserve_structure'],
+    'content': ['preserve_structure'],
+    'chunks': ['preserve_structure', 'chunk_size', 'chunk_overlap', 'separators'],
+}
+
+NO_CHAPTER = -1
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_fingerprint() -> str:
+    """Return a digest of the preprocessing source code and layout version."""
+    digest = hashlib.sha256(str(PREPROCESSING_VERSION).encode())
+    package_dir = Path(__file__).parent
+    for module in PREPROCESSING_MODULES:
+        digest.update((package_dir / module).read_bytes())
+    return digest.hexdigest()
+
+
+def stage_fingerprint(stage: str, params: Dict[str, Any], code_digest: Optional[str] = None) -> str:
+    """
+    Return the fingerprint of a stage's output for the given parameters.
+
+    Args:
+        stage: One of the keys of STAGE_PARAMETERS
+        params: Preprocessing parameters; only those the stage depends on are used
+        code_digest: code_fingerprint(), if already computed
+    """
+    relevant = {name: params[name] for name in STAGE_PARAMETERS[stage]}
+    payload = json.dumps([code_digest or code_fingerprint(), stage, relevant], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def preprocessing_params(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the parameters the preprocessing artifacts depend on for a preprocessing config."""
+    return {**config, 'separators': TextChunker.ARABIC_SEPARATORS}
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write data to path so readers only ever see the old or the complete new file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(temporary_path, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class ChunkStore:
+    """
+    Read-only, memory-mapped view over a list of chunks stored on disk.
+
+    The chunk texts are concatenated as UTF-8 in chunks.bin. chunks.idx holds the chunk
+    count followed by count + 1 byte offsets into chunks.bin and one chapter id per chunk,
+    all as little-endian 64-bit integers. A chunk is decoded only when it is accessed.
+    """
+
+    DATA_FILE = 'chunks.bin'
+    INDEX_FILE = 'chunks.idx'
+
+    def __init__(self, directory: str):
+        """
+        Open an existing chunk store.
+
+        Args:
+            directory: Directory holding chunks.bin and chunks.idx
+        """
+        self.directory = Path(directory)
+
+        index = array('q')
+        index.frombytes((self.directory / self.INDEX_FILE).read_bytes())
+        if sys.byteorder == 'big':
+            index.byteswap()
+
+        count = index[0]
+        self._offsets = index[1:count + 2]
+        self._chapter_ids = index[count + 2:]
+
+        self._file = open(self.directory / self.DATA_FILE, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else b''
+
+    @classmethod
+    def write(cls, directory: str, chunks: Iterable[TextChunk]) -> 'ChunkStore':
+        """
+        Write chunks to a new store and open it.
+
+        Args:
+            directory: Directory to write chunks.bin and chunks.idx into
+            chunks: The chunks to store, in order
+
+        Returns:
+            The opened chunk store
+        """
+        directory = Path(directory)
+
+        encoded = []
+        offsets = array('q', [0])
+        chapter_ids = array('q')
+        for chunk in chunks:
+            data = chunk.text.encode('utf-8')
+            encoded.append(data)
+            offsets.append(offsets[-1] + len(data))
+            chapter_ids.append(NO_CHAPTER if chunk.chapter_id is None else chunk.chapter_id)
+
+        index = array('q', [len(encoded)]) + offsets + chapter_ids
+        if sys.byteorder == 'big':
+            index.byteswap()
+
+        # The index is written last, so a store is only visible once complete
+        atomic_write_bytes(directory / cls.DATA_FILE, b''.join(encoded))
+        atomic_write_bytes(directory / cls.INDEX_FILE, index.tobytes())
+
+        return cls(directory)
+
+    def __len__(self) -> int:
+        return len(self._chapter_ids)
+
+    def __getitem__(self, index: int) -> TextChunk:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Chunk index out of range: {index}")
+
+        text = self._data[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+        chapter_id = self._chapter_ids[index]
+        return TextChunk(text=text, index=index, chapter_id=None if chapter_id == NO_CHAPTER else chapter_id)
+
+    def chapter_id(self, index: int) -> Optional[int]:
+        """Return the chapter id of a chunk without decoding its text."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Chunk index out of range: {index}")
+
+        chapter_id = self._chapter_ids[index]
+        return None if chapter_id == NO_CHAPTER else chapter_id
+
+    def __iter__(self) -> Iterator[TextChunk]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        """Release the memory map and the underlying file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> 'ChunkStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PreprocessingCache:
+    """
+    Content-addressed on-disk cache for the outputs of the preprocessing stages.
+
+    Artifacts live under <cache_dir>/<content hash>/ and are named after their stage and a
+    fingerprint of the preprocessing code and of the parameters that stage depends on.
+    """
+
+    def __init__(self, cache_dir: str = "resources/cache/preprocessing"):
+        """
+        Initialize the preprocessing cache.
+
+        Args:
+            cache_dir: Root directory of the cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self._code_fingerprint = code_fingerprint()
+
+    def fingerprint(self, stage: str, params: Dict[str, Any]) -> str:
+        """
+        Return the fingerprint of a stage for the given parameters.
+
+        Args:
+            stage: One of the keys of STAGE_PARAMETERS
+            params: Preprocessing parameters; only those the stage depends on are used
+        """
+        return stage_fingerprint(stage, params, self._code_fingerprint)
+
+    def artifact_path(self, content_hash: str, stage: str, params: Dict[str, Any], suffix: str = '') -> Path:
+        """Return the path of a stage's artifact for a given input file content."""
+        return self.cache_dir / content_hash / f'{stage}-{self.fingerprint(stage, params)}{suffix}'
+
+    def load_language(self, content_hash: str, params: Dict[str, Any]) -> Optional[bool]:
+        """Return the cached language check result, or None on a miss."""
+        path = self.artifact_path(content_hash, 'language', params, '.json')
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))['is_arabic']
+
+    def save_language(self, content_hash: str, params: Dict[str, Any], is_arabic: bool):
+        """Store the language check result."""
+        path = self.artifact_path(content_hash, 'language', params, '.json')
+        atomic_write_bytes(path, json.dumps({'is_arabic': is_arabic}).encode('utf-8'))
+
+    def load_text(self, content_hash: str, stage: str, params: Dict[str, Any]) -> Optional[str]:
+        """Return a cached text artifact ('cleaned' or 'content'), or None on a miss."""
+        path = self.artifact_path(content_hash, stage, params, '.txt')
+        if not path.exists():
+            return None
+        return path.read_text(encoding='utf-8')
+
+    def save_text(self, content_hash: str, stage: str, params: Dict[str, Any], text: str):
+        """Store a text artifact ('cleaned' or 'content')."""
+        path = self.artifact_path(content_hash, stage, params, '.txt')
+        atomic_write_bytes(path, text.encode('utf-8'))
+
+    def has_chunks(self, content_hash: str, params: Dict[str, Any]) -> bool:
+        """Return True if the chunks for this content and parameters are cached."""
+        return (self.artifact_path(content_hash, 'chunks', params) / ChunkStore.INDEX_FILE).exists()
+
+    def load_chunks(self, content_hash: str, params: Dict[str, Any]) -> Optional[ChunkStore]:
+        """Return the cached chunk store, or None on a miss."""
+        if not self.has_chunks(content_hash, params):
+            return None
+        return ChunkStore(self.artifact_path(content_hash, 'chunks', params))
+
+    def save_chunks(self, content_hash: str, params: Dict[str, Any], chunks: List[TextChunk]) -> ChunkStore:
+        """Store the chunks and return them as an opened chunk store."""
+        return ChunkStore.write(self.artifact_path(content_hash, 'chunks', params), chunks)
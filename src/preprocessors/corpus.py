@@ -0,0 +1,195 @@
+"""
+Parallel preprocessing of a corpus of books.
+
+Runs language detection, cleaning, metadata removal and chunking over every .txt file
+of a directory with a process pool and stores the results in the preprocessing cache,
+so later analysis runs of those books start directly with the LLM work.
+
+Usage:
+    python -m src.preprocessors.corpus resources/texts --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.configs import preprocessing_config
+from src.preprocessors.artifact_cache import PreprocessingCache, atomic_write_bytes, hash_file, preprocessing_params
+from src.preprocessors.metadata_remover import remove_book_metadata
+from src.preprocessors.text_checkers import ArabicLanguageDetector
+from src.preprocessors.text_cleaners import clean_arabic_text_comprehensive
+from src.preprocessors.text_splitters import TextChunker
+
+
+MANIFEST_FILE = 'corpus_manifest.json'
+
+# Per-worker state, created once by _init_worker in every pool process
+_worker_detector: Optional[ArabicLanguageDetector] = None
+_worker_cache: Optional[PreprocessingCache] = None
+_worker_params: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(cache_dir: str, params: Dict[str, Any]):
+    """Create the worker's detector and cache, loading the language models once per process."""
+    global _worker_detector, _worker_cache, _worker_params
+
+    _worker_detector = ArabicLanguageDetector()
+    _worker_detector.check_text("تهيئة نماذج كشف اللغة")
+    _worker_cache = PreprocessingCache(cache_dir)
+    _worker_params = params
+
+
+def _preprocess_worker(file_path: str) -> Dict[str, Any]:
+    """Pool entry point: preprocess one book with the worker's detector and cache."""
+    try:
+        return preprocess_book(file_path, _worker_cache, _worker_params, _worker_detector)
+    except Exception as e:
+        return {'file_path': file_path, 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+
+def preprocess_book(file_path: str, cache: PreprocessingCache, params: Dict[str, Any],
+                    detector: Optional[ArabicLanguageDetector] = None) -> Dict[str, Any]:
+    """
+    Run the whole preprocessing of one book, reusing and filling the cache stage by stage.
+
+    Args:
+        file_path: Path of the book's .txt file
+        cache: Cache the artifacts are read from and written to
+        params: Preprocessing parameters, see preprocessing_params
+        detector: Language detector to reuse; a new one is created if omitted
+
+    Returns:
+        Dictionary describing the result (status, content hash, chunk count, timing)
+    """
+    started = time.perf_counter()
+    content_hash = hash_file(file_path)
+    result = {'file_path': file_path, 'content_hash': content_hash}
+
+    if cache.has_chunks(content_hash, params):
+        with cache.load_chunks(content_hash, params) as store:
+            result.update(status='cached', is_arabic=True, chunk_count=len(store))
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    with open(file_path, 'r', encoding='utf-8') as file:
+        raw_text = file.read()
+
+    is_arabic = cache.load_language(content_hash, params)
+    if is_arabic is None:
+        is_arabic = (detector or ArabicLanguageDetector()).check_text(raw_text)
+        cache.save_language(content_hash, params, is_arabic)
+
+    if not is_arabic:
+        result.update(status='skipped', is_arabic=False, chunk_count=0)
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    cleaned_text = cache.load_text(content_hash, 'cleaned', params)
+    if cleaned_text is None:
+        cleaned_text = clean_arabic_text_comprehensive(raw_text, preserve_structure=params['preserve_structure'])
+        cache.save_text(content_hash, 'cleaned', params, cleaned_text)
+
+    content_text = cache.load_text(content_hash, 'content', params)
+    if content_text is None:
+        content_text = remove_book_metadata(cleaned_text)
+        cache.save_text(content_hash, 'content', params, content_text)
+
+    chunker = TextChunker(chunk_size=params['chunk_size'], chunk_overlap=params['chunk_overlap'])
+    chunks = chunker.chunk_text_records(content_text, preserve_structure=params['preserve_structure'])
+    cache.save_chunks(content_hash, params, chunks).close()
+
+    result.update(status='processed', is_arabic=True, chunk_count=len(chunks))
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def print_progress(done: int, total: int, result: Dict[str, Any], elapsed: float):
+    """Default progress reporter: one line per finished book."""
+    name = Path(result['file_path']).name
+    rate = done / elapsed if elapsed else 0.0
+    detail = result.get('error') or f"{result.get('chunk_count', 0)} chunks"
+    print(f"[{done}/{total}] {result['status']:<9} {name} ({detail}) | {rate:.2f} books/s")
+
+
+def preprocess_corpus(input_dir: str, cache_dir: Optional[str] = None, config: Optional[Dict[str, Any]] = None,
+                      max_workers: Optional[int] = None,
+                      progress: Optional[Callable[[int, int, Dict[str, Any], float], None]] = print_progress) -> List[Dict[str, Any]]:
+    """
+    Preprocess every .txt file of a directory in parallel.
+
+    Each worker process keeps its own language detector, so the langid and langdetect
+    models are loaded once per worker. Artifacts are written atomically into the cache,
+    and a manifest of the results is written to the cache directory.
+
+    Args:
+        input_dir: Directory searched (recursively) for .txt files
+        cache_dir: Preprocessing cache directory; defaults to preprocessing_config['cache_dir']
+        config: Preprocessing config; defaults to preprocessing_config
+        max_workers: Number of worker processes; defaults to the number of CPUs
+        progress: Called after every finished book with (done, total, result, elapsed seconds)
+
+    Returns:
+        List of per-book results, in input order
+    """
+    config = config or preprocessing_config
+    cache_dir = cache_dir or config['cache_dir']
+    if not cache_dir:
+        raise ValueError("A cache directory is required to store the preprocessed corpus")
+
+    params = preprocessing_params(config)
+    file_paths = sorted(str(path) for path in Path(input_dir).rglob('*.txt'))
+    results = {}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(cache_dir, params)) as executor:
+        futures = {executor.submit(_preprocess_worker, file_path): file_path for file_path in file_paths}
+
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if progress:
+                progress(len(results), len(file_paths), result, time.perf_counter() - started)
+
+    ordered_results = [results[file_path] for file_path in file_paths]
+
+    manifest_path = Path(cache_dir) / MANIFEST_FILE
+    atomic_write_bytes(manifest_path, json.dumps(ordered_results, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    return ordered_results
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Preprocess a directory of books in parallel.")
+    parser.add_argument('input_dir', help="Directory containing the books as .txt files")
+    parser.add_argument('--cache-dir', default=preprocessing_config['cache_dir'], help="Preprocessing cache directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--chunk-size', type=int, default=preprocessing_config['chunk_size'])
+    parser.add_argument('--chunk-overlap', type=int, default=preprocessing_config['chunk_overlap'])
+    parser.add_argument('--preserve-structure', action='store_true', default=preprocessing_config['preserve_structure'],
+                        help="Keep paragraph/chapter breaks and align chunks to them")
+    args = parser.parse_args()
+
+    config = {
+        **preprocessing_config,
+        'cache_dir': args.cache_dir,
+        'chunk_size': args.chunk_size,
+        'chunk_overlap': args.chunk_overlap,
+        'preserve_structure': args.preserve_structure,
+    }
+
+    started = time.perf_counter()
+    results = preprocess_corpus(args.input_dir, config=config, max_workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    failed = [result for result in results if result['status'] == 'error']
+    print(f"(📚) Preprocessed {len(results)} books in {elapsed:.1f}s with {args.workers} workers, {len(failed)} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,44 @@
-def remove_book_metadata(text: str) -> str:
+import re
+from typing import Iterable, List
+
+# Markers that signal the start of the literary content
+START_KEYWORDS = ['فصل', 'أول', 'جزء']
+
+# Subset of the content markers that open a new chapter or part
+CHAPTER_MARKERS = ['فصل', 'جزء']
+
+METADATA_KEYWORDS = [
+    'نشر', 'ترجمة', 'شركة', 'صحافة', 'طباعة', 'توزيع', 'موافقة', 
+    'ناشر', 'غلاف', 'تأليف', 'مركز', 'دار', 'حقوق', 'محفوظة', 
+    'كاتب', 'أديب', 'مؤلف', 'رقم', 'تاريخ', 'رواية', 'كتاب', 
+    'نسخة', 'غلاف', 'قانون', 'شركة', 'مترجم', 'طبعة', 'تحرير', 
+    'محرر', 'إهداء', 'فاكس'
+]
+
+SEARCH_WINDOW_SIZE = 2000
+MAX_METADATA_LINE_LENGTH = 80
+
+
+def _compile_alternation(keywords: List[str], overlapping: bool = False) -> re.Pattern:
+    """
+    Compile keywords into a single alternation, longest first.
+    With overlapping=True the alternation is wrapped in a lookahead so every
+    occurrence is reported, including those overlapping another keyword.
+    """
+    unique_keywords = sorted(set(keywords), key=len, reverse=True)
+    alternation = '|'.join(re.escape(keyword) for keyword in unique_keywords)
+    if overlapping:
+        return re.compile(f'(?=({alternation}))')
+    return re.compile(alternation)
+
+
+START_PATTERN = _compile_alternation(START_KEYWORDS)
+METADATA_PATTERN = _compile_alternation(METADATA_KEYWORDS, overlapping=True)
+WORD_PATTERN = re.compile(r'\S+')
+
+
+def remove_book_metadata(text: str, search_window_size: int = SEARCH_WINDOW_SIZE,
+                         max_metadata_line_length: int = MAX_METADATA_LINE_LENGTH) -> str:
     """
     Remove book metadata from the beginning of Arabic text.
     
@@ -11,89 +51,89 @@ def remove_book_metadata(text: str) -> str:
     - Metadata keywords are only considered valid if they appear on short lines (≤80 chars)
     - This prevents false positives when metadata words appear in long prose paragraphs
     
+    Each stage is a single regex scan over the search window, so the cost is linear
+    in the window size regardless of the number of keywords or lines.
+    
     Args:
         text (str): The full text of the book
+        search_window_size (int): Number of leading characters searched for markers
+        max_metadata_line_length (int): Longest (stripped) line that may hold metadata
         
     Returns:
         str: The text with metadata removed, or the original text if no metadata is detected
     """
     
-    # Step 1: Configuration
-    SEARCH_WINDOW_SIZE = 2000
-    MAX_METADATA_LINE_LENGTH = 80
-    METADATA_KEYWORDS = [
-        'نشر', 'ترجمة', 'شركة', 'صحافة', 'طباعة', 'توزيع', 'موافقة', 
-        'ناشر', 'غلاف', 'تأليف', 'مركز', 'دار', 'حقوق', 'محفوظة', 
-        'كاتب', 'أديب', 'مؤلف', 'رقم', 'تاريخ', 'رواية', 'كتاب', 
-        'نسخة', 'غلاف', 'قانون', 'شركة', 'مترجم', 'طبعة', 'تحرير', 
-        'محرر', 'إهداء', 'فاكس'
-    ]
-    START_KEYWORDS = ['فصل', 'أول', 'جزء']
-    
-    # Step 2: Isolate the Search Area and Split into Lines
-    search_window = text[:SEARCH_WINDOW_SIZE]
-    lines = search_window.split('\n')
-    
-    # Step 3: Find the First True Content Marker (PRIORITY)
-    first_start_pos = -1
-    
-    for keyword in START_KEYWORDS:
-        pos = search_window.find(keyword)
-        if pos != -1:
-            if first_start_pos == -1:
-                first_start_pos = pos
-            else:
-                first_start_pos = min(first_start_pos, pos)
+    # Step 1: Isolate the Search Area
+    search_window = text[:search_window_size]
     
-    # Step 4: If no content marker found, then look for metadata
-    last_metadata_pos = -1
-    
-    if first_start_pos == -1:
-        # Only check for metadata if no content markers were found
-        for line in lines:
-            # Check if this line contains a metadata keyword
-            for keyword in METADATA_KEYWORDS:
-                if keyword in line:
-                    # Check if the line is short enough to be considered metadata
-                    if len(line.strip()) <= MAX_METADATA_LINE_LENGTH:
-                        # Find the position of this keyword in the original search_window
-                        line_start_pos = search_window.find(line)
-                        keyword_pos_in_line = line.find(keyword)
-                        absolute_keyword_pos = line_start_pos + keyword_pos_in_line
-                        
-                        # Update last_metadata_pos if this is the latest valid metadata tag
-                        if absolute_keyword_pos > last_metadata_pos:
-                            last_metadata_pos = absolute_keyword_pos
-    
-    # Step 5: Determine the Final Slice Index
-    final_slice_index = None
-    
-    # Primary Case: Content marker found
-    if first_start_pos != -1:
+    # Step 2: Find the First True Content Marker (PRIORITY)
+    start_match = START_PATTERN.search(search_window)
+    if start_match:
         # Start from the exact character where the content marker begins
-        final_slice_index = first_start_pos
+        return text[start_match.start():]
     
-    # Fallback Case: Metadata found but no clear content marker
-    elif last_metadata_pos != -1:
-        # Start from the next character after the last metadata keyword
-        # Find the end of the metadata keyword
-        remaining_text = search_window[last_metadata_pos:]
-        words = remaining_text.split()
-        if words:
-            # Find the end of the first word (which should be the metadata keyword)
-            first_word_end = remaining_text.find(words[0]) + len(words[0])
-            final_slice_index = last_metadata_pos + first_word_end
-        else:
-            # If no words found, start from the next character
-            final_slice_index = last_metadata_pos + 1
+    # Step 3: Find the last metadata keyword that sits on a short line
+    last_metadata_pos = _find_last_metadata_position(search_window, max_metadata_line_length)
     
     # Worst Case: No markers found
-    else:
+    if last_metadata_pos == -1:
         # Return original text without modification
         return text
     
-    # Step 6: Return the Result
-    if final_slice_index is not None:
-        return text[final_slice_index:]
+    # Fallback Case: Start from the next character after the word holding the last metadata keyword
+    word_match = WORD_PATTERN.match(search_window, last_metadata_pos)
+    if word_match:
+        return text[word_match.end():]
+    return text[last_metadata_pos + 1:]
+
+
+def _find_last_metadata_position(search_window: str, max_metadata_line_length: int) -> int:
+    """
+    Return the absolute position of the last metadata keyword found on a short line, or -1.
     
-    return text 
\ No newline at end of file
+    Within a line the first occurrence of each keyword is considered, and the latest of
+    those wins. Line boundaries are tracked while scanning the keyword matches in order,
+    so repeated lines are attributed to their own offsets.
+    """
+    last_metadata_pos = -1
+    line_end = -1
+    line_is_short = False
+    seen_keywords = set()
+    
+    for match in METADATA_PATTERN.finditer(search_window):
+        position = match.start()
+        
+        # Advance to the line holding this match
+        if position >= line_end:
+            line_start = search_window.rfind('\n', 0, position) + 1
+            line_end = search_window.find('\n', position)
+            if line_end == -1:
+                line_end = len(search_window)
+            line_is_short = len(search_window[line_start:line_end].strip()) <= max_metadata_line_length
+            seen_keywords = set()
+        
+        keyword = match.group(1)
+        if line_is_short and keyword not in seen_keywords:
+            last_metadata_pos = position
+        seen_keywords.add(keyword)
+    
+    return last_metadata_pos
+
+
+def remove_book_metadata_batch(texts: Iterable[str], search_window_size: int = SEARCH_WINDOW_SIZE,
+                               max_metadata_line_length: int = MAX_METADATA_LINE_LENGTH) -> List[str]:
+    """
+    Remove book metadata from every text of a corpus.
+    
+    Args:
+        texts: The full texts of the books
+        search_window_size: Number of leading characters searched for markers
+        max_metadata_line_length: Longest (stripped) line that may hold metadata
+        
+    Returns:
+        List of texts with metadata removed, in the same order as the input
+    """
+    return [
+        remove_book_metadata(text, search_window_size, max_metadata_line_length)
+        for text in texts
+    ]
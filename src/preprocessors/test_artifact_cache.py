@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed preprocessing artifact cache.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.configs import mention_index_config, preprocessing_config
+from src.graphs.nodes import regular_nodes
+from src.preprocessors.artifact_cache import ChunkStore, PreprocessingCache, hash_file
+from src.schemas.data_classes import TextChunk
+
+
+PARAMS = {
+    'preserve_structure': True,
+    'chunk_size': 100,
+    'chunk_overlap': 0,
+    'separators': ["\n\n", "\n", " ", ""],
+}
+
+
+def test_chunk_store_round_trip():
+    """Chunks are read back lazily with their text, index and chapter id."""
+    chunks = [
+        TextChunk(text="الفصل الاول", index=0, chapter_id=0),
+        TextChunk(text="كان احمد يمشي في الشارع.", index=1, chapter_id=None),
+        TextChunk(text="", index=2, chapter_id=3),
+    ]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store = ChunkStore.write(directory, chunks)
+        
+        assert len(store) == 3
+        assert list(store) == chunks
+        assert store[1].text == "كان احمد يمشي في الشارع."
+        store.close()
+        
+        with ChunkStore.write(Path(directory) / "empty", []) as empty_store:
+            assert list(empty_store) == []
+        assert empty_store._file.closed
+
+
+def test_cache_keys_depend_on_content_and_stage_parameters():
+    """A stage is only invalidated by the content and the parameters it depends on."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PreprocessingCache(directory)
+        book = Path(directory) / "book.txt"
+        book.write_text("نص الرواية", encoding='utf-8')
+        content_hash = hash_file(str(book))
+        
+        assert cache.load_language(content_hash, PARAMS) is None
+        cache.save_language(content_hash, PARAMS, True)
+        cache.save_text(content_hash, 'cleaned', PARAMS, "نص الروايه")
+        cache.save_chunks(content_hash, PARAMS, [TextChunk(text="نص", index=0, chapter_id=0)]).close()
+        
+        resized = {**PARAMS, 'chunk_size': 200}
+        assert cache.load_language(content_hash, resized) is True
+        assert cache.load_text(content_hash, 'cleaned', resized) == "نص الروايه"
+        assert cache.has_chunks(content_hash, PARAMS)
+        assert not cache.has_chunks(content_hash, resized)
+        
+        flattened = {**PARAMS, 'preserve_structure': False}
+        assert cache.load_text(content_hash, 'cleaned', flattened) is None
+        
+        book.write_text("نص اخر", encoding='utf-8')
+        assert hash_file(str(book)) != content_hash
+
+
+def test_chunker_closes_the_chunk_store(tmp_path, monkeypatch):
+    """The chunk store opened by the chunker node is closed once its chunks are consumed."""
+    monkeypatch.setitem(preprocessing_config, 'cache_dir', str(tmp_path / 'cache'))
+    monkeypatch.setitem(mention_index_config, 'db_path', None)
+    regular_nodes._get_preprocessing_cache.cache_clear()
+    closed = []
+    monkeypatch.setattr(ChunkStore, 'close', lambda store: closed.append(store.directory))
+    book = tmp_path / 'book.txt'
+    book.write_text("كان احمد يمشي في الشارع. " * 20, encoding='utf-8')
+    
+    for _ in range(2):
+        state = {'file_path': str(book)}
+        state.update(regular_nodes.language_checker(state))
+        if not state['chunks_cached']:
+            state.update(regular_nodes.cleaner(state))
+            state.update(regular_nodes.metadata_remover(state))
+        state.update(regular_nodes.chunker(state))
+        
+        assert not closed
+        chunks = list(state['chunk_generator'])
+        assert chunks and len(closed) == 1
+        closed.clear()
+    regular_nodes._get_preprocessing_cache.cache_clear()
+
+
+if __name__ == "__main__":
+    test_chunk_store_round_trip()
+    test_cache_keys_depend_on_content_and_stage_parameters()
+    print("✓ All artifact cache tests passed")
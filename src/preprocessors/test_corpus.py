@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for the parallel corpus preprocessing.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.configs import preprocessing_config
+from src.preprocessors.corpus import MANIFEST_FILE, preprocess_corpus
+
+
+ARABIC_BOOK = "دار النشر\nالفصل الاول\n" + "كان احمد يمشي في الشارع الطويل مع صديقه علي. " * 200
+ENGLISH_BOOK = "This is a short English story about a walk in the park. " * 50
+
+
+def test_preprocess_corpus():
+    """Arabic books are chunked into the cache, other books are skipped, re-runs hit the cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        books = Path(directory) / "books"
+        books.mkdir()
+        (books / "a.txt").write_text(ARABIC_BOOK, encoding='utf-8')
+        (books / "b.txt").write_text(ARABIC_BOOK + "نهايه", encoding='utf-8')
+        (books / "c.txt").write_text(ENGLISH_BOOK, encoding='utf-8')
+        
+        config = {**preprocessing_config, 'cache_dir': str(Path(directory) / "cache"), 'chunk_size': 1000}
+        
+        results = preprocess_corpus(str(books), config=config, max_workers=2, progress=None)
+        
+        assert [result['status'] for result in results] == ['processed', 'processed', 'skipped']
+        assert all(result['chunk_count'] > 1 for result in results[:2])
+        
+        manifest = json.loads((Path(config['cache_dir']) / MANIFEST_FILE).read_text(encoding='utf-8'))
+        assert [entry['file_path'] for entry in manifest] == [result['file_path'] for result in results]
+        
+        rerun = preprocess_corpus(str(books), config=config, max_workers=2, progress=None)
+        
+        assert [result['status'] for result in rerun] == ['cached', 'cached', 'skipped']
+        assert [result['chunk_count'] for result in rerun] == [result['chunk_count'] for result in results]
+
+
+if __name__ == "__main__":
+    test_preprocess_corpus()
+    print("✓ Corpus preprocessing test passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the structure-preserving cleaning and chunking mode.
+Tests that chunks follow paragraph and chapter boundaries.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.preprocessors.text_cleaners import clean_arabic_text_comprehensive
+from src.preprocessors.text_splitters import TextChunker
+
+
+SAMPLE_TEXT = """مقدمة قصيرة عن الرواية.
+
+الفصل الأول
+كان   أحمد يمشي في الشارع.
+
+ثم قابل صديقه علي.
+
+
+الفصل الثاني
+عاد أحمد إلى البيت.
+"""
+
+
+def test_structure_preserving_cleaning():
+    """Line and paragraph breaks survive cleaning, inner whitespace is collapsed."""
+    cleaned = clean_arabic_text_comprehensive(SAMPLE_TEXT, preserve_structure=True)
+    
+    assert "\n\n" in cleaned
+    assert "\n\n\n" not in cleaned
+    assert "كان احمد" in cleaned
+    assert "\n" not in clean_arabic_text_comprehensive(SAMPLE_TEXT)
+
+
+def test_chunks_do_not_straddle_chapters():
+    """Every chunk belongs to exactly one chapter, and chapters are numbered in order."""
+    cleaned = clean_arabic_text_comprehensive(SAMPLE_TEXT, preserve_structure=True)
+    chunker = TextChunker(chunk_size=1000, chunk_overlap=0)
+    
+    chunks = chunker.chunk_text_structured(cleaned)
+    
+    assert [chunk.chapter_id for chunk in chunks] == [0, 1, 2]
+    assert [chunk.index for chunk in chunks] == [0, 1, 2]
+    assert chunks[1].text.startswith("الفصل الاول")
+    assert "علي" in chunks[1].text
+    assert chunks[2].text.startswith("الفصل الثاني")
+
+
+def test_paragraphs_starting_with_a_marker_are_not_headings():
+    """Only short lines of their own with a number or an ordinal after the marker start a chapter."""
+    text = clean_arabic_text_comprehensive("""الفصل الأول
+
+فصل بينهما القاضي بالعدل.
+
+جزء من الليل مضى وهو ساهر.
+
+الفصل الأول من حياته كان صعبا.
+الفصل الثاني
+
+الجزء ٣: العودة
+عاد أحمد إلى البيت.
+""", preserve_structure=True)
+    chunker = TextChunker(chunk_size=1000, chunk_overlap=0)
+    
+    chapters = [text[start:end].strip() for start, end in chunker.split_chapters(text)]
+    
+    assert len(chapters) == 2
+    assert chapters[0].startswith("الفصل الاول\n\nفصل بينهما")
+    assert chapters[0].endswith("الفصل الثاني")
+    assert chapters[1].startswith("الجزء 3: العوده")
+
+
+def test_paragraphs_are_packed_up_to_chunk_size():
+    """Whole paragraphs are packed together and oversized paragraphs are split."""
+    paragraphs = ["جمله رقم %d في الفقره." % i for i in range(20)]
+    text = "الفصل الاول\n\n" + "\n\n".join(paragraphs) + "\n\n" + "كلمه " * 100
+    chunker = TextChunker(chunk_size=120, chunk_overlap=0)
+    
+    chunks = chunker.chunk_text_structured(text)
+    
+    assert all(len(chunk.text) <= 120 for chunk in chunks)
+    for paragraph in paragraphs:
+        assert any(paragraph in chunk.text for chunk in chunks)
+    assert {chunk.chapter_id for chunk in chunks} == {0}
+
+
+if __name__ == "__main__":
+    test_structure_preserving_cleaning()
+    test_chunks_do_not_straddle_chapters()
+    test_paragraphs_starting_with_a_marker_are_not_headings()
+    test_paragraphs_are_packed_up_to_chunk_size()
+    print("✓ All structured chunking tests passed")
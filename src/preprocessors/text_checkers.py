@@ -1,8 +1,5 @@
 import re
-import langid
-from langdetect import detect_langs, DetectorFactory, LangDetectException
 
-DetectorFactory.seed = 0  # For consistent langdetect results
 
 class ArabicLanguageDetector:
     def __init__(self, thresholds=None):
@@ -34,10 +31,16 @@ class ArabicLanguageDetector:
         return percent >= self.thresholds["manual"], percent * 100
 
     def is_arabic_langid(self, text):
+        import langid  # Imported on first use; loading the model is slow
+        
         lang, score = langid.classify(text)
         return (lang == 'ar'), lang
 
     def is_arabic_langdetect(self, text):
+        # Imported on first use to keep module import cheap
+        from langdetect import detect_langs, DetectorFactory, LangDetectException
+        DetectorFactory.seed = 0  # For consistent langdetect results
+        
         try:
             langs = detect_langs(text)
             if not langs:
@@ -1,5 +1,4 @@
 import re
-import os
 
 def normalize_arabic_characters(text):
     """
@@ -74,42 +73,55 @@ def normalize_arabic_punctuation(text):
     return text
 
 
-def normalize_arabic_spacing(text):
+def normalize_arabic_spacing(text, preserve_newlines=False):
     """
     Normalize spacing around Arabic text elements.
+    
+    When preserve_newlines is True only horizontal whitespace is touched, so
+    line and paragraph breaks survive.
     """
+    space = r'[^\S\n]' if preserve_newlines else r'\s'
+    
     # Remove extra spaces around punctuation
-    text = re.sub(r'\s+([،؛؟!])', r'\1', text)
-    text = re.sub(r'([،؛؟!])\s+', r'\1 ', text)
+    text = re.sub(space + r'+([،؛؟!])', r'\1', text)
+    text = re.sub(r'([،؛؟!])' + space + r'+', r'\1 ', text)
     
     # Normalize spacing around numbers
-    text = re.sub(r'(\d+)\s+(\d+)', r'\1\2', text)
+    text = re.sub(r'(\d+)' + space + r'+(\d+)', r'\1\2', text)
     
     # Remove spaces before punctuation marks
-    text = re.sub(r'\s+([،؛؟!])', r'\1', text)
+    text = re.sub(space + r'+([،؛؟!])', r'\1', text)
     
     return text
 
-def clean_arabic_text_comprehensive(text):
+def normalize_structure_whitespace(text):
+    """
+    Collapse whitespace inside lines while keeping line and paragraph breaks.
+    Runs of blank lines are reduced to a single empty line (paragraph break).
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+def clean_arabic_text_comprehensive(text, preserve_structure=False):
     """
     Comprehensive Arabic text cleaning with all normalizations.
+    
+    Args:
+        text: The raw text to clean
+        preserve_structure: Keep line and paragraph breaks instead of collapsing
+            all whitespace, so chapters and paragraphs can be used for chunking
     """
     # Apply all normalizations in order
-    text = re.sub(r'\s+', ' ', text).strip()  # Basic cleaning
+    if preserve_structure:
+        text = normalize_structure_whitespace(text)  # Basic cleaning, keeping breaks
+    else:
+        text = re.sub(r'\s+', ' ', text).strip()  # Basic cleaning
     text = normalize_arabic_characters(text)  # Character normalization
     text = normalize_arabic_numbers(text)  # Number normalization
     text = normalize_arabic_punctuation(text)  # Punctuation normalization
-    text = normalize_arabic_spacing(text)  # Spacing normalization
+    text = normalize_arabic_spacing(text, preserve_newlines=preserve_structure)  # Spacing normalization
     
     return text
-
-
-
-test_text = "resources/texts/01- رواية أرض الإله - احمد مراد_djvu.txt"
-with open(test_text, 'r', encoding='utf-8') as file:
-    text = file.read()
-    save_to_path = "resources/texts/cleaned/أرض الإله_cleaned.txt"
-    #create the directory if it doesn't exist
-    os.makedirs(os.path.dirname(save_to_path), exist_ok=True)
-    with open(save_to_path, 'w', encoding='utf-8') as file:
-        file.write(clean_arabic_text_comprehensive(text))
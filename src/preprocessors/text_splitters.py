@@ -1,12 +1,23 @@
-from langchain.text_splitter import (
-    RecursiveCharacterTextSplitter,
-    CharacterTextSplitter,
-    TokenTextSplitter,
-    MarkdownHeaderTextSplitter,
-    HTMLHeaderTextSplitter,
-    SentenceTransformersTokenTextSplitter
+from typing import List, Optional, Dict, Any, Tuple
+import re
+from src.preprocessors.metadata_remover import CHAPTER_MARKERS
+from src.schemas.data_classes import TextChunk
+
+
+# A chapter heading is a short line of its own, after a blank line or at the start of the text,
+# made of a chapter marker (optionally with the article), a number or an ordinal, and an optional
+# title; a line ending like a sentence is a paragraph starting with the marker word
+MAX_HEADING_LINE_LENGTH = 80
+CHAPTER_ORDINALS = ['اول', 'أول', 'ثاني', 'ثالث', 'رابع', 'خامس', 'سادس', 'سابع', 'ثامن', 'تاسع', 'عاشر',
+                    'حادي', 'اخير', 'أخير']
+CHAPTER_HEADING_PATTERN = re.compile(
+    r'(?:\A\s*|\n[^\S\n]*\n\s*)'
+    r'(?P<heading>(?:ال)?(?:' + '|'.join(CHAPTER_MARKERS) + r')[^\S\n]+'
+    r'(?:[0-9٠-٩]+|ال(?:' + '|'.join(CHAPTER_ORDINALS) + r'))\b'
+    r'(?:[^\n]{0,' + str(MAX_HEADING_LINE_LENGTH) + r'}[^\s.!?؟…])?)[^\S\n]*$',
+    re.MULTILINE
 )
-from typing import List, Optional, Dict, Any
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\n[^\S\n]*\n\s*')
 
 
 class TextChunker:
@@ -14,24 +25,46 @@ class TextChunker:
     A utility class for chunking text using various LangChain text splitters.
     """
     
+    # Custom separators optimized for Arabic text
+    ARABIC_SEPARATORS = [
+        "\n\n",  # Paragraph breaks
+        "\n",    # Line breaks
+        ". ",    # Sentence endings
+        "؟ ",    # Question mark
+        "! ",    # Exclamation mark
+        "، ",    # Arabic comma
+        "؛ ",    # Arabic semicolon
+        " ",     # Space
+        ""       # Character level
+    ]
+    
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
         """
         Initialize the text chunker with default parameters.
         
+        The LangChain splitters are imported on first use, so creating a chunker is cheap.
+        
         Args:
             chunk_size: Maximum size of each chunk
             chunk_overlap: Overlap between consecutive chunks
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        
-        # Initialize the default recursive splitter
-        self.recursive_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        self._recursive_splitter = None
+    
+    @property
+    def recursive_splitter(self):
+        """The default recursive splitter, created on first use."""
+        if self._recursive_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            
+            self._recursive_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", " ", ""]
+            )
+        return self._recursive_splitter
     
     def chunk_text_recursive(self, text: str) -> List[str]:
         """
@@ -56,6 +89,8 @@ class TextChunker:
         Returns:
             List of text chunks
         """
+        from langchain.text_splitter import CharacterTextSplitter
+        
         splitter = CharacterTextSplitter(
             separator=separator,
             chunk_size=self.chunk_size,
@@ -75,6 +110,8 @@ class TextChunker:
         Returns:
             List of text chunks
         """
+        from langchain.text_splitter import TokenTextSplitter
+        
         splitter = TokenTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
@@ -95,6 +132,8 @@ class TextChunker:
         Returns:
             List of text chunks
         """
+        from langchain.text_splitter import SentenceTransformersTokenTextSplitter
+        
         splitter = SentenceTransformersTokenTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
@@ -112,25 +151,113 @@ class TextChunker:
         Returns:
             List of text chunks
         """
-        # Custom separators optimized for Arabic text
-        arabic_separators = [
-            "\n\n",  # Paragraph breaks
-            "\n",    # Line breaks
-            ". ",    # Sentence endings
-            "؟ ",    # Question mark
-            "! ",    # Exclamation mark
-            "، ",    # Arabic comma
-            "؛ ",    # Arabic semicolon
-            " ",     # Space
-            ""       # Character level
-        ]
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         
         arabic_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
             length_function=len,
-            separators=arabic_separators
+            separators=self.ARABIC_SEPARATORS
         )
         
         return arabic_splitter.split_text(text)
-    
\ No newline at end of file
+    
+    def chunk_text_records(self, text: str, preserve_structure: bool = False) -> List[TextChunk]:
+        """
+        Split Arabic text into indexed chunk records.
+        
+        Args:
+            text: The Arabic text to split
+            preserve_structure: Use chunk_text_structured (text cleaned with preserve_structure=True)
+                instead of chunk_text_arabic_optimized
+            
+        Returns:
+            List of chunks tagged with their index and, in structured mode, their chapter id
+        """
+        if preserve_structure:
+            return self.chunk_text_structured(text)
+        
+        return [
+            TextChunk(text=chunk, index=index, chapter_id=None)
+            for index, chunk in enumerate(self.chunk_text_arabic_optimized(text))
+        ]
+    
+    def split_chapters(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find the chapter spans of a structure-preserving cleaned text.
+        
+        A new chapter starts at every chapter heading line (e.g. "الفصل الأول", "جزء 2") that
+        follows a blank line; a paragraph merely starting with "فصل" or "جزء" is not a heading.
+        Text before the first heading, if any, is returned as its own chapter.
+        
+        Args:
+            text: Text cleaned with preserve_structure=True
+            
+        Returns:
+            List of (start, end) character offsets, one per chapter
+        """
+        boundaries = [0] + [match.start('heading') for match in CHAPTER_HEADING_PATTERN.finditer(text)] + [len(text)]
+        
+        spans = []
+        for start, end in zip(boundaries, boundaries[1:]):
+            if text[start:end].strip():
+                spans.append((start, end))
+        return spans
+    
+    def chunk_text_structured(self, text: str) -> List[TextChunk]:
+        """
+        Split Arabic text along its chapter and paragraph boundaries.
+        
+        Whole paragraphs are packed into chunks of up to chunk_size characters and a chunk
+        never straddles a chapter boundary. Overlap is only applied when a single paragraph
+        is longer than chunk_size and has to be split with chunk_text_arabic_optimized.
+        
+        Args:
+            text: Text cleaned with preserve_structure=True
+            
+        Returns:
+            List of chunks tagged with their index and chapter id
+        """
+        chunks = []
+        
+        for chapter_id, (chapter_start, chapter_end) in enumerate(self.split_chapters(text)):
+            group_start = group_end = None
+            
+            for paragraph_start, paragraph_end in self._paragraph_spans(text, chapter_start, chapter_end):
+                if group_start is not None and paragraph_end - group_start > self.chunk_size:
+                    chunks.append(TextChunk(text=text[group_start:group_end], index=len(chunks), chapter_id=chapter_id))
+                    group_start = None
+                
+                if paragraph_end - paragraph_start > self.chunk_size:
+                    for piece in self.chunk_text_arabic_optimized(text[paragraph_start:paragraph_end]):
+                        chunks.append(TextChunk(text=piece, index=len(chunks), chapter_id=chapter_id))
+                    continue
+                
+                if group_start is None:
+                    group_start = paragraph_start
+                group_end = paragraph_end
+            
+            if group_start is not None:
+                chunks.append(TextChunk(text=text[group_start:group_end], index=len(chunks), chapter_id=chapter_id))
+        
+        return chunks
+    
+    def _paragraph_spans(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Return the (start, end) offsets of the non-empty paragraphs between start and end."""
+        spans = []
+        position = start
+        
+        for match in PARAGRAPH_BREAK_PATTERN.finditer(text, start, end):
+            spans.append((position, match.start()))
+            position = match.end()
+        spans.append((position, end))
+        
+        # Trim surrounding whitespace and drop empty paragraphs
+        trimmed = []
+        for paragraph_start, paragraph_end in spans:
+            segment = text[paragraph_start:paragraph_end]
+            stripped = segment.strip()
+            if stripped:
+                paragraph_start += len(segment) - len(segment.lstrip())
+                trimmed.append((paragraph_start, paragraph_start + len(stripped)))
+        return trimmed
@@ -0,0 +1,22 @@
+from .compaction import ProfileCompactor, get_profile_compactor, history_entries
+from .encoding import decode_profiles, encode_profiles
+from .ranking import ProfileRanker, get_profile_ranker, score_profile
+from .similarity import char_ngrams, normalize_text, text_similarity
+from .validation import RefreshResult, check_profiles, refresh_profiles
+
+__all__ = [
+    'ProfileCompactor',
+    'get_profile_compactor',
+    'history_entries',
+    'decode_profiles',
+    'encode_profiles',
+    'ProfileRanker',
+    'get_profile_ranker',
+    'score_profile',
+    'char_ngrams',
+    'normalize_text',
+    'text_similarity',
+    'RefreshResult',
+    'check_profiles',
+    'refresh_profiles',
+]
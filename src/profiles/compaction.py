@@ -0,0 +1,166 @@
+"""
+Bounded growth of the list fields of character profiles.
+
+The profile update model only ever appends to `events`, `relationships` and
+`physical_characteristics`, and the whole profile is re-sent with every chunk in which the
+character appears. Once a field crosses its size budget, the compactor shrinks it back
+below target_ratio of the budget:
+
+1. near-duplicate entries (same normalized trigrams) are merged locally, keeping the
+   longer wording in the place of the first occurrence;
+2. for events, the older entries are condensed into a single digest entry by the
+   event_digest chain, and only the most recent events are kept verbatim;
+3. for the other fields, or if the digest cannot be produced, the oldest entries are dropped.
+
+Nothing is lost: the node records every entry in the character history table of the
+database before compacting (see CharacterDatabase.record_history).
+"""
+
+from dataclasses import replace
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from src.configs import profile_compaction_config
+from src.language_models.chains import get_chain
+from src.profiles.similarity import char_ngrams, jaccard, normalize_text
+from src.schemas.data_classes import Profile
+
+
+# Marks the entry of `events` holding the digest of the older events
+DIGEST_PREFIX = "ملخص الأحداث السابقة: "
+
+
+def field_size(entries: List[str]) -> int:
+    """Return the size in characters of a list field."""
+    return sum(len(entry) for entry in entries)
+
+
+def merge_near_duplicates(entries: List[str], threshold: float) -> List[str]:
+    """
+    Merge the entries whose normalized trigrams overlap at least `threshold`.
+    The longer wording of a duplicate group is kept, in the place of its first occurrence.
+    """
+    kept: List[str] = []
+    kept_ngrams = []
+
+    for entry in entries:
+        ngrams = char_ngrams(normalize_text(entry))
+        for position, other in enumerate(kept_ngrams):
+            if jaccard(ngrams, other) >= threshold:
+                if len(entry) > len(kept[position]):
+                    kept[position], kept_ngrams[position] = entry, ngrams
+                break
+        else:
+            kept.append(entry)
+            kept_ngrams.append(ngrams)
+
+    return kept
+
+
+def drop_oldest(entries: List[str], target: int) -> List[str]:
+    """Drop the oldest entries until the field fits the target size, keeping at least the newest."""
+    start = 0
+    while start < len(entries) - 1 and field_size(entries[start:]) > target:
+        start += 1
+    return entries[start:]
+
+
+def history_entries(profile: Profile) -> Dict[str, List[str]]:
+    """Return the entries of the compacted fields of a profile, without the event digest."""
+    fields = {field: list(getattr(profile, field)) for field in profile_compaction_config['budgets']}
+    if 'events' in fields:
+        fields['events'] = [event for event in fields['events'] if not event.startswith(DIGEST_PREFIX)]
+    return fields
+
+
+class ProfileCompactor:
+    """
+    Keeps the list fields of profiles within their size budgets.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None,
+                 target_ratio: float = profile_compaction_config['target_ratio'],
+                 duplicate_similarity: float = profile_compaction_config['duplicate_similarity'],
+                 recent_events: int = profile_compaction_config['recent_events']):
+        """
+        Initialize the compactor.
+
+        Args:
+            budgets: Size budget in characters of every compacted field; defaults to the config
+            target_ratio: Fraction of the budget a compacted field is brought back to
+            duplicate_similarity: Trigram similarity from which two entries are merged
+            recent_events: Number of events kept verbatim next to the digest
+        """
+        self.budgets = dict(profile_compaction_config['budgets'] if budgets is None else budgets)
+        self.target_ratio = target_ratio
+        self.duplicate_similarity = duplicate_similarity
+        self.recent_events = recent_events
+
+    def needs_compaction(self, profile: Profile) -> bool:
+        """Return True if a field of the profile is over its budget."""
+        return any(field_size(getattr(profile, field)) > budget for field, budget in self.budgets.items())
+
+    def compact(self, profile: Profile) -> Profile:
+        """
+        Return the profile with every field over its budget compacted; the other fields are unchanged.
+        """
+        changes = {}
+        for field, budget in self.budgets.items():
+            entries = getattr(profile, field)
+            if field_size(entries) <= budget:
+                continue
+
+            target = int(budget * self.target_ratio)
+            if field == 'events':
+                changes[field] = self._compact_events(entries, budget, target)
+            else:
+                changes[field] = drop_oldest(merge_near_duplicates(entries, self.duplicate_similarity), target)
+
+        return replace(profile, **changes) if changes else profile
+
+    def _compact_events(self, events: List[str], budget: int, target: int) -> List[str]:
+        """Merge duplicate events, then condense the older ones into the digest."""
+        digest, events = self._split_digest(events)
+        events = merge_near_duplicates(events, self.duplicate_similarity)
+        if field_size(events) + len(digest) <= target:
+            return self._with_digest(digest, events)
+
+        # Keep the newest events verbatim within half of the target
+        split = max(len(events) - self.recent_events, 0)
+        while split < len(events) - 1 and field_size(events[split:]) > target // 2:
+            split += 1
+        older, recent = events[:split], events[split:]
+
+        lines = ([f"- {digest}"] if digest else []) + [f"- {event}" for event in older]
+        try:
+            response = get_chain('event_digest').invoke({'events': "\n".join(lines)})
+        except ValueError:
+            # No tier returned a digest: keep the previous one and drop the oldest events instead
+            return self._with_digest(digest, drop_oldest(events, target - len(digest)))
+
+        digest_budget = max(target - field_size(recent) - len(DIGEST_PREFIX), budget // 4)
+        return self._with_digest(_truncate(response.summary.strip(), digest_budget), recent)
+
+    @staticmethod
+    def _split_digest(events: List[str]) -> Tuple[str, List[str]]:
+        """Return the text of the digest entry (or '') and the other events."""
+        digests = [event[len(DIGEST_PREFIX):] for event in events if event.startswith(DIGEST_PREFIX)]
+        return (digests[0] if digests else ''), [event for event in events if not event.startswith(DIGEST_PREFIX)]
+
+    @staticmethod
+    def _with_digest(digest: str, events: List[str]) -> List[str]:
+        return ([DIGEST_PREFIX + digest] if digest else []) + events
+
+
+def _truncate(text: str, size: int) -> str:
+    """Cut a text to at most `size` characters, at a word boundary when possible."""
+    if len(text) <= size:
+        return text
+    cut = text[:size - 1]
+    return (cut.rsplit(' ', 1)[0] if ' ' in cut else cut) + '…'
+
+
+@lru_cache(maxsize=None)
+def get_profile_compactor() -> ProfileCompactor:
+    """Return the shared compactor configured by profile_compaction_config."""
+    return ProfileCompactor()
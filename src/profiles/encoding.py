@@ -0,0 +1,105 @@
+"""
+Compact encoding of the profiles sent to the profile update model.
+
+The profiles used to be sent as the repr of the Profile dataclasses: every field name
+repeated for every profile, Python quoting and escapes, and empty fields included. The
+encoder writes compact JSON instead:
+
+- 'json': one object per profile with the keys of the model's output schema, empty
+  fields omitted (id and name are always kept);
+- 'table': the column names once, then one row per profile.
+
+Profiles and fields are written in a stable order, so the same profiles always give the
+same text. decode_profiles() reads both layouts back into Profile objects.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.configs import profile_encoding_config
+from src.schemas.data_classes import Profile
+
+
+# Output schema key -> Profile attribute, in the order they are written
+FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'hint': 'hint',
+    'aliases': 'aliases',
+    'age': 'age',
+    'role': 'role',
+    'personality': 'personality',
+    'physical_characteristics': 'physical_characteristics',
+    'relations': 'relationships',
+    'events': 'events',
+}
+
+_ALWAYS_KEPT = ('id', 'name')
+_LIST_FIELDS = ('aliases', 'physical_characteristics', 'relations', 'events')
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _sorted(profiles: Iterable[Profile]) -> List[Profile]:
+    return sorted(profiles, key=lambda profile: (profile.name, profile.id))
+
+
+def encode_profiles(profiles: Iterable[Profile], layout: Optional[str] = None) -> str:
+    """
+    Encode profiles for a prompt.
+
+    Args:
+        profiles: Profiles to encode
+        layout: 'json' or 'table'; defaults to profile_encoding_config['layout']
+
+    Raises:
+        ValueError: If the layout is unknown
+    """
+    layout = layout or profile_encoding_config['layout']
+    profiles = _sorted(profiles)
+
+    if layout == 'json':
+        return _dumps([
+            {key: getattr(profile, attribute) for key, attribute in FIELDS.items()
+             if key in _ALWAYS_KEPT or getattr(profile, attribute)}
+            for profile in profiles
+        ])
+
+    if layout == 'table':
+        columns = [key for key, attribute in FIELDS.items()
+                   if key in _ALWAYS_KEPT or any(getattr(profile, attribute) for profile in profiles)]
+        rows = [[getattr(profile, FIELDS[key]) for key in columns] for profile in profiles]
+        return _dumps({'columns': columns, 'rows': rows})
+
+    raise ValueError(f"Unknown profile layout: {layout}")
+
+
+def decode_profiles(text: str) -> List[Profile]:
+    """
+    Read profiles written by encode_profiles, in either layout; omitted fields are empty.
+
+    Raises:
+        ValueError: If the text is not an encoding of profiles
+    """
+    data = json.loads(text)
+    if isinstance(data, dict):
+        if set(data) != {'columns', 'rows'}:
+            raise ValueError("A profile table must have exactly 'columns' and 'rows'")
+        data = [dict(zip(data['columns'], row)) for row in data['rows']]
+    if not isinstance(data, list):
+        raise ValueError("Encoded profiles must be a list or a table")
+
+    return [_profile_from_fields(fields) for fields in data]
+
+
+def _profile_from_fields(fields: Dict[str, Any]) -> Profile:
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown profile fields: {sorted(unknown)}")
+
+    return Profile(**{
+        attribute: fields.get(key, [] if key in _LIST_FIELDS else '')
+        for key, attribute in FIELDS.items()
+    })
@@ -0,0 +1,114 @@
+"""
+Relevance ranking of the stored profiles retrieved for a refresh call.
+
+The database lookup is a substring match on the name, so a common name returns many
+unrelated profiles. The ranker scores every candidate against the extracted name and hint
+with character trigram similarity (the name against the candidate's name and aliases, the
+hint against its hint), keeps the top-k candidates of every name above a minimum score,
+deduplicates them by id and fits them in a token budget, best matches first. The profiles
+created for the chunk are not ranked: they are always sent, and count against the budget.
+"""
+
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from src.configs import profile_retrieval_config
+from src.language_models.prompt_cache import estimate_tokens
+from src.profiles.encoding import encode_profiles
+from src.profiles.similarity import char_ngrams, jaccard, normalize_text
+from src.schemas.data_classes import Profile
+
+
+# Share of the score given to the hint when both the extracted character and the profile have one
+HINT_WEIGHT = 0.3
+# Score of a stored name containing every word of the extracted one (e.g. without the family name)
+CONTAINED_SCORE = 0.8
+
+
+def name_score(name: str, candidate: str) -> float:
+    """Return the similarity of two names: trigram overlap, or word containment if higher."""
+    name, candidate = normalize_text(name), normalize_text(candidate)
+    score = jaccard(char_ngrams(name), char_ngrams(candidate))
+    words = set(name.split())
+    if words and words <= set(candidate.split()):
+        score = max(score, CONTAINED_SCORE)
+    return score
+
+
+def score_profile(name: str, hint: str, profile: Profile) -> float:
+    """Return the similarity in [0, 1] of a stored profile to an extracted name and hint."""
+    best_name_score = max(name_score(name, candidate) for candidate in [profile.name, *profile.aliases])
+
+    if not (hint and profile.hint):
+        return best_name_score
+    hint_score = jaccard(char_ngrams(normalize_text(hint)), char_ngrams(normalize_text(profile.hint)))
+    return (1 - HINT_WEIGHT) * best_name_score + HINT_WEIGHT * hint_score
+
+
+class ProfileRanker:
+    """
+    Selects the profiles sent to the profile update model.
+    """
+
+    def __init__(self, top_k: int = profile_retrieval_config['top_k'],
+                 token_budget: int = profile_retrieval_config['token_budget'],
+                 min_score: float = profile_retrieval_config['min_score']):
+        """
+        Initialize the ranker.
+
+        Args:
+            top_k: Maximum number of profiles kept per extracted name
+            token_budget: Estimated tokens of all the selected profiles, as encoded for the prompt
+            min_score: Minimum similarity of a kept profile
+        """
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_score = min_score
+
+    def rank(self, name: str, hint: str, candidates: Sequence[Profile]) -> List[Tuple[float, Profile]]:
+        """Return the top-k candidates matching a name and hint, best first."""
+        scored = [(score_profile(name, hint, profile), profile) for profile in candidates]
+        scored = [(score, profile) for score, profile in scored if score >= self.min_score]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:self.top_k]
+
+    def select(self, ranked: Sequence[List[Tuple[float, Profile]]], created: Sequence[Profile] = ()) -> List[Profile]:
+        """
+        Merge the ranked candidates of every name into the profiles of one refresh call.
+
+        The profiles created for the chunk are always kept, first: they exist in the database
+        and only this call can fill them. Then the best match of every name goes first, then
+        the second ones, and so on, by score within a rank. A profile matched by several names
+        is kept once. Candidates are added until the token budget is spent; the best match
+        overall is always kept.
+        """
+        order = sorted(
+            ((position, -score, index, profile)
+             for index, matches in enumerate(ranked)
+             for position, (score, profile) in enumerate(matches)),
+            key=lambda item: item[:3],
+        )
+
+        selected = list(created)
+        seen = {profile.id or profile.name for profile in created}
+        tokens = sum(estimate_tokens(encode_profiles([profile])) for profile in created)
+        retrieved = 0
+        for _, _, _, profile in order:
+            key = profile.id or profile.name
+            if key in seen:
+                continue
+            size = estimate_tokens(encode_profiles([profile]))
+            if retrieved and tokens + size > self.token_budget:
+                continue
+            selected.append(profile)
+            seen.add(key)
+            tokens += size
+            retrieved += 1
+
+        return selected
+
+
+@lru_cache(maxsize=None)
+def get_profile_ranker() -> ProfileRanker:
+    """Return the shared ranker configured by profile_retrieval_config."""
+    return ProfileRanker()
@@ -0,0 +1,64 @@
+"""
+Character n-gram similarity of short Arabic texts (names, hints, profile entries).
+
+Texts are normalized first (alif forms, ta marbuta, diacritics, tatweel, punctuation,
+case and spacing), so spelling variants of the same word share their n-grams.
+"""
+
+import re
+from typing import FrozenSet
+
+from src.preprocessors.text_cleaners import normalize_arabic_characters
+
+
+_NON_WORD = re.compile(r'[^\w\s]|_')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a short text for comparisons."""
+    text = normalize_arabic_characters(text).replace('ـ', '').replace('ى', 'ي')
+    text = _NON_WORD.sub(' ', text.lower())
+    return _SPACES.sub(' ', text).strip()
+
+
+def char_ngrams(text: str, n: int = 3) -> FrozenSet[str]:
+    """
+    Return the character n-grams of a normalized text, padded with spaces so that short
+    words and word boundaries have n-grams too.
+    """
+    padded = f' {text} '
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[start:start + n] for start in range(len(padded) - n + 1))
+
+
+def jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Return the Jaccard similarity of two n-gram sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def text_similarity(first: str, second: str, n: int = 3) -> float:
+    """Return the n-gram similarity of two texts, after normalization."""
+    return jaccard(char_ngrams(normalize_text(first), n), char_ngrams(normalize_text(second), n))
+
+
+def edit_similarity(first: str, second: str) -> float:
+    """Return 1 - the Levenshtein distance of two texts divided by the longer length."""
+    if first == second:
+        return 1.0
+    if not first or not second:
+        return 0.0
+
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, start=1):
+        current = [row]
+        for column, second_char in enumerate(second, start=1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (first_char != second_char)))
+        previous = current
+    return 1 - previous[-1] / len(first)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the profile compaction, with a stand-in event digest chain.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.databases.database import CharacterDatabase
+from src.language_models.chains import chain_registry
+from src.profiles.compaction import DIGEST_PREFIX, ProfileCompactor, field_size, history_entries, merge_near_duplicates
+from src.schemas.data_classes import Profile
+from src.schemas.output_structures import Summary
+
+
+ACTIONS = ["سافر إلى", "تشاجر مع أخيه في", "وجد رسالة قديمة في", "خسر عمله في", "تزوج فاطمة في", "هرب ليلا من"]
+PLACES = ["القاهرة", "بيت جده", "السوق الكبير", "الميناء", "المدرسة", "القرية", "المستشفى"]
+
+BUDGETS = {'events': 400, 'relationships': 120, 'physical_characteristics': 120}
+
+
+def make_profile(events=(), relationships=(), physical_characteristics=()):
+    return Profile(name="سليم", hint="", age="", role="", physical_characteristics=list(physical_characteristics),
+                   personality="", events=list(events), relationships=list(relationships), aliases=[], id="id-1")
+
+
+@pytest.fixture
+def digest_calls():
+    """The digest is the number of digested lines, so its size stays constant."""
+    calls = []
+
+    def digest(chain_input):
+        calls.append(chain_input['events'])
+        return Summary(summary=f"{len(chain_input['events'].splitlines())} أحداث سابقة")
+
+    chain_registry.override('event_digest', RunnableLambda(digest))
+    yield calls
+    chain_registry.reset()
+
+
+def test_merge_near_duplicates():
+    """Spelling variants are merged into the longer wording, at the place of the first one."""
+    entries = ["قابل سليم فاطمة في السوق", "ذهب إلى المدرسة", "قابل سليم فاطمه في السوق.", "ذهب الى المدرسة صباحا"]
+
+    assert merge_near_duplicates(entries, 0.8) == ["قابل سليم فاطمه في السوق.", "ذهب إلى المدرسة", "ذهب الى المدرسة صباحا"]
+
+
+def test_profile_under_budget_is_unchanged(digest_calls):
+    profile = make_profile(events=["حدث قصير"])
+
+    assert ProfileCompactor(BUDGETS).compact(profile) is profile
+    assert digest_calls == []
+
+
+def test_events_stay_bounded_over_a_long_book(digest_calls):
+    """Appending events chunk after chunk never lets the field grow past its budget."""
+    compactor = ProfileCompactor(BUDGETS, target_ratio=0.6, recent_events=3)
+    profile = make_profile()
+
+    events = [f"{action} {place}" for action in ACTIONS for place in PLACES]
+    for event in events:
+        profile.events = profile.events + [event]
+        profile = compactor.compact(profile)
+        assert field_size(profile.events) <= BUDGETS['events']
+
+    assert profile.events[0].startswith(DIGEST_PREFIX)
+    assert profile.events[-1] == events[-1]
+    # The previous digest is condensed again with the newly aged events
+    assert "أحداث سابقة" in digest_calls[-1].splitlines()[0]
+    assert len(digest_calls) < len(events) / 2
+
+
+def test_other_fields_drop_the_oldest_entries(digest_calls):
+    relationships = [f"شخصية {index}: صديق" for index in range(20)]
+
+    profile = ProfileCompactor(BUDGETS, target_ratio=0.5).compact(make_profile(relationships=relationships))
+
+    assert field_size(profile.relationships) <= 60
+    assert profile.relationships[-1] == relationships[-1]
+    assert digest_calls == []
+
+
+def test_digest_failure_falls_back_to_dropping(digest_calls):
+    def failing(_):
+        raise ValueError("no tier returned valid output")
+    chain_registry.override('event_digest', RunnableLambda(failing))
+    events = [f"الحدث رقم {index} في حياة سليم" for index in range(40)]
+
+    profile = ProfileCompactor(BUDGETS).compact(make_profile(events=events))
+
+    assert field_size(profile.events) <= BUDGETS['events']
+    assert profile.events[-1] == events[-1]
+
+
+def test_history_keeps_every_entry(tmp_path):
+    database = CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+    first = make_profile(events=["حدث 1", "حدث 2"], relationships=["فاطمة: أخت"])
+    second = make_profile(events=[DIGEST_PREFIX + "ملخص", "حدث 2", "حدث 3"])
+
+    database.record_history('id-1', history_entries(first))
+    database.record_history('id-1', history_entries(second))
+
+    assert database.get_history('id-1') == {'events': ["حدث 1", "حدث 2", "حدث 3"], 'relationships': ["فاطمة: أخت"]}
+    assert database.get_history('id-1', 'relationships') == {'relationships': ["فاطمة: أخت"]}
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/profiles/test_compaction.py")
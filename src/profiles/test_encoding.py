@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact profile encoding.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import json
+
+import pytest
+
+from src.profiles.encoding import decode_profiles, encode_profiles
+from src.schemas.data_classes import Profile
+
+
+def make_profiles():
+    return [
+        Profile(name="سليم", hint="", age="ثلاثون عاما", role="البطل", physical_characteristics=["طويل"],
+                personality="هادئ", events=["سافر إلى القاهرة"], relationships=["فاطمة: أخت"], aliases=["أبو علي"], id="b"),
+        Profile(name="فاطمة", hint="المهندسة", age="", role="", physical_characteristics=[], personality="",
+                events=[], relationships=[], aliases=[], id="a"),
+    ]
+
+
+@pytest.mark.parametrize('layout', ['json', 'table'])
+def test_round_trip(layout):
+    """Both layouts read back to the same profiles, in a stable order."""
+    profiles = make_profiles()
+
+    encoded = encode_profiles(profiles, layout)
+
+    assert encoded == encode_profiles(list(reversed(profiles)), layout)
+    assert decode_profiles(encoded) == sorted(profiles, key=lambda profile: profile.name)
+
+
+def test_json_omits_empty_fields():
+    encoded = json.loads(encode_profiles(make_profiles(), 'json'))
+
+    assert encoded[1] == {'id': 'a', 'name': "فاطمة", 'hint': "المهندسة"}
+    assert encoded[0]['relations'] == ["فاطمة: أخت"]
+
+
+def test_smaller_than_repr():
+    profiles = make_profiles()
+
+    assert len(encode_profiles(profiles, 'json')) < 0.7 * len(str(profiles))
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        encode_profiles(make_profiles(), 'xml')
+    with pytest.raises(ValueError):
+        decode_profiles('[{"id": "a", "name": "سليم", "colour": "أزرق"}]')
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/profiles/test_encoding.py")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the relevance ranking of the profiles retrieved for a refresh call.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from dataclasses import asdict
+
+from src.databases.database import CharacterDatabase
+from src.graphs.nodes import regular_nodes
+from src.profiles.ranking import ProfileRanker, score_profile
+from src.schemas.data_classes import LastAppearingCharacter, Profile
+
+
+def make_profile(name, hint="", id=None, aliases=(), events=()):
+    return Profile(name=name, hint=hint, age="", role="", physical_characteristics=[], personality="",
+                   events=list(events), relationships=[], aliases=list(aliases), id=id or name)
+
+
+def test_scores():
+    """Exact and spelling-variant names score highest, then names missing a word, then unrelated ones."""
+    assert score_profile("فاطمة", "", make_profile("فاطمه")) == 1.0
+    assert score_profile("محمد", "", make_profile("محمد عبد الله")) == 0.8
+    assert score_profile("أبو علي", "", make_profile("سليم", aliases=["ابو علي"])) == 1.0
+    assert score_profile("علي", "", make_profile("علياء")) < 0.5
+
+
+def test_hint_breaks_ties():
+    ranker = ProfileRanker(top_k=2, token_budget=1000, min_score=0.5)
+    doctor = make_profile("محمد", hint="الطبيب", id="doctor")
+    teacher = make_profile("محمد", hint="المعلم", id="teacher")
+
+    ranked = ranker.rank("محمد", "الطبيب", [teacher, doctor])
+
+    assert [profile.id for _, profile in ranked] == ["doctor", "teacher"]
+
+
+def test_common_name_is_capped():
+    """A common name matching dozens of stored profiles only brings the top-k relevant ones."""
+    ranker = ProfileRanker(top_k=3, token_budget=10000, min_score=0.5)
+    candidates = [make_profile(f"علي {index}", id=str(index)) for index in range(40)]
+    candidates += [make_profile(name) for name in ["علياء", "عليان", "جميل علي"]]
+
+    ranked = ranker.rank("علي", "", candidates)
+
+    assert len(ranker.select([ranked])) == 3
+
+
+def test_select_deduplicates_and_respects_budget():
+    ranker = ProfileRanker(top_k=3, token_budget=60, min_score=0.5)
+    big = make_profile("فاطمة", events=["حدث طويل جدا في حياة فاطمة"] * 10)
+    salim = make_profile("سليم")
+    first = ranker.rank("سليم", "", [salim])
+    second = ranker.rank("فاطمة", "", [big, salim])
+
+    selected = ranker.select([first, second])
+
+    assert [profile.name for profile in selected] == ["سليم"]
+
+
+def test_created_profiles_are_always_selected():
+    """The budget only limits the retrieved candidates, never the profiles created for the chunk."""
+    ranker = ProfileRanker(top_k=3, token_budget=10, min_score=0.5)
+    created = [make_profile("سليم", id="1"), make_profile("فاطمة", id="2")]
+    ali = make_profile("علي", id="3")
+
+    selected = ranker.select([ranker.rank("علي", "", [ali])], created)
+
+    assert [profile.id for profile in selected] == ["1", "2", "3"]
+    assert ranker.select([ranker.rank("علي", "", [ali, make_profile("علي", id="4")])], created)[2:] == [ali]
+
+
+def test_retriever_sends_the_created_profiles(tmp_path, monkeypatch):
+    """A character inserted for the chunk reaches the refresher even when the budget is spent."""
+    database = CharacterDatabase(str(tmp_path / 'characters.sqlite'))
+    salim = make_profile("سليم", events=["حدث طويل جدا في حياة سليم"] * 10)
+    database.insert_character(salim.name, {key: value for key, value in asdict(salim).items() if key != 'id'})
+    monkeypatch.setattr(regular_nodes, 'get_profile_ranker', lambda: ProfileRanker(top_k=3, token_budget=10, min_score=0.5))
+
+    update = regular_nodes.profile_retriever_creator({
+        'database': database,
+        'content_hash': 'book',
+        'current_chunk_index': 1,
+        'last_appearing_characters': [LastAppearingCharacter(name="سليم", hint=""),
+                                      LastAppearingCharacter(name="فاطمة", hint="")],
+    })
+
+    assert [profile.name for profile in update['last_profiles']] == ["فاطمة", "سليم"]
+
+
+if __name__ == "__main__":
+    test_scores()
+    test_hint_breaks_ties()
+    test_common_name_is_capped()
+    test_select_deduplicates_and_respects_budget()
+    test_created_profiles_are_always_selected()
+    print("All ranking tests passed")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the validation of the refreshed profiles and their partial retries.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.language_models.chains import chain_registry
+from src.profiles.encoding import FIELDS, decode_profiles
+from src.profiles.validation import check_profiles, refresh_profiles
+from src.schemas.data_classes import Profile
+from src.schemas.output_structures import ProfileData, ProfileRefresher
+
+
+def make_profile(name, id):
+    return Profile(name=name, hint="", age="", role="", physical_characteristics=[], personality="",
+                   events=[], relationships=[], aliases=[], id=id)
+
+
+def make_output(profile, **changes):
+    fields = {key: getattr(profile, attribute) for key, attribute in FIELDS.items()}
+    fields.update(changes)
+    return ProfileData(**fields)
+
+
+PROFILES = [make_profile("سليم", "1"), make_profile("فاطمة", "2"), make_profile("علي", "3")]
+
+
+@pytest.fixture
+def update_model():
+    """Install a profile update model answering with the given function of the sent profiles."""
+    calls = []
+
+    def install(answer):
+        def update(chain_input):
+            sent = decode_profiles(chain_input['profiles'])
+            calls.append(sorted(profile.id for profile in sent))
+            return answer(sent, len(calls))
+
+        chain_registry.override('profile_update', RunnableLambda(update))
+        return calls
+
+    yield install
+    chain_registry.reset()
+
+
+def test_check_profiles():
+    """Invented ids, duplicates and names of another character are rejected; missing profiles fail."""
+    salim, fatima, ali = PROFILES
+    returned = [
+        make_output(salim, role="بطل"),
+        make_output(salim, role="راوي"),
+        make_output(fatima, id="99"),
+        make_output(ali, name="فاطمة"),
+    ]
+
+    valid, failed = check_profiles(PROFILES, returned)
+
+    assert [(profile.id, profile.role) for profile in valid] == [("1", "بطل")]
+    assert [profile.id for profile in failed] == ["2", "3"]
+
+
+def test_only_failed_profiles_are_retried(update_model):
+    def answer(sent, call):
+        if call == 1:
+            # Fatima under an invented id, Ali missing
+            salim, fatima, _ = PROFILES
+            return ProfileRefresher(profiles=[make_output(salim, role="بطل"), make_output(fatima, id="99")])
+        return ProfileRefresher(profiles=[make_output(profile, role="ثانوي") for profile in sent])
+
+    calls = update_model(answer)
+
+    result = refresh_profiles("نص", PROFILES, max_retries=2)
+
+    assert calls == [["1", "2", "3"], ["2", "3"]]
+    assert {profile.id: profile.role for profile in result.updated} == {"1": "بطل", "2": "ثانوي", "3": "ثانوي"}
+    assert result.failed == [] and result.retried == 2
+
+
+def test_failed_call_is_split(update_model):
+    """A call that fails as a whole is split until the profile breaking it is isolated."""
+    def answer(sent, call):
+        if any(profile.id == "3" for profile in sent):
+            raise ValueError("No tier returned a parsable answer")
+        return ProfileRefresher(profiles=[make_output(profile) for profile in sent])
+
+    calls = update_model(answer)
+
+    result = refresh_profiles("نص", PROFILES, max_retries=2)
+
+    assert calls == [["1", "2", "3"], ["1"], ["2", "3"], ["2"], ["3"]]
+    assert sorted(profile.id for profile in result.updated) == ["1", "2"]
+    assert [profile.id for profile in result.failed] == ["3"]
+
+
+def test_retries_are_bounded(update_model):
+    calls = update_model(lambda sent, call: ProfileRefresher(profiles=[]))
+
+    result = refresh_profiles("نص", PROFILES, max_retries=1)
+
+    assert len(calls) == 2
+    assert result.updated == [] and result.failed == PROFILES
+
+
+if __name__ == "__main__":
+    print("Run with pytest: python -m pytest src/profiles/test_validation.py")
@@ -0,0 +1,121 @@
+"""
+Validation of the profile update output, with partial retries.
+
+The profile update model returns a list of profiles that must match the profiles it was
+sent, by id. Instead of trusting the whole answer (or redoing the whole call when it
+fails), every returned profile is checked:
+
+- its id must be one of the ids that were sent (no invented or missing id), once;
+- its name must be non-empty and still match the sent profile's name or aliases, so a
+  profile cannot be written under the id of another character.
+
+The valid profiles are committed and only the failed or missing ones are sent again, in a
+smaller follow-up call, up to max_retries times. When a whole call fails (no tier returned
+a parsable answer), its profiles are split in two halves, so a single bad profile does not
+hold back the others. Profiles that still fail keep their previous version.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.configs import profile_refresh_config
+from src.language_models.chains import get_chain
+from src.profiles.encoding import encode_profiles
+from src.profiles.ranking import score_profile
+from src.schemas.data_classes import Profile
+from src.schemas.output_structures import ProfileData
+
+
+# Minimum similarity of a returned name to the sent profile's name or aliases
+MIN_NAME_SCORE = 0.5
+
+
+@dataclass
+class RefreshResult:
+    updated: List[Profile] = field(default_factory=list)
+    failed: List[Profile] = field(default_factory=list)  # as they were sent
+    calls: int = 0
+    retried: int = 0  # profiles sent again after a failure
+
+
+def profile_from_output(profile_data: ProfileData) -> Profile:
+    """Return the Profile of a profile returned by the model."""
+    return Profile(
+        name=profile_data.name.strip(),
+        hint=profile_data.hint,
+        age=profile_data.age,
+        role=profile_data.role,
+        physical_characteristics=profile_data.physical_characteristics,
+        personality=profile_data.personality,
+        events=profile_data.events,
+        relationships=profile_data.relations,
+        aliases=profile_data.aliases,
+        id=profile_data.id.strip()
+    )
+
+
+def check_profiles(sent: Sequence[Profile], returned: Sequence[ProfileData]) -> Tuple[List[Profile], List[Profile]]:
+    """
+    Check the returned profiles against the sent ones.
+
+    Returns:
+        The valid returned profiles, and the sent profiles without a valid answer
+    """
+    sent_by_id: Dict[str, Profile] = {profile.id: profile for profile in sent}
+    valid: Dict[str, Profile] = {}
+
+    for profile_data in returned:
+        profile = profile_from_output(profile_data)
+        original = sent_by_id.get(profile.id)
+        if original is None or profile.id in valid or not profile.name:
+            continue
+        if max(score_profile(name, '', original) for name in [profile.name, *profile.aliases]) < MIN_NAME_SCORE:
+            continue
+        valid[profile.id] = profile
+
+    return list(valid.values()), [profile for profile in sent if profile.id not in valid]
+
+
+def refresh_profiles(text: str, profiles: Sequence[Profile], max_retries: Optional[int] = None) -> RefreshResult:
+    """
+    Update profiles with the profile update chain, re-requesting only the failed ones.
+
+    Args:
+        text: Text the profiles are updated from
+        profiles: Profiles to update; they must have distinct, non-empty ids
+        max_retries: Maximum number of follow-up rounds; defaults to profile_refresh_config['max_retries']
+
+    Returns:
+        The updated profiles and the profiles that could not be updated
+    """
+    max_retries = profile_refresh_config['max_retries'] if max_retries is None else max_retries
+    chain = get_chain('profile_update')
+    result = RefreshResult()
+
+    pending = [list(profiles)] if profiles else []
+    for attempt in range(max_retries + 1):
+        if attempt:
+            result.retried += sum(len(batch) for batch in pending)
+
+        next_pending = []
+        for batch in pending:
+            result.calls += 1
+            try:
+                response = chain.invoke({'text': text, 'profiles': encode_profiles(batch)})
+            except ValueError:
+                # No tier returned a parsable answer for the batch: isolate the bad profile
+                middle = len(batch) // 2
+                next_pending.extend([batch[:middle], batch[middle:]] if middle else [batch])
+                continue
+
+            valid, failed = check_profiles(batch, response.profiles)
+            result.updated.extend(valid)
+            if failed:
+                next_pending.append(failed)
+
+        pending = next_pending
+        if not pending:
+            break
+
+    result.failed = [profile for batch in pending for profile in batch]
+    return result
@@ -18,4 +18,19 @@ class Profile:
 class LastAppearingCharacter:
     name: str
     hint: str
-    
\ No newline at end of file
+    
+@dataclass
+class TextChunk:
+    text: str
+    index: int
+    chapter_id: int | None
+
+@dataclass
+class SummaryNode:
+    summary: str
+    scope: str
+    level: int
+    position: int
+    first_chunk: int
+    last_chunk: int
+    chapter_id: int | None
@@ -60,4 +60,8 @@ class ProfileRefresher(BaseModel):
 
 class Summary(BaseModel):
     """Use this schema to format the summary output."""
-    summary: str = Field(description="ملخص النص")
\ No newline at end of file
+    summary: str = Field(description="ملخص النص")
+
+class SummaryWithCharacters(Summary):
+    """Use this schema to format the fused summary output: the summary and the characters it mentions."""
+    characters: list[Character] = Field(description="قائمة بالشخصيات المذكورة في الملخص")
@@ -5,28 +5,71 @@ from src.schemas.data_classes import Profile, LastAppearingCharacter
 
 class State(TypedDict):
     file_path: str
+    content_hash: str | None
+    chunks_cached: bool
     cleaned_text: str
-    context_text: str
+    content_text: str
     chunk_generator: object
     current_chunk: str
+    current_chunk_index: int
+    current_chapter_id: int | None
     previous_chunk: str
     last_profiles: list[Profile] | None
     last_appearing_characters: list[LastAppearingCharacter] | None
-    database: CharacterDatabase
+    database: CharacterDatabase | None
     no_more_chunks: bool
     is_arabic : bool
     last_summary: str
 
 initial_state = {
     'file_path': 'resources/texts/english-test.txt',
+    'content_hash': None,
+    'chunks_cached': False,
     'cleaned_text': '',
-    'context_text': '',
+    'content_text': '',
     'chunk_generator': None,
     'current_chunk': '',
+    'current_chunk_index': -1,
+    'current_chapter_id': None,
     'previous_chunk': '',
     'last_profiles': None,
     'last_appearing_characters': None,
-    'database': CharacterDatabase(),
+    'database': None,  # the global database (get_character_db) unless a run sets its own
     'no_more_chunks': False,
     'last_summary': ''
 }
+
+
+class SlimState(TypedDict):
+    """
+    State of the slim graph: references to the preprocessed artifacts instead of their text.
+    The chunk texts are read on demand from the chunk store, and the database is opened from
+    its path, so every superstep carries a few KB regardless of the book's size.
+    """
+    file_path: str
+    content_hash: str | None
+    is_arabic: bool
+    chunk_store: str | None
+    chunk_count: int
+    current_chunk_index: int
+    current_chapter_id: int | None
+    no_more_chunks: bool
+    database_path: str | None
+    last_profiles: list[Profile] | None
+    last_appearing_characters: list[LastAppearingCharacter] | None
+    last_summary: str
+
+initial_slim_state = {
+    'file_path': 'resources/texts/english-test.txt',
+    'content_hash': None,
+    'is_arabic': False,
+    'chunk_store': None,
+    'chunk_count': 0,
+    'current_chunk_index': -1,
+    'current_chapter_id': None,
+    'no_more_chunks': False,
+    'database_path': None,
+    'last_profiles': None,
+    'last_appearing_characters': None,
+    'last_summary': ''
+}
@@ -10,7 +10,7 @@ import os
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.preprocessors.metadata_remover import remove_book_metadata
+from src.preprocessors.metadata_remover import remove_book_metadata, remove_book_metadata_batch
 
 def test_priority_logic():
     """Test the improved priority logic that checks content markers first."""
@@ -119,5 +119,38 @@ def test_priority_logic():
             file.write(cleaned_text)
         print(f"\nSaved to: {output_path}")
 
+def test_repeated_metadata_lines():
+    """Repeated metadata lines are located at their own offsets, not at the first copy."""
+    
+    test_text = """دار النشر
+نص قصير
+دار النشر
+كان الجو هادئا في القرية."""
+    
+    cleaned = remove_book_metadata(test_text)
+    
+    assert cleaned.strip() == "كان الجو هادئا في القرية.", cleaned
+    print("✓ SUCCESS: Repeated metadata lines are handled at their own offsets")
+
+
+def test_search_window_and_batch():
+    """The search window is configurable and the batch API keeps the input order."""
+    
+    prose = "كان الجو هادئا في القرية. " * 10
+    late_marker_text = prose + "\nفصل أول: بداية القصة"
+    
+    assert remove_book_metadata(late_marker_text, search_window_size=50) == late_marker_text
+    assert remove_book_metadata(late_marker_text).startswith("فصل أول")
+    
+    texts = [late_marker_text, "نشر وتوزيع\nالمحتوى", prose]
+    results = remove_book_metadata_batch(texts)
+    
+    assert results == [remove_book_metadata(text) for text in texts]
+    assert results[1].strip() == "المحتوى"
+    print("✓ SUCCESS: Search window is configurable and batch results match single calls")
+
+
 if __name__ == "__main__":
-    test_priority_logic() 
\ No newline at end of file
+    test_priority_logic()
+    test_repeated_metadata_lines()
+    test_search_window_and_batch()